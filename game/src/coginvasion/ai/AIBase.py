@@ -8,8 +8,6 @@ Copyright (c) CIO Team. All rights reserved.
 
 """
 
-import time
-
 from direct.directnotify.DirectNotifyGlobal import directNotify
 from direct.interval.IntervalManager import ivalMgr
 from direct.showbase.BulletinBoardGlobal import *
@@ -23,6 +21,8 @@ from panda3d.core import VirtualFileSystem, NodePath, GraphicsEngine
 from panda3d.core import ClockObject, TrueClock, Notify, PandaNode
 from pandac.PandaModules import getConfigShowbase
 
+from ServerClock import ServerClock
+
 class AIBase:
 	notify = directNotify.newCategory("AIBase")
 
@@ -33,7 +33,9 @@ class AIBase:
 		self.messenger = messenger
 		self.bboard = bulletinBoard
 		self.taskMgr = taskMgr
-		self.AISleep = self.config.GetFloat('ai-sleep', 0.04)
+		self.serverClock = ServerClock(self.config.GetFloat('server-ticks', 30),
+			self.config.GetInt('server-max-catchup-ticks', 5),
+			self.config.GetFloat('server-tick-report-interval', 0))
 		Task.TaskManager.taskTimerVerbose = self.config.GetBool('task-timer-verbose', 0)
 		Task.TaskManager.extendedExceptions = self.config.GetBool('extended-exceptions', 0)
 		self.sfxManagerList = None
@@ -53,10 +55,6 @@ class AIBase:
 		__builtins__['hidden'] = self.hidden
 		self.restart()
 
-	def __sleepCycleTask(self, task):
-		time.sleep(self.AISleep)
-		return Task.cont
-
 	def __resetPrevTransform(self, state):
 		PandaNode.resetAllPrevTransform()
 		return Task.cont
@@ -76,7 +74,7 @@ class AIBase:
 		AIBase.notify.info('Shutting down...')
 		self.taskMgr.remove('ivalLoop')
 		self.taskMgr.remove('igLoop')
-		self.taskMgr.remove('aiSleep')
+		self.serverClock.stop()
 		self.eventMgr.shutdown()
 		try:
 			self.getRepository().shutdown()
@@ -88,8 +86,7 @@ class AIBase:
 		self.taskMgr.add(self.__resetPrevTransform, 'resetPrevTransform', priority=-51)
 		self.taskMgr.add(self.__ivalLoop, 'ivalLoop', priority=20)
 		self.taskMgr.add(self.__igLoop, 'igLoop', priority=50)
-		if self.AISleep >= 0:
-			self.taskMgr.add(self.__sleepCycleTask, 'aiSleep', priority=55)
+		self.serverClock.start(self.taskMgr)
 		self.eventMgr.restart()
 
 	def getRepository(self):
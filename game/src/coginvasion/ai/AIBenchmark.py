@@ -0,0 +1,330 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file AIBenchmark.py
+
+Headless benchmark of the per-zone simulation that the AI server runs.
+
+Generates real DistributedBattleZoneAIs with real BSP levels and spawns real
+DistributedSuitAIs in them from the levels' Cog spawn points, along with
+DistributedToonAIs for them to fight. The AI repository is the real one,
+minus its connection: objects are generated and deleted locally, and field
+updates are dropped, so no Astron cluster is needed.
+
+It runs a fixed number of ticks of the task manager, with the same fixed
+timestep as the server, and reports the time spent in the Cogs' thinking,
+perception, pathing, attacks and physics, and the peak memory of the process.
+
+Run it from the game directory:
+    ppython -m src.coginvasion.ai.AIBenchmark --zones 8 --cogs 10 --toons 4 --ticks 1000
+"""
+
+import __builtin__
+
+__builtin__.process = 'ai'
+
+__builtin__.__dict__.update(__import__('panda3d.core', fromlist=['*']).__dict__)
+
+import sys
+sys.dont_write_bytecode = True
+
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--zones', type = int, default = 4, help = 'The number of battle zones to simulate.')
+parser.add_argument('--cogs', type = int, default = 8, help = 'The number of Cogs in each zone.')
+parser.add_argument('--toons', type = int, default = 4, help = 'The number of Toons in each zone.')
+parser.add_argument('--ticks', type = int, default = 600, help = 'The number of ticks to run.')
+parser.add_argument('--maps', nargs = '+', default = ['sellbot_floor_1', 'sellbot_floor_2', 'lawbot_floor_1'],
+                    help = 'The BSP levels to load, zones cycle through them.')
+parser.add_argument('--seed', type = int, default = 0, help = 'Random seed, so runs are comparable.')
+parser.add_argument('config', nargs = '*', default = ['config/config_server.prc'], help = "PRC file(s) to load.")
+args = parser.parse_args()
+
+from panda3d.core import loadPrcFile, loadPrcFileData, VirtualFileSystem, Filename
+
+loadPrcFileData('', 'model-path ./resources')
+
+vfs = VirtualFileSystem.getGlobalPtr()
+for phase in ['0', '3', '3.5', '4', '5', '5.5', '6', '7', '8', '9', '10', '11', '12', '13', '14']:
+    vfs.mount(Filename("resources/phase_%s.mf" % phase), ".", VirtualFileSystem.MFReadOnly)
+
+for prc in args.config:
+    loadPrcFile(prc)
+
+from src.coginvasion.base.Metadata import Metadata
+__builtins__.metadata = Metadata()
+metadata.PROCESS = 'server'
+metadata.DEDICATED_SERVER = True
+
+loadPrcFileData('', 'window-type none')
+loadPrcFileData('', 'audio-library-name none')
+
+from direct.showbase.ShowBase import ShowBase
+base = ShowBase()
+
+from p3recastnavigation import RNNavMeshManager
+
+nmMgr = RNNavMeshManager.get_global_ptr()
+nmMgr.set_root_node_path(render)
+nmMgr.get_reference_node_path().reparentTo(render)
+nmMgr.start_default_update()
+base.nmMgr = nmMgr
+
+from direct.distributed.ClockDelta import globalClockDelta
+__builtins__.globalClockDelta = globalClockDelta
+
+from src.coginvasion.ai.CogInvasionAIRepository import CogInvasionAIRepository
+from src.coginvasion.attack.AttackManagerAI import AttackManagerAI
+from src.coginvasion.attack.BaseAttackAI import BaseAttackAI
+from src.coginvasion.attack.ProjectileManagerAI import ProjectileManager
+from src.coginvasion.battle.DistributedBattleZoneAI import DistributedBattleZoneAI
+from src.coginvasion.battle.HitResolverAI import HitResolver
+from src.coginvasion.battle.PathPlannerAI import PathPlanner
+from src.coginvasion.cog.ai.BaseNPCAI import BaseNPCAI
+from src.coginvasion.cog.ai.PerceptionCacheAI import PerceptionCache
+from src.coginvasion.cogoffice.AIEntities import SuitSpawn
+from src.coginvasion.toon.DistributedToonAI import DistributedToonAI
+
+import inspect
+import random
+
+def getAttackClasses():
+    """Returns BaseAttackAI and the classes of every attack, and the classes in between."""
+
+    classes = set()
+    for attackCls in AttackManagerAI.AttackClasses.values():
+        for cls in inspect.getmro(attackCls):
+            if issubclass(cls, BaseAttackAI):
+                classes.add(cls)
+    return classes
+
+Sections = ['think', 'perception', 'pathing', 'attacks', 'physics']
+
+# The methods whose time goes to each section. The time of a method that is
+# called from another one goes to its own section only, e.g. the perception
+# an NPC does while it thinks isn't counted as thinking.
+SectionMethods = {
+    'think':        [(BaseNPCAI, ['runAI'])],
+    'perception':   [(PerceptionCache, ['getLeaf', 'isSameLeaf', 'isInPVS', 'doesLineTrace'])],
+    'pathing':      [(PathPlanner, ['planPath', 'requestPath', '_PathPlanner__planTask'])],
+    'attacks':      [(cls, ['think', 'npcUseAttack', 'doTraceAndDamage', 'onProjectileHit']) for cls in getAttackClasses()] +
+                    [(HitResolver, ['getAvatarFromNode', 'getAvatarsInRadius']),
+                     (ProjectileManager, ['_ProjectileManager__stepTask'])],
+    'physics':      [(DistributedBattleZoneAI, ['_DistributedBattleZoneAI__updateTask'])]
+}
+
+ToonStrand = "00/00/00/00/00/00/00/00/00/00/00/00/00"
+# The Toons never die, so the Cogs have something to fight for the whole run.
+ToonHealth = 10000
+
+class BenchAIRepository(CogInvasionAIRepository):
+    """
+    The AI repository without a connection. Objects are generated and
+    deleted right away instead of by the state server, and nothing is sent.
+    """
+
+    def __init__(self):
+        CogInvasionAIRepository.__init__(self, config.GetInt('air-base-channel', 401000000),
+                                         config.GetInt('air-stateserver', 10000))
+        self.districtId = self.allocateChannel()
+        self.attackMgr = AttackManagerAI()
+
+    def send(self, dg):
+        pass
+
+    def sendUpdate(self, do, fieldName, args):
+        pass
+
+    def generateWithRequiredAndId(self, do, doId, parentId, zoneId, optionalFields = []):
+        do.doId = doId
+        self.addDOToTables(do, location = (parentId, zoneId))
+
+    def requestDelete(self, do):
+        do.delete()
+        self.removeDOFromTables(do)
+
+    def getAvatarIdFromSender(self):
+        return 0
+
+class Timer:
+
+    def __init__(self):
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed):
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+class SectionTimer:
+    """Times the methods in SectionMethods by wrapping them on their classes."""
+
+    def __init__(self):
+        self.clock = TrueClock.getGlobalPtr()
+        self.timers = dict((section, Timer()) for section in Sections)
+        # The time of each section in the current tick.
+        self.tickTimes = dict((section, 0.0) for section in Sections)
+        # [start time, time of the sections called from it]
+        self.stack = []
+
+    def instrument(self):
+        for section, methods in SectionMethods.items():
+            for cls, names in methods:
+                for name in names:
+                    self.__wrapMethod(cls, name, section)
+
+    def __wrapMethod(self, cls, name, section):
+        # Only where the class defines it, an inherited method is wrapped on the class it comes from.
+        if name in cls.__dict__:
+            setattr(cls, name, self.__makeWrapper(cls.__dict__[name], section))
+
+    def __makeWrapper(self, func, section):
+        def wrapper(*args, **kwargs):
+            self.stack.append([self.clock.getShortTime(), 0.0])
+            try:
+                return func(*args, **kwargs)
+            finally:
+                start, childTime = self.stack.pop()
+                elapsed = self.clock.getShortTime() - start
+                self.tickTimes[section] += elapsed - childTime
+                if self.stack:
+                    self.stack[-1][1] += elapsed
+        wrapper.__name__ = func.__name__
+        return wrapper
+
+    def reset(self):
+        for section in Sections:
+            self.timers[section] = Timer()
+            self.tickTimes[section] = 0.0
+
+    def endTick(self):
+        """Returns the time spent in all sections this tick."""
+
+        total = 0.0
+        for section in Sections:
+            elapsed = self.tickTimes[section]
+            self.timers[section].add(elapsed)
+            self.tickTimes[section] = 0.0
+            total += elapsed
+        return total
+
+def getPeakMemory():
+    """Returns the peak resident memory of the process in megabytes, or None if we can't tell."""
+
+    try:
+        import resource
+        # Kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024.0 * 1024.0)
+    except (ImportError, AttributeError):
+        return None
+
+def makeZone(air, room):
+    zone = DistributedBattleZoneAI(air)
+    zone.generateWithRequired(air.allocateZone())
+    # Battle zones that have Cogs link their own spawn points.
+    zone.bspLoader.linkServerEntityToClass("cogoffice_suitspawn", SuitSpawn)
+    zone.b_setMap(room)
+    return zone
+
+def spawnAvatars(air, zone, numCogs, numToons):
+    spawns = list(zone.bspLoader.findAllEntities("cogoffice_suitspawn"))
+    if len(spawns) == 0:
+        print "%s has no Cog spawn points, skipping it." % zone.getMap()
+        return [], []
+
+    cogs = []
+    for i in xrange(numCogs):
+        cogs.append(spawns[i % len(spawns)].Spawn())
+
+    toons = []
+    for i in xrange(numToons):
+        toon = DistributedToonAI(air)
+        toon.setDNAStrand(ToonStrand)
+        toon.setMaxHealth(ToonHealth)
+        toon.setHealth(ToonHealth)
+        toon.generateWithRequired(zone.zoneId)
+        toon.setPos(random.choice(spawns).cEntity.getOrigin())
+        toons.append(toon)
+    return cogs, toons
+
+def run():
+    random.seed(args.seed)
+    clock = TrueClock.getGlobalPtr()
+
+    base.air = BenchAIRepository()
+
+    sectionTimer = SectionTimer()
+    sectionTimer.instrument()
+
+    # Every tick moves the frame time ahead by one tick period, like the ServerClock does.
+    tickRate = config.GetFloat('server-ticks', 30)
+    globalClock.setMode(ClockObject.MNonRealTime)
+    globalClock.setDt(1.0 / tickRate)
+
+    print "Loading %d zones..." % args.zones
+    loadStart = clock.getShortTime()
+    zones = []
+    cogs = []
+    toons = []
+    for i in xrange(args.zones):
+        zone = makeZone(base.air, args.maps[i % len(args.maps)])
+        zoneCogs, zoneToons = spawnAvatars(base.air, zone, args.cogs, args.toons)
+        cogs += zoneCogs
+        toons += zoneToons
+        zones.append(zone)
+    print "Loaded in %.2f seconds." % (clock.getShortTime() - loadStart)
+
+    # Don't count whatever loading did.
+    sectionTimer.reset()
+
+    tickTimer = Timer()
+    otherTimer = Timer()
+    damage = 0
+
+    print "Running %d ticks..." % args.ticks
+    for tick in xrange(args.ticks):
+        tickStart = clock.getShortTime()
+        taskMgr.step()
+        tickTime = clock.getShortTime() - tickStart
+
+        tickTimer.add(tickTime)
+        otherTimer.add(tickTime - sectionTimer.endTick())
+
+        for toon in toons:
+            if toon.getHealth() < ToonHealth:
+                damage += ToonHealth - toon.getHealth()
+                toon.b_setHealth(ToonHealth)
+
+    budget = 1000.0 / tickRate
+    avgTick = tickTimer.total / args.ticks * 1000.0
+    print
+    print "%d zones, %d Cogs and %d Toons in all, %d ticks, %d damage dealt to Toons" % (args.zones, len(cogs), len(toons),
+                                                                                       args.ticks, damage)
+    print "%-12s %10s %10s %10s %8s" % ("section", "total ms", "avg ms", "max ms", "share")
+    for name, timer in [(section, sectionTimer.timers[section]) for section in Sections] + [('other', otherTimer)]:
+        share = (timer.total / tickTimer.total * 100.0) if tickTimer.total > 0 else 0.0
+        print "%-12s %10.2f %10.3f %10.3f %7.1f%%" % (name, timer.total * 1000.0, timer.total / args.ticks * 1000.0,
+                                                     timer.max * 1000.0, share)
+    print "%-12s %10.2f %10.3f %10.3f" % ("tick", tickTimer.total * 1000.0, avgTick, tickTimer.max * 1000.0)
+    print
+    print "Tick budget at %.0f ticks/s is %.2f ms, average tick uses %.1f%% of it." % (tickRate, budget, avgTick / budget * 100.0)
+    peak = getPeakMemory()
+    if peak is not None:
+        print "Peak memory: %.1f MB" % peak
+    else:
+        print "Peak memory: unknown"
+
+    for toon in toons:
+        toon.requestDelete()
+    for zone in zones:
+        zone.requestDelete()
+
+run()
@@ -25,23 +25,6 @@ from panda3d.core import loadPrcFile, loadPrcFileData, VirtualFileSystem, PStatC
 
 loadPrcFileData('', 'model-path ./resources')
 
-vfs = VirtualFileSystem.getGlobalPtr()
-vfs.mount(Filename("resources/phase_0.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_3.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_3.5.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_4.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_5.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_5.5.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_6.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_7.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_8.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_9.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_10.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_11.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_12.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_13.mf"), ".", VirtualFileSystem.MFReadOnly)
-vfs.mount(Filename("resources/phase_14.mf"), ".", VirtualFileSystem.MFReadOnly)
-
 import argparse
 
 parser = argparse.ArgumentParser()
@@ -65,6 +48,18 @@ if args.astron_ip: localconfig += 'air-connect %s\n' % args.astron_ip
 if args.eventlogger_ip: localconfig += 'eventlog-host %s\n' % args.eventlogger_ip
 loadPrcFileData('Command-line', localconfig)
 
+# Start loading the DNA files of the hoods on worker threads, each phase's
+# files as soon as its multifile is mounted.
+from src.coginvasion.hood.DNAPreparerAI import DNAPreparer
+dnaPreparer = DNAPreparer(ConfigVariableInt('ai-dna-prepare-threads', 4).getValue())
+
+vfs = VirtualFileSystem.getGlobalPtr()
+for phase in ['phase_0', 'phase_3', 'phase_3.5', 'phase_4', 'phase_5', 'phase_5.5', 'phase_6', 'phase_7',
+			  'phase_8', 'phase_9', 'phase_10', 'phase_11', 'phase_12', 'phase_13', 'phase_14']:
+	vfs.mount(Filename("resources/%s.mf" % phase), ".", VirtualFileSystem.MFReadOnly)
+	dnaPreparer.phaseMounted(phase)
+dnaPreparer.finishQueuing()
+
 from src.coginvasion.base.Metadata import Metadata
 __builtins__.metadata = Metadata()
 metadata.PROCESS = 'server'
@@ -78,7 +73,11 @@ loadPrcFileData('', 'audio-library-name none')
 from direct.showbase.ShowBase import ShowBase
 base = ShowBase()
 # Limit server to a certain number of ticks per second
-#base.setSleep(1 / base.config.GetFloat('server-ticks', 30))
+from src.coginvasion.ai.ServerClock import ServerClock
+base.serverClock = ServerClock(config.GetFloat('server-ticks', 30),
+	config.GetInt('server-max-catchup-ticks', 5),
+	config.GetFloat('server-tick-report-interval', 0))
+base.serverClock.start(base.taskMgr)
 
 from p3recastnavigation import RNNavMeshManager
 
@@ -97,6 +96,7 @@ base.air = CIAIR(config.GetInt('air-base-channel', 401000000), config.GetInt('ai
 # We deal with attacks on the server side as well
 from src.coginvasion.attack.AttackManagerAI import AttackManagerAI
 base.air.attackMgr = AttackManagerAI()
+base.air.dnaPreparer = dnaPreparer
 host = args.astron_ip
 port = 7033
 if ':' in host:
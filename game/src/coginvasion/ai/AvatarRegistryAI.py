@@ -0,0 +1,160 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file AvatarRegistryAI.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+from src.coginvasion.globals.CIGlobals import ToonClasses
+
+class AvatarEntry:
+    """Where an avatar is in the registry's lists."""
+
+    def __init__(self, avatar, zoneId, isToon, key):
+        self.avatar = avatar
+        self.zoneId = zoneId
+        self.isToon = isToon
+        self.key = key
+        # Index in the zone's list of all avatars, and in the zone's list
+        # of toons or NPCs.
+        self.zoneIndex = -1
+        self.typeIndex = -1
+
+class AvatarRegistry:
+    """
+    Keeps track of which zone every DistributedAvatarAI is in.
+
+    Each zone has a list of all of its avatars, and separate lists of its
+    toons and its NPCs. Adding, removing and moving an avatar are constant
+    time: an avatar is removed from a list by moving the last avatar of the
+    list into its place, so the order of the lists isn't kept.
+
+    The lists are handed out as they are, don't change them or remove avatars
+    while going through them. The AI repository's getters hand out copies.
+    """
+
+    notify = directNotify.newCategory("AvatarRegistry")
+
+    def __init__(self):
+        # zoneId -> [avatar]
+        self.zone2avatars = {}
+        self.zone2toons = {}
+        self.zone2npcs = {}
+
+        # Avatars are keyed by id(), a NodePath's hash and equality
+        # change once it has been removed.
+        self.entries = {}
+
+        # NodePath key -> avatar
+        self.key2avatar = {}
+
+    def getNumAvatars(self):
+        return len(self.entries)
+
+    def hasAvatar(self, avatar):
+        return id(avatar) in self.entries
+
+    def getAvatarZone(self, avatar):
+        entry = self.entries.get(id(avatar))
+        if entry:
+            return entry.zoneId
+        return None
+
+    def getAvatarsInZone(self, zoneId):
+        return self.zone2avatars.get(zoneId, ())
+
+    def getToonsInZone(self, zoneId):
+        return self.zone2toons.get(zoneId, ())
+
+    def getNPCsInZone(self, zoneId):
+        return self.zone2npcs.get(zoneId, ())
+
+    def getNumToonsInZone(self, zoneId):
+        return len(self.zone2toons.get(zoneId, ()))
+
+    def getAvatarByKey(self, key):
+        """Returns the avatar whose NodePath has the key `key`."""
+        return self.key2avatar.get(key, None)
+
+    def addAvatar(self, avatar, zoneId):
+        if id(avatar) in self.entries:
+            self.moveAvatar(avatar, zoneId)
+            return
+
+        key = None
+        if hasattr(avatar, 'getKey') and not avatar.isEmpty():
+            key = avatar.getKey()
+            self.key2avatar[key] = avatar
+
+        entry = AvatarEntry(avatar, zoneId, avatar.__class__.__name__ in ToonClasses, key)
+        self.entries[id(avatar)] = entry
+        self.__insert(entry)
+
+    def removeAvatar(self, avatar):
+        """Returns the zone the avatar was in, or None if we didn't have it."""
+
+        entry = self.entries.pop(id(avatar), None)
+        if not entry:
+            return None
+
+        self.__remove(entry)
+        if entry.key is not None and self.key2avatar.get(entry.key) is avatar:
+            del self.key2avatar[entry.key]
+        entry.avatar = None
+        return entry.zoneId
+
+    def moveAvatar(self, avatar, zoneId):
+        entry = self.entries.get(id(avatar))
+        if not entry:
+            self.addAvatar(avatar, zoneId)
+            return
+
+        if entry.zoneId == zoneId:
+            return
+
+        self.__remove(entry)
+        entry.zoneId = zoneId
+        self.__insert(entry)
+
+    def __getTypeLists(self, entry):
+        if entry.isToon:
+            return self.zone2toons
+        return self.zone2npcs
+
+    def __insert(self, entry):
+        avatars = self.zone2avatars.setdefault(entry.zoneId, [])
+        entry.zoneIndex = len(avatars)
+        avatars.append(entry.avatar)
+
+        typeLists = self.__getTypeLists(entry)
+        typed = typeLists.setdefault(entry.zoneId, [])
+        entry.typeIndex = len(typed)
+        typed.append(entry.avatar)
+
+    def __remove(self, entry):
+        self.__removeAt(self.zone2avatars, entry.zoneId, entry.zoneIndex, 'zoneIndex')
+        self.__removeAt(self.__getTypeLists(entry), entry.zoneId, entry.typeIndex, 'typeIndex')
+        entry.zoneIndex = -1
+        entry.typeIndex = -1
+
+    def __removeAt(self, zoneLists, zoneId, index, indexName):
+        avatars = zoneLists[zoneId]
+        last = avatars.pop()
+        if index < len(avatars):
+            # Fill the hole with the last avatar of the list.
+            avatars[index] = last
+            setattr(self.entries[id(last)], indexName, index)
+        if len(avatars) == 0:
+            del zoneLists[zoneId]
+
+    def cleanup(self):
+        for entry in self.entries.values():
+            entry.avatar = None
+        self.entries = None
+        self.zone2avatars = None
+        self.zone2toons = None
+        self.zone2npcs = None
+        self.key2avatar = None
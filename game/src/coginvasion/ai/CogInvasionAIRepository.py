@@ -27,12 +27,12 @@ from src.coginvasion.hood.DGHoodAI import DGHoodAI
 from src.coginvasion.hood.DDHoodAI import DDHoodAI
 from src.coginvasion.cogtropolis.CTHoodAI import CTHoodAI
 
-from src.coginvasion.phys import PhysicsUtils
+from src.coginvasion.battle.MapAssetCacheAI import MapAssetCache
 
 from panda3d.core import UniqueIdAllocator
 from src.coginvasion.hood import ZoneUtil
-from src.coginvasion.globals.CIGlobals import ToonClasses
 from AIZoneData import AIZoneDataStore
+from AvatarRegistryAI import AvatarRegistry
 from direct.directnotify.DirectNotifyGlobal import directNotify
 from src.coginvasion.distributed.CogInvasionDoGlobals import (DO_ID_DISTRICT_NAME_MANAGER,
                                                               DO_ID_HOLIDAY_MANAGER,
@@ -42,10 +42,6 @@ from src.coginvasion.distributed.CogInvasionDoGlobals import (DO_ID_DISTRICT_NAM
 
 #PStatClient.connect()
 
-import random
-
-DO_SIMULATION = False
-
 class CogInvasionAIRepository(CogInvasionInternalRepository):
     notify = directNotify.newCategory("CogInvasionAIRepository")
 
@@ -62,28 +58,22 @@ class CogInvasionAIRepository(CogInvasionInternalRepository):
         self.hoods = {}
         self.dnaStoreMap = {}
         self.dnaDataMap = {}
+        # Set by AIStart, loads the DNA files of the hoods while we boot.
+        self.dnaPreparer = None
         self.districtNameMgr = self.generateGlobalObject(DO_ID_DISTRICT_NAME_MANAGER, 'DistrictNameManager')
         self.holidayMgr = self.generateGlobalObject(DO_ID_HOLIDAY_MANAGER, 'HolidayManager')
         self.uin = self.generateGlobalObject(DO_ID_UNIQUE_INTEREST_NOTIFIER, 'UniqueInterestNotifier')
         self.csm = self.generateGlobalObject(DO_ID_CLIENT_SERVICES_MANAGER, 'ClientServicesManager')
         self.statsMgr = self.generateGlobalObject(DO_ID_STATS_MANAGER, 'StatsManager')
         
-        # Anything that is a DistributedAvatarAI (Toons, Suits, etc).
-        # This is a per-zone list of avatars.
-        self.avatars = {}
-        self.numAvatars = 0
+        # Anything that is a DistributedAvatarAI (Toons, Suits, etc),
+        # indexed by zone.
+        self.avatarRegistry = AvatarRegistry()
 
         self.battleZones = {}
         
-        if DO_SIMULATION:
-            self.zonePhysics = {}
-            self.bspLoader = BSPLoader()
-            self.bspLoader.setAi(True)
-            self.bspLoader.setMaterialsFile("phase_14/etc/materials.txt")
-            #self.bspLoader.setTextureContentsFile("phase_14/etc/texturecontents.txt")
-            #self.bspLoader.setServerEntityDispatcher(self)
-            self.bspLoader.read("phase_14/etc/sewer_entrance_room_indoors/sewer_entrance_room_indoors.bsp")
-            PhysicsUtils.makeBulletCollFromGeoms(self.bspLoader.getResult(), enableNow = False)
+        # Nav meshes and cover locations of BSP levels, shared between battle zones.
+        self.mapAssetCache = MapAssetCache()
 
     def getBattleZone(self, zoneId):
         return self.battleZones.get(zoneId, None)
@@ -94,21 +84,6 @@ class CogInvasionAIRepository(CogInvasionInternalRepository):
             return bz.physicsWorld
         return None
         
-    def __update(self, task):
-        
-        # Do a simulation of having battles going on
-       
-        dt = globalClock.getDt()
-        # For each simulated battle zone
-        for zonePhysics in self.zonePhysics.values():
-            # How many suits are casting rays
-            numSuits = 15#random.randint(4, 15)
-            zonePhysics.doPhysics(dt, 1, 0.016)
-            for i in xrange(numSuits):
-                zonePhysics.rayTestClosest((0, 0, 0), (0, 20, 0))
-            
-        return task.cont
-        
     def addAvatar(self, avatar, zoneId = None):
         if zoneId is None:
             if hasattr(avatar, 'getZoneId'):
@@ -116,64 +91,57 @@ class CogInvasionAIRepository(CogInvasionInternalRepository):
             else:
                 zoneId = avatar.zoneId
         
-        if not zoneId in self.avatars:
-            self.avatars[zoneId] = []
-            
-        self.avatars[zoneId].append(avatar)
-        self.numAvatars += 1
+        self.avatarRegistry.addAvatar(avatar, zoneId)
 
         if zoneId in self.battleZones:
             print "Adding avatar to battle zone at {0}".format(zoneId)
             avatar.battleZone = self.battleZones[zoneId]
             avatar.addToPhysicsWorld(avatar.battleZone.physicsWorld)
         
-        if DO_SIMULATION:
-            # Setup simulation physics environment for each
-            # zone, we will pretend they are battle zones
-            if zoneId not in self.zonePhysics:
-                print "Making phys world in zone {0}".format(zoneId)
-                physicsWorld = BulletWorld()
-                # Panda units are in feet, so the gravity is 32 feet per second,
-                # not 9.8 meters per second.
-                physicsWorld.setGravity(Vec3(0, 0, -32.1740))
-            
-                # Add the static collision world (worldspawn faces)
-                PhysicsUtils.attachBulletNodes(self.bspLoader.getResult(), physicsWorld)
-            
-                # Add objects that would be dynamic
-                # (Avatar capsules, weapon collisions, door collisions, etc)
-                dynObjects = 50#random.randint(15, 50)
-                for i in xrange(dynObjects):
-                    box = BulletCapsuleShape(0.5, 1.0, ZUp)
-                    rbnode = BulletRigidBodyNode("testrb")
-                    rbnode.setKinematic(True)
-                    rbnode.setDeactivationEnabled(True)
-                    rbnode.setDeactivationTime(5.0)
-                    rbnode.addShape(box, TransformState.makePos((0, 0, 0)))
-                    NodePath(rbnode).setPos(random.uniform(-100, 100), random.uniform(-100, 100), random.uniform(-50, 50))
-                    physicsWorld.attach(rbnode)
-                
-                self.zonePhysics[zoneId] = physicsWorld
-        
     def removeAvatar(self, avatar):
-        removed = False
-
-        zoneOfAv = 0
-        
-        for zoneId in self.avatars.keys():
-            if avatar in self.avatars[zoneId]:
-                self.avatars[zoneId].remove(avatar)
-                zoneOfAv = zoneId
-                removed = True
-                break
-                
-        if removed:
-            self.numAvatars -= 1
+        zoneOfAv = self.avatarRegistry.removeAvatar(avatar)
 
         if avatar.battleZone:
             print "Removing avatar from battle zone at {0}".format(zoneOfAv)
             avatar.removeFromPhysicsWorld(avatar.battleZone.physicsWorld)
             avatar.battleZone = None
+
+    def moveAvatar(self, avatar, zoneId):
+        """Moves an avatar that changed zones to the avatar list of `zoneId`."""
+
+        oldZoneId = self.avatarRegistry.getAvatarZone(avatar)
+        self.avatarRegistry.moveAvatar(avatar, zoneId)
+        if oldZoneId == zoneId:
+            return
+
+        battleZone = self.battleZones.get(zoneId, None)
+        if avatar.battleZone is battleZone:
+            return
+
+        if avatar.battleZone:
+            print "Removing avatar from battle zone at {0}".format(oldZoneId)
+            avatar.removeFromPhysicsWorld(avatar.battleZone.physicsWorld)
+            avatar.battleZone = None
+
+        if battleZone:
+            print "Adding avatar to battle zone at {0}".format(zoneId)
+            avatar.battleZone = battleZone
+            avatar.addToPhysicsWorld(battleZone.physicsWorld)
+
+    # The getters hand out copies of the registry's lists, callers may kill or
+    # remove avatars while they go through them.
+
+    def getAvatarsInZone(self, zoneId):
+        return list(self.avatarRegistry.getAvatarsInZone(zoneId))
+
+    def getToonsInZone(self, zoneId):
+        return list(self.avatarRegistry.getToonsInZone(zoneId))
+
+    def getNPCsInZone(self, zoneId):
+        return list(self.avatarRegistry.getNPCsInZone(zoneId))
+
+    def getAvatarByKey(self, key):
+        return self.avatarRegistry.getAvatarByKey(key)
         
     def handleCrash(self, e):
         raise e
@@ -212,15 +180,12 @@ class CogInvasionAIRepository(CogInvasionInternalRepository):
         return task.again
 
     def done(self):
+        if self.dnaPreparer:
+            self.dnaPreparer.cleanup()
+            self.dnaPreparer = None
         self.notify.info("Setting shard available.")
         self.district.b_setAvailable(1)
         self.notify.info("Done.")
-        
-        if DO_SIMULATION:
-            print "There are {0} avatars.".format(self.numAvatars)
-            print "There are {0} zones.".format(len(self.zonePhysics.keys()))
-        
-            taskMgr.add(self.__update, "AIUpdate")
 
     def noDistrictNames(self):
         self.notify.error("Cannot create District: There are no available names!")
@@ -231,16 +196,12 @@ class CogInvasionAIRepository(CogInvasionInternalRepository):
         self.holidayMgr.d_srvRequestHoliday()
 
     def toonsAreInZone(self, zoneId):
-        numToons = 0
-        for obj in self.doId2do.values():
-            if obj.__class__.__name__ in ToonClasses:
-                if obj.zoneId == zoneId:
-                    numToons += 1
-        return numToons > 0
+        return self.avatarRegistry.getNumToonsInZone(zoneId) > 0
 
     def shutdown(self):
-        if DO_SIMULATION:
-            taskMgr.remove("AIUpdate")
+        if self.dnaPreparer:
+            self.dnaPreparer.cleanup()
+            self.dnaPreparer = None
         for hood in self.hoods.values():
             hood.shutdown()
         if self.timeManager:
@@ -0,0 +1,155 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file ServerClock.py
+
+"""
+
+import time
+
+from panda3d.core import TrueClock, ClockObject
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+from direct.task import Task
+
+class ServerClock:
+    """
+    Runs the server's task manager at a fixed number of ticks per second.
+
+    At the end of each tick we sleep for whatever is left of the tick's
+    budget, instead of for a fixed amount of time. When a tick runs over its
+    budget we run the next ticks back to back to catch up, but never more
+    than `maxCatchUpTicks` of them; if we are further behind than that, the
+    missed ticks are dropped.
+
+    While we are running, the global clock is in non-real-time mode, so
+    every tick (catch-up ticks included) moves the frame time ahead by
+    exactly one tick period, and globalClock.getDt() is always the tick
+    period. Physics and AI step the same amount each tick no matter how
+    long the last one took. When ticks are dropped, the frame time skips
+    ahead by the time they would have covered, so that it stays in step
+    with real time.
+    """
+
+    notify = directNotify.newCategory("ServerClock")
+
+    def __init__(self, tickRate = 30, maxCatchUpTicks = 5, reportInterval = 0):
+        self.trueClock = TrueClock.getGlobalPtr()
+        self.tickPeriod = 1.0 / max(1.0, tickRate)
+        self.maxCatchUpTicks = max(0, maxCatchUpTicks)
+        self.reportInterval = reportInterval
+
+        self.task = None
+        self.clock = None
+        self.prevClockMode = None
+        self.nextTickTime = None
+        self.tickStartTime = None
+        self.lastReportTime = None
+
+        self.resetStats()
+
+    def resetStats(self):
+        self.ticks = 0
+        # Ticks that finished after their deadline.
+        self.overruns = 0
+        # Ticks we were too far behind to catch up on.
+        self.droppedTicks = 0
+        self.workTime = 0.0
+        self.sleepTime = 0.0
+        self.maxWorkTime = 0.0
+
+    def getTickRate(self):
+        return 1.0 / self.tickPeriod
+
+    def getTickPeriod(self):
+        return self.tickPeriod
+
+    def getNumTicks(self):
+        return self.ticks
+
+    def getNumOverruns(self):
+        return self.overruns
+
+    def getNumDroppedTicks(self):
+        return self.droppedTicks
+
+    def getMaxWorkTime(self):
+        return self.maxWorkTime
+
+    def getHeadroom(self):
+        """
+        Returns the fraction of time that we spent sleeping, i.e. how much
+        more work the server could take on before it starts running behind.
+        """
+
+        total = self.workTime + self.sleepTime
+        if total <= 0:
+            return 1.0
+        return self.sleepTime / total
+
+    def getReport(self):
+        return ("%d ticks at %.1f/s, %d overruns, %d dropped, %.1f%% headroom, longest tick %.1f ms"
+                % (self.ticks, self.getTickRate(), self.overruns, self.droppedTicks,
+                   self.getHeadroom() * 100.0, self.maxWorkTime * 1000.0))
+
+    def start(self, taskMgr):
+        self.stop()
+
+        self.clock = ClockObject.getGlobalClock()
+        self.prevClockMode = self.clock.getMode()
+        self.clock.setMode(ClockObject.MNonRealTime)
+        self.clock.setDt(self.tickPeriod)
+
+        self.nextTickTime = None
+        self.tickStartTime = self.trueClock.getShortTime()
+        self.lastReportTime = self.tickStartTime
+        # Run after everything else this tick, including igLoop.
+        self.task = taskMgr.add(self.__tickTask, 'serverClock', sort = 55)
+
+    def stop(self):
+        if self.task:
+            self.task.remove()
+            self.task = None
+        if self.clock:
+            self.clock.setMode(self.prevClockMode)
+            self.clock = None
+            self.prevClockMode = None
+
+    def __tickTask(self, task):
+        now = self.trueClock.getShortTime()
+
+        workTime = now - self.tickStartTime
+        self.workTime += workTime
+        self.maxWorkTime = max(self.maxWorkTime, workTime)
+        self.ticks += 1
+
+        if self.nextTickTime is None:
+            self.nextTickTime = now
+        self.nextTickTime += self.tickPeriod
+
+        remaining = self.nextTickTime - now
+        if remaining > 0:
+            time.sleep(remaining)
+            self.sleepTime += remaining
+        else:
+            self.overruns += 1
+            behind = -remaining
+            if behind > self.tickPeriod * self.maxCatchUpTicks:
+                # Too far behind to catch up, start over from now.
+                dropped = int(behind / self.tickPeriod)
+                self.droppedTicks += dropped
+                self.nextTickTime = now
+                self.clock.setFrameTime(self.clock.getFrameTime() + dropped * self.tickPeriod)
+
+        self.tickStartTime = self.trueClock.getShortTime()
+
+        if self.reportInterval > 0 and self.tickStartTime - self.lastReportTime >= self.reportInterval:
+            self.lastReportTime = self.tickStartTime
+            self.notify.info(self.getReport())
+
+        return Task.cont
+
+    def cleanup(self):
+        self.stop()
+        self.trueClock = None
@@ -39,8 +39,6 @@ class BaseAttackAI(BaseAttackShared):
     def onProjectileHit(self, contact, collider, intoNP):
         surface = Surfaces.getSurface(intoNP.getSurfaceProp())
         self.avatar.getBattleZone().d_emitSound(surface.getBulletImpacts(), contact.getHitPos(), 0.5)
-        
-        avNP = intoNP.getParent()
 
         collider.d_impact(contact.getHitPos())
 
@@ -51,12 +49,9 @@ class BaseAttackAI(BaseAttackShared):
         
         try:
             # Sometimes the avatar could be deleted unexpectedly.
-            for obj in base.air.avatars[self.avatar.getBattleZone().zoneId]:
-                if (CIGlobals.isAvatar(obj) and obj.getKey() == avNP.getKey() and
-                    self.canDamage(obj)):
-    
-                    obj.takeDamage(dmgInfo)
-                    break
+            obj = self.avatar.getBattleZone().hitResolver.getAvatarFromNode(intoNP)
+            if obj and self.canDamage(obj):
+                obj.takeDamage(dmgInfo)
         except: pass
 
         collider.requestDelete()
@@ -65,23 +60,17 @@ class BaseAttackAI(BaseAttackShared):
         if impact:
             surface = Surfaces.getSurface(hitNode.getSurfaceProp())
             self.avatar.getBattleZone().d_emitSound(surface.getBulletImpacts(), hitPos, 0.5)
-            
-        avNP = hitNode.getParent()
         
         try:
             # Again, sometimes the avatar can be deleted unexpectedly.
-            for obj in base.air.avatars[self.avatar.getBattleZone().zoneId]:
-                if (CIGlobals.isAvatar(obj) and obj.getKey() == avNP.getKey() and 
-                self.canDamage(obj)):
+            obj = self.avatar.getBattleZone().hitResolver.getAvatarFromNode(hitNode)
+            if obj and self.canDamage(obj):
+                for _ in xrange(traces):
+                    dmgInfo = TakeDamageInfo(self.avatar, self.getID(),
+                                        self.calcDamage(distance),
+                                        hitPos, origin)
                     
-                    for _ in xrange(traces):
-                        dmgInfo = TakeDamageInfo(self.avatar, self.getID(),
-                                            self.calcDamage(distance),
-                                            hitPos, origin)
-                        
-                        obj.takeDamage(dmgInfo)
-    
-                    break
+                    obj.takeDamage(dmgInfo)
         except: pass
 
     def doTraceAndDamage(self, origin, dir, dist, traces = 1, impact = True):
@@ -23,8 +23,12 @@ class BaseProjectileAI(DistributedSmoothNodeAI, BaseProjectileShared, WorldColli
         self.sendUpdate('impact', [pos, lastPos])
 
     def doInitCollider(self):
+        # Our battle zone steps the colliders of all of its projectiles together.
+        bz = self.air.getBattleZone(self.zoneId)
+        manager = bz.projectileManager if bz else None
         WorldColliderAI.__init__(self, "none", 1.0, needSelfInArgs = True, resultInArgs = True,
-                          useSweep = True, startNow = False, initNp = False, mask = CIGlobals.WorldGroup | CIGlobals.CharacterGroup)
+                          useSweep = True, startNow = False, initNp = False, mask = CIGlobals.WorldGroup | CIGlobals.CharacterGroup,
+                          manager = manager)
         self.world = self.air.getPhysicsWorld(self.zoneId)
 
     def announceGenerate(self):
@@ -0,0 +1,62 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file ProjectileManagerAI.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+from collections import OrderedDict
+
+class ProjectileManager:
+    """
+    Steps the world colliders of every live projectile in a zone from a
+    single task, instead of each projectile running its own collision task.
+    """
+
+    notify = directNotify.newCategory("ProjectileManager")
+
+    def __init__(self, zoneId):
+        self.zoneId = zoneId
+
+        # id(collider) -> collider, in the order they were added.
+        # Colliders are NodePaths, keyed by id() for the same reason as avatars.
+        self.colliders = OrderedDict()
+
+        self.task = None
+
+    def getNumColliders(self):
+        return len(self.colliders)
+
+    def addCollider(self, collider):
+        self.colliders[id(collider)] = collider
+        if not self.task:
+            self.task = taskMgr.add(self.__stepTask, "ProjectileManager.stepTask-" + str(self.zoneId))
+
+    def removeCollider(self, collider):
+        self.colliders.pop(id(collider), None)
+        if len(self.colliders) == 0:
+            self.stop()
+
+    def stop(self):
+        if self.task:
+            self.task.remove()
+            self.task = None
+
+    def __stepTask(self, task):
+        # Colliders may be added or removed by the hit callbacks of others.
+        for key, collider in self.colliders.items():
+            if key not in self.colliders:
+                continue
+            if not collider.step():
+                self.removeCollider(collider)
+
+        return task.cont
+
+    def cleanup(self):
+        self.stop()
+        for collider in self.colliders.values():
+            collider.manager = None
+        self.colliders = None
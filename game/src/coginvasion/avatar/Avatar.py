@@ -37,7 +37,6 @@ class Avatar(ToonTalker.ToonTalker, Actor, AvatarShared, BasePhysicsObject):
     """
 
     RealShadows = ConfigVariableBool('want-real-shadows', False)
-    AvatarMovedEpsilon = 0.05
 
     def __init__(self, mat=0):
         try:
@@ -99,7 +98,8 @@ class Avatar(ToonTalker.ToonTalker, Actor, AvatarShared, BasePhysicsObject):
 
         self.shadowFloorToggle = False
         self.avatarFloorToggle = False
-        self.floorTask = taskMgr.add(self.__keepOnFloorTask, "Avatar.keepOnFloor", sort = 30)
+        # The ground snapper keeps us (and our shadow) on the floor.
+        base.groundSnapper.addAvatar(self)
         
         self.ragdoll = None
         self.ragdollMode = False
@@ -426,18 +426,12 @@ class Avatar(ToonTalker.ToonTalker, Actor, AvatarShared, BasePhysicsObject):
         if self.shadowFloorToggle and self.shadow:
             self.shadow.setZ(render, z)
 
-    def __keepOnFloorTask(self, task):
-        # First, check if we are above a ground.
-        # If so, go onto that.
-        
-        if self.isEmpty():
-            return task.done
+    def updateWake(self, pos):
+        """Makes water ripples under us if we're moving through water. `pos` is our position relative to render."""
 
-        # Create water ripples
         time = globalClock.getFrameTime()
         delta = time - self.lastWakeTime
         dt = globalClock.getDt()
-        pos = self.getPos(render)
         posDelta = (pos - self.prevPos).lengthSquared()
         moveMag =  posDelta / dt
         if moveMag > 5.0 and delta > 0.1:
@@ -448,54 +442,6 @@ class Avatar(ToonTalker.ToonTalker, Actor, AvatarShared, BasePhysicsObject):
                     self.lastWakeTime = time
         self.prevPos = pos
 
-        if (not self.avatarFloorToggle and
-            not self.shadowFloorToggle or
-            moveMag < self.AvatarMovedEpsilon):
-                
-            # Avoid unnecessary ray casting.
-            return task.cont
-
-        pFrom = self.getPos(render) + (0, 0, 0.1)
-
-        z = None
-
-        pTo = pFrom - (0, 0, 2000)
-        aboveResult = base.physicsWorld.rayTestAll(pFrom, pTo, CIGlobals.WallGroup | CIGlobals.FloorGroup | CIGlobals.StreetVisGroup)
-        aboveGround = False
-        if aboveResult.hasHits():
-            sortedHits = sorted(aboveResult.getHits(), key = lambda hit: (pFrom - hit.getHitPos()).lengthSquared())
-            for i in xrange(len(sortedHits)):
-                hit = sortedHits[i]
-                node = hit.getNode()
-                np = NodePath(node)
-                if self.isAncestorOf(np):
-                    continue
-                z = hit.getHitPos().getZ()
-                break
-
-        if z is not None:
-            self.updateFloorHeight(z)
-            return task.cont
-
-        # We're not above a ground, check above?
-        pTo = pFrom + (0, 0, 2000)
-        belowResult = base.physicsWorld.rayTestAll(pFrom, pTo, CIGlobals.WallGroup | CIGlobals.FloorGroup | CIGlobals.StreetVisGroup)
-        if belowResult.hasHits():
-            sortedHits = sorted(belowResult.getHits(), key = lambda hit: (pFrom - hit.getHitPos()).lengthSquared())
-            for i in xrange(len(sortedHits)):
-                hit = sortedHits[i]
-                node = hit.getNode()
-                np = NodePath(node)
-                if self.isAncestorOf(np):
-                    continue
-                z = hit.getHitPos().getZ()
-                break
-
-        if z is not None:
-            self.updateFloorHeight(z)
-
-        return task.cont 
-
     def setupPhysics(self, radius = 1, height = 2):
         self.notify.debug("setupPhysics(r{0}, h{1}) hitboxData: {2}".format(radius, height, self.hitboxData))
 
@@ -547,9 +493,7 @@ class Avatar(ToonTalker.ToonTalker, Actor, AvatarShared, BasePhysicsObject):
             self.stopMovingHealthLabel()
             self.healthLabel = None
             self.healthLabelTrack = None
-            if self.floorTask:
-                self.floorTask.remove()
-            self.floorTask = None
+            base.groundSnapper.removeAvatar(self)
             self.disableRay()
             self.deleteNametag3d()
             self.nametag.destroy()
@@ -194,8 +194,7 @@ class DistributedAvatarAI(DistributedSmoothNodeAI.DistributedSmoothNodeAI, Avata
     def handleLogicalZoneChange(self, newZoneId, oldZoneId):
         """Make sure the avatar lists are updated with our new zone."""
         
-        self.air.removeAvatar(self)
-        self.air.addAvatar(self, newZoneId)
+        self.air.moveAvatar(self, newZoneId)
         
         DistributedSmoothNodeAI.DistributedSmoothNodeAI.handleLogicalZoneChange(self, newZoneId, oldZoneId)
         
@@ -0,0 +1,144 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file GroundSnapper.py
+
+"""
+
+from panda3d.core import NodePath, Point3
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+from src.coginvasion.globals import CIGlobals
+
+class GroundSnapper:
+    """
+    Keeps every avatar (and its drop shadow) on the floor below it, from a
+    single task instead of a floor task per avatar.
+
+    Avatars close to the camera are probed every frame, the rest every
+    ground-snap-far-interval frames, each on its own frame so they don't
+    all land on the same one. An avatar that hasn't moved since it was
+    last probed isn't probed again, it is still on the same floor.
+    """
+
+    notify = directNotify.newCategory("GroundSnapper")
+
+    FloorMask = CIGlobals.WallGroup | CIGlobals.FloorGroup | CIGlobals.StreetVisGroup
+
+    # How far the rays go, up or down.
+    ProbeDistance = 2000
+
+    # How far (squared) an avatar has to move to be probed again.
+    MovedEpsilon = 0.0001
+
+    def __init__(self):
+        self.nearDistance = config.GetFloat('ground-snap-near-distance', 50.0)
+        self.farInterval = max(1, config.GetInt('ground-snap-far-interval', 4))
+
+        # Avatars are keyed by id(), a NodePath's hash and equality
+        # change once it has been removed.
+        self.avatars = []
+        # id(avatar) -> Point3, where it was the last time we probed for it.
+        self.snapPos = {}
+        # id(avatar) -> the frame of farInterval it is probed on when it's far away.
+        self.slots = {}
+        self.nextSlot = 0
+        self.frame = 0
+
+        # Same sort as the floor task every avatar used to have.
+        self.task = taskMgr.add(self.__snapTask, "groundSnapper", sort = 30)
+
+    def addAvatar(self, avatar):
+        key = id(avatar)
+        if key in self.slots:
+            return
+        self.avatars.append(avatar)
+        self.slots[key] = self.nextSlot
+        self.nextSlot = (self.nextSlot + 1) % self.farInterval
+
+    def removeAvatar(self, avatar):
+        key = id(avatar)
+        if key not in self.slots:
+            return
+        for i in xrange(len(self.avatars)):
+            if self.avatars[i] is avatar:
+                del self.avatars[i]
+                break
+        del self.slots[key]
+        self.snapPos.pop(key, None)
+
+    def __probe(self, avatar, pFrom, pTo):
+        result = base.physicsWorld.rayTestAll(pFrom, pTo, self.FloorMask)
+        if not result.hasHits():
+            return None
+
+        # We only want the closest hit that isn't the avatar itself.
+        closest = None
+        closestDist = 0
+        for hit in result.getHits():
+            hitPos = hit.getHitPos()
+            dist = (pFrom - hitPos).lengthSquared()
+            if closest is not None and dist >= closestDist:
+                continue
+            if avatar.isAncestorOf(NodePath(hit.getNode())):
+                continue
+            closest = hitPos
+            closestDist = dist
+
+        if closest is None:
+            return None
+        return closest.getZ()
+
+    def findFloor(self, avatar, pos):
+        """Returns the height of the floor below `pos` (or above, if there isn't one below)."""
+
+        pFrom = pos + (0, 0, 0.1)
+        z = self.__probe(avatar, pFrom, pFrom - (0, 0, self.ProbeDistance))
+        if z is None:
+            # We're not above a ground, check above?
+            z = self.__probe(avatar, pFrom, pFrom + (0, 0, self.ProbeDistance))
+        return z
+
+    def __snapTask(self, task):
+        self.frame += 1
+        farSlot = self.frame % self.farInterval
+        nearDistSq = self.nearDistance * self.nearDistance
+        camPos = base.camera.getPos(render)
+
+        for avatar in list(self.avatars):
+            if avatar.isEmpty():
+                self.removeAvatar(avatar)
+                continue
+
+            pos = avatar.getPos(render)
+            avatar.updateWake(pos)
+
+            if not avatar.avatarFloorToggle and not avatar.shadowFloorToggle:
+                continue
+
+            key = id(avatar)
+            lastPos = self.snapPos.get(key)
+            if lastPos is not None and (pos - lastPos).lengthSquared() < self.MovedEpsilon:
+                # Still on the same floor.
+                continue
+
+            if self.slots[key] != farSlot and (pos - camPos).lengthSquared() > nearDistSq:
+                # Far away, wait for its frame.
+                continue
+
+            z = self.findFloor(avatar, pos)
+            if z is not None:
+                avatar.updateFloorHeight(z)
+            self.snapPos[key] = Point3(avatar.getPos(render))
+
+        return task.cont
+
+    def cleanup(self):
+        if self.task:
+            self.task.remove()
+            self.task = None
+        self.avatars = None
+        self.snapPos = None
+        self.slots = None
@@ -44,6 +44,8 @@ from HDR import HDR
 from ShakeCamera import ShakeCamera
 from WaterReflectionManager import WaterReflectionManager
 from src.coginvasion.phys import PhysicsUtils
+from src.coginvasion.avatar.GroundSnapper import GroundSnapper
+from src.coginvasion.nametag.NametagManager import NametagManager
 
 import __builtin__
 import random
@@ -189,6 +191,7 @@ class CIBase(ShowBase):
         base.lightingCfg = None
 
         self.cl_attackMgr = None
+        self.precacheScheduler = None
         
         #self.accept('/', self.projectShadows)
         
@@ -215,6 +218,10 @@ class CIBase(ShowBase):
         render.show(CIGlobals.ShadowCameraBitmask)
         
         self.avatars = []
+        # Keeps every avatar on the floor.
+        self.groundSnapper = GroundSnapper()
+        # Ticks every nametag.
+        self.nametagManager = NametagManager()
         
         wrm = WaterReflectionManager()
         self.waterReflectionMgr = wrm
@@ -711,6 +718,12 @@ class CIBase(ShowBase):
         # and use it as base.cr.attackMgr.
         from src.coginvasion.attack.AttackManager import AttackManager
         self.cl_attackMgr = AttackManager()
+
+        # Warms the assets each zone used last time, in the background.
+        if self.config.GetBool('want-precache-scheduler', True):
+            from src.coginvasion.base.PrecacheScheduler import PrecacheScheduler
+            self.precacheScheduler = PrecacheScheduler()
+            self.finalExitCallbacks.append(self.precacheScheduler.saveManifest)
         
         if self.DebugShaderQualities:
             from libpandabsp import SHADERQUALITY_HIGH, SHADERQUALITY_MEDIUM, SHADERQUALITY_LOW
@@ -16,6 +16,7 @@ from panda3d.core import Multifile, Filename, VirtualFileSystem, TransparencyAtt
 from src.coginvasion.gui.CIProgressScreen import CIProgressScreen
 from src.coginvasion.resourcepack.EnvironmentConfiguration import EnvironmentConfiguration
 from src.coginvasion.resourcepack.ResourcePack import ResourcePack
+from src.coginvasion.base.MultifileIndex import MultifileIndex
 from src.coginvasion.dna.DNALoader import loadDNAFile
 from src.coginvasion.globals import CIGlobals
 from src.coginvasion.toon import ParticleLoader
@@ -42,6 +43,7 @@ class CogInvasionLoader(Loader.Loader):
         self.envConfig = None
         self.envConfigStream = None
         self.resourcePack = None
+        self.multifileIndex = MultifileIndex()
         return
         
     def mountMultifile(self, mfFile):
@@ -77,9 +79,11 @@ class CogInvasionLoader(Loader.Loader):
         vfs = VirtualFileSystem.getGlobalPtr()
         
         for phase in self.Phases:
+            mfPath = metadata.PHASE_DIRECTORY + phase + '.mf'
             mf = Multifile()
             mf.setEncryptionPassword(metadata.RESOURCE_ENCRYPTION_PASSWORD)
-            mf.openReadWrite(Filename(metadata.PHASE_DIRECTORY + phase + '.mf'))
+            mf.openReadWrite(Filename(mfPath))
+            subfiles = self.multifileIndex.indexMultifile(phase, mfPath, mf)
             
             # Let's handle the mounting of certain file types from resource packs.
             rsPackMf = None
@@ -92,18 +96,18 @@ class CogInvasionLoader(Loader.Loader):
                         # This is the phase that exists within the resource pack.
                         rsPackMf = Multifile()
                         rsPackMf.openReadWrite(Filename(rsPhasePath))
+                        rsSubfiles = self.multifileIndex.indexMultifile(phase, rsPhasePath, rsPackMf)
                         
-                        # Let's remove the unneeded files from the default multifile for this phase.
-                        for subFile in mf.getSubfileNames():
-                            ext = os.path.splitext(subFile)[1][1:]
-                            
-                            # This code removes files that are overwritten by the resource pack.
-                            if ext in self.LegalResourcePackExtensions and subFile in rsPackMf.getSubfileNames():
-                                mf.removeSubfile(subFile)
-                            
-                            # This code removes illegal files inside of the resource pack multifile.
-                            elif not ext in self.LegalResourcePackExtensions and subFile in rsPackMf.getSubfileNames():
-                                rsPackMf.removeSubfile(subFile)
+                        overridden, illegal = self.multifileIndex.getOverrides(subfiles, rsSubfiles,
+                                                                               self.LegalResourcePackExtensions)
+                        
+                        # This code removes files that are overwritten by the resource pack.
+                        for subFile in overridden:
+                            mf.removeSubfile(subFile)
+                        
+                        # This code removes illegal files inside of the resource pack multifile.
+                        for subFile in illegal:
+                            rsPackMf.removeSubfile(subFile)
                         
                         # Let's flag that we've loaded a resource pack multifile.
                         loadedRsPackMf = True
@@ -133,6 +137,8 @@ class CogInvasionLoader(Loader.Loader):
                     
                     self.notify.info('Environment Configuration load complete!')
                 
+        self.multifileIndex.save()
+        
         self.progressScreen = CIProgressScreen()
         self.notify.info('All phases loaded! Ready to play!')
 
@@ -173,10 +179,28 @@ class CogInvasionLoader(Loader.Loader):
     def loadDNAFile(self, dnaStore, filename):
         return loadDNAFile(dnaStore, filename)
 
+    def noteAsset(self, kind, path):
+        """Lets the precache scheduler know the zone we are in uses `path`."""
+
+        scheduler = getattr(base, 'precacheScheduler', None)
+        if not scheduler:
+            return
+        if isinstance(path, Filename):
+            path = path.getFullpath()
+        if isinstance(path, basestring):
+            scheduler.noteAsset(kind, path)
+
     def loadModel(self, *args, **kw):
         ret = Loader.Loader.loadModel(self, *args, **kw)
         CIGlobals.fixGrayscaleTextures(ret)
 
+        modelPath = args[0] if args else kw.get('modelPath')
+        if isinstance(modelPath, (list, tuple)):
+            for path in modelPath:
+                self.noteAsset('model', path)
+        else:
+            self.noteAsset('model', modelPath)
+
         self.tick()
         return ret
 
@@ -187,6 +211,8 @@ class CogInvasionLoader(Loader.Loader):
 
     def loadTexture(self, texturePath, alphaPath = None, okMissing = False):
         ret = Loader.Loader.loadTexture(self, texturePath, alphaPath, okMissing=okMissing)
+        if ret and not alphaPath:
+            self.noteAsset('texture', texturePath)
         self.tick()
         if alphaPath:
             self.tick()
@@ -194,6 +220,7 @@ class CogInvasionLoader(Loader.Loader):
 
     def loadSfx(self, soundPath):
         ret = Loader.Loader.loadSfx(self, soundPath)
+        self.noteAsset('sound', soundPath)
         self.tick()
         return ret
 
@@ -50,7 +50,9 @@ class InitialLoad(LoadUtility):
         loader.progressScreen.logoNode.setScale(1.8)
         self.createGui()
         loader.beginBulkLoad('init', 'init', len(self.models), 0, False)
-        if base.config.GetBool('precache-assets', True):
+        if base.precacheScheduler:
+            base.precacheScheduler.warmFromManifest()
+        elif base.config.GetBool('precache-assets', True):
             base.precacheStuff()
         self.done()
        # LoadUtility.load(self)
@@ -0,0 +1,140 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file MultifileIndex.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+import json
+import os
+
+class MultifileIndex:
+    """
+    Keeps a list of the subfiles (name and size) of every multifile we
+    mount, saved between launches. A multifile is only read again if its
+    size or modification time changed, so most launches just stat each
+    multifile.
+
+    The loader uses it to find the files a resource pack overrides, and
+    MusicCache to find the songs, instead of scanning the multifiles.
+    """
+
+    notify = directNotify.newCategory("MultifileIndex")
+
+    # Bump this when what we keep for each multifile changes.
+    IndexVersion = 1
+
+    def __init__(self, indexFile = None):
+        if indexFile is None:
+            indexFile = config.GetString('multifile-index-file', 'cache/multifile-index.json')
+        self.indexFile = indexFile
+
+        # multifile path -> {'phase', 'stamp', 'subfiles': {name: size}}
+        self.multifiles = {}
+        self.dirty = False
+
+        # Multifiles mounted this launch, in the order they were mounted.
+        self.mounted = []
+        # directory -> [subfile name], built from self.mounted when needed.
+        self.dir2subfiles = None
+
+        self.load()
+
+    @staticmethod
+    def getStamp(filename):
+        stat = os.stat(filename)
+        return [stat.st_size, int(stat.st_mtime)]
+
+    @staticmethod
+    def getType(subfileName):
+        return os.path.splitext(subfileName)[1][1:]
+
+    def load(self):
+        if not os.path.isfile(self.indexFile):
+            return
+
+        try:
+            with open(self.indexFile, 'r') as indexFile:
+                data = json.load(indexFile)
+        except (IOError, ValueError), e:
+            self.notify.warning("Couldn't read the multifile index: %s" % e)
+            return
+
+        if data.get('version') != self.IndexVersion:
+            return
+        self.multifiles = data['multifiles']
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        indexDir = os.path.dirname(self.indexFile)
+        try:
+            if indexDir and not os.path.isdir(indexDir):
+                os.makedirs(indexDir)
+            with open(self.indexFile, 'w') as indexFile:
+                json.dump({'version': self.IndexVersion, 'multifiles': self.multifiles}, indexFile)
+        except (IOError, OSError), e:
+            self.notify.warning("Couldn't write the multifile index: %s" % e)
+            return
+
+        self.dirty = False
+
+    def indexMultifile(self, phase, filename, mf):
+        """
+        Returns the subfiles of the opened multifile `mf`, read from
+        `filename`, as {name: size}. Call this before the multifile is
+        changed or mounted.
+        """
+
+        stamp = self.getStamp(filename)
+        entry = self.multifiles.get(filename)
+        if not entry or entry['stamp'] != stamp:
+            self.notify.info("Indexing %s" % filename)
+            subfiles = {}
+            for i in xrange(mf.getNumSubfiles()):
+                subfiles[mf.getSubfileName(i)] = mf.getSubfileLength(i)
+            entry = {'phase': phase, 'stamp': stamp, 'subfiles': subfiles}
+            self.multifiles[filename] = entry
+            self.dirty = True
+
+        if filename not in self.mounted:
+            self.mounted.append(filename)
+            self.dir2subfiles = None
+
+        return entry['subfiles']
+
+    def getOverrides(self, subfiles, packSubfiles, legalExtensions):
+        """
+        Returns (overridden, illegal) for a phase and the same phase in a
+        resource pack: the files of the phase that the pack replaces, and
+        the files in the pack that it isn't allowed to replace.
+        """
+
+        overridden = []
+        illegal = []
+        for name in packSubfiles:
+            if name not in subfiles:
+                continue
+            if self.getType(name) in legalExtensions:
+                overridden.append(name)
+            else:
+                illegal.append(name)
+        return overridden, illegal
+
+    def findFiles(self, directory, extension):
+        """Returns the files in `directory` (not below it) with `extension`, in every mounted multifile."""
+
+        if self.dir2subfiles is None:
+            self.dir2subfiles = {}
+            for filename in self.mounted:
+                for name in self.multifiles[filename]['subfiles']:
+                    self.dir2subfiles.setdefault(os.path.dirname(name), []).append(name)
+
+        return [name for name in self.dir2subfiles.get(directory, []) if self.getType(name) == extension]
+
+    def hasMounted(self):
+        return len(self.mounted) > 0
@@ -1,5 +1,7 @@
 from panda3d.core import VirtualFileSystem
 
+import os
+
 # song name : AudioSound object
 Cache = {}
 
@@ -17,11 +19,20 @@ def precacheMusicDir(musicDir, extension = "ogg"):
             Cache[fn.getBasenameWoExtension()] = fn.getFullpath()
 
 def precacheMusic(extension = "ogg"):
+    # The loader already has a list of every file in the multifiles.
+    index = getattr(loader, 'multifileIndex', None)
+    if index and not index.hasMounted():
+        index = None
+
     phases = [3, 3.5, 4, 5, 5.5, 6, 7, 8, 9, 10, 11, 12, 13, 14]
     for phaseNum in phases:
         phase = "phase_" + str(phaseNum)
         musicDir = phase + "/audio/bgm"
-        precacheMusicDir(musicDir, extension)
+        if index:
+            for path in index.findFiles(musicDir, extension):
+                Cache[os.path.splitext(os.path.basename(path))[0]] = path
+        else:
+            precacheMusicDir(musicDir, extension)
 
 def findSong(songName):
     path = Cache.get(songName, None)
@@ -0,0 +1,255 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file PrecacheScheduler.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+from direct.showbase import Loader
+
+from src.coginvasion.globals import CIGlobals
+from src.coginvasion.hood import ZoneUtil
+
+from collections import deque
+import heapq
+import json
+import os
+
+# Kinds of assets we know how to warm.
+KindModel = 'model'
+KindTexture = 'texture'
+KindSound = 'sound'
+
+# Priorities, lower goes first.
+PriorityCurrentZone = 0
+PriorityOtherZone = 1
+
+class PrecacheScheduler:
+    """
+    Warms assets in the background instead of precaching everything up
+    front on the main thread.
+
+    Models are read by Panda's loader threads. Once one is read, its
+    textures and geometry are uploaded to the graphics card on the main
+    thread, but only for up to precache-frame-budget milliseconds per
+    frame, so warming never makes a frame chug.
+
+    While we play, we write down which assets each zone actually loads,
+    and keep that in a manifest file. Later runs warm only the assets in
+    the manifest, with those of the zone we are going to first.
+    """
+
+    notify = directNotify.newCategory("PrecacheScheduler")
+
+    def __init__(self):
+        self.manifestFile = config.GetString('precache-manifest', 'cache/precache-manifest.json')
+        self.frameBudget = config.GetFloat('precache-frame-budget', 2.0) / 1000.0
+        self.maxLoading = config.GetInt('precache-max-loading', 4)
+        self.saveInterval = config.GetFloat('precache-manifest-save-interval', 60.0)
+
+        # zone key -> {path: kind}, the assets each zone loaded.
+        self.manifest = {}
+        self.manifestDirty = False
+        self.zoneKey = None
+
+        # Heap of [priority, seq, kind, path], assets waiting to be loaded.
+        self.pending = []
+        self.seq = 0
+        # path -> heap entry
+        self.path2entry = {}
+        # path -> loader request, models being read by a loader thread.
+        self.loading = {}
+        # Models that have been read, waiting for their turn to be uploaded.
+        self.ready = deque()
+        # Everything that has been warmed, or doesn't need to be anymore.
+        self.warm = set()
+
+        self.loadManifest()
+
+        self.task = taskMgr.add(self.__precacheTask, "precacheScheduler")
+        self.saveTask = None
+        if self.saveInterval > 0:
+            self.saveTask = taskMgr.doMethodLater(self.saveInterval, self.__saveTask, "precacheScheduler-save")
+
+    @staticmethod
+    def getZoneKey(requestStatus):
+        """Returns the manifest key of the zone in `requestStatus`, the same every run."""
+
+        zoneId = requestStatus['zoneId']
+        if zoneId >= ZoneUtil.DynamicZonesBegin:
+            # Battle zones and such are allocated, go by the hood instead.
+            return 'dynamic-%s' % requestStatus.get('hoodId')
+        return str(ZoneUtil.getBranchZone(zoneId))
+
+    def enterZone(self, requestStatus):
+        """Call this when we start moving to a new zone, its assets go first."""
+
+        self.zoneKey = self.getZoneKey(requestStatus)
+
+        zoneAssets = self.manifest.get(self.zoneKey, {})
+        for entry in self.pending:
+            if entry[3] in zoneAssets:
+                entry[0] = PriorityCurrentZone
+            else:
+                entry[0] = PriorityOtherZone
+        heapq.heapify(self.pending)
+
+        # What this zone used last time that we haven't warmed yet.
+        for path, kind in zoneAssets.items():
+            if path not in self.path2entry:
+                self.request(kind, path, PriorityCurrentZone)
+
+    def noteAsset(self, kind, path):
+        """Writes down that the zone we are in loaded `path`."""
+
+        self.warm.add(path)
+
+        entry = self.path2entry.pop(path, None)
+        if entry:
+            # It was loaded for real before we got to it.
+            entry[3] = None
+
+        if self.zoneKey is None:
+            return
+
+        zoneAssets = self.manifest.setdefault(self.zoneKey, {})
+        if path not in zoneAssets:
+            zoneAssets[path] = kind
+            self.manifestDirty = True
+
+    def request(self, kind, path, priority = PriorityOtherZone):
+        """Warms `path` in the background."""
+
+        if path in self.warm or path in self.loading:
+            return
+
+        entry = self.path2entry.get(path)
+        if entry:
+            if priority < entry[0]:
+                entry[0] = priority
+                heapq.heapify(self.pending)
+            return
+
+        entry = [priority, self.seq, kind, path]
+        self.seq += 1
+        self.path2entry[path] = entry
+        heapq.heappush(self.pending, entry)
+
+    def warmFromManifest(self):
+        """Warms every asset in the manifest, those of the zone we are in first."""
+
+        for zoneKey, zoneAssets in self.manifest.items():
+            if zoneKey == self.zoneKey:
+                priority = PriorityCurrentZone
+            else:
+                priority = PriorityOtherZone
+            for path, kind in zoneAssets.items():
+                self.request(kind, path, priority)
+
+        self.notify.info("Warming %d assets from the manifest." % len(self.path2entry))
+
+    def loadManifest(self):
+        if not os.path.isfile(self.manifestFile):
+            return
+
+        try:
+            with open(self.manifestFile, 'r') as manifestFile:
+                self.manifest = json.load(manifestFile)
+        except (IOError, ValueError), e:
+            self.notify.warning("Couldn't read the precache manifest: %s" % e)
+            self.manifest = {}
+
+    def saveManifest(self):
+        if not self.manifestDirty:
+            return
+
+        manifestDir = os.path.dirname(self.manifestFile)
+        try:
+            if manifestDir and not os.path.isdir(manifestDir):
+                os.makedirs(manifestDir)
+            with open(self.manifestFile, 'w') as manifestFile:
+                json.dump(self.manifest, manifestFile)
+        except (IOError, OSError), e:
+            self.notify.warning("Couldn't write the precache manifest: %s" % e)
+            return
+
+        self.manifestDirty = False
+
+    def __saveTask(self, task):
+        self.saveManifest()
+        return task.again
+
+    def __startLoad(self, kind, path):
+        if kind == KindModel:
+            # Straight to Panda's loader, so it doesn't count as the zone using it.
+            self.loading[path] = Loader.Loader.loadModel(loader, path, okMissing = True,
+                                                         callback = self.__modelLoaded, extraArgs = [path])
+            return
+
+        # Sounds and textures are loaded right here, they don't take long.
+        self.warm.add(path)
+        try:
+            if kind == KindTexture:
+                tex = Loader.Loader.loadTexture(loader, path, okMissing = True)
+                if tex:
+                    tex.prepare(base.win.getGsg().getPreparedObjects())
+            elif kind == KindSound:
+                Loader.Loader.loadSfx(loader, path)
+        except IOError:
+            self.notify.warning("Couldn't warm %s" % path)
+
+    def __modelLoaded(self, model, path):
+        if self.loading is None:
+            # We were cleaned up while it was being read.
+            return
+
+        del self.loading[path]
+        self.warm.add(path)
+        if model:
+            self.ready.append(model)
+
+    def __precacheTask(self, task):
+        start = globalClock.getRealTime()
+
+        # Hand models to the loader threads.
+        while self.pending and len(self.loading) < self.maxLoading:
+            entry = heapq.heappop(self.pending)
+            priority, seq, kind, path = entry
+            if path is None:
+                # It was loaded for real before we got to it.
+                continue
+            del self.path2entry[path]
+            self.__startLoad(kind, path)
+            if globalClock.getRealTime() - start >= self.frameBudget:
+                return task.cont
+
+        # Upload the models the loader threads have read, as many as fit this frame.
+        gsg = base.win.getGsg()
+        while self.ready and globalClock.getRealTime() - start < self.frameBudget:
+            model = self.ready.popleft()
+            CIGlobals.fixGrayscaleTextures(model)
+            # The model pool keeps the textures and geometry around, and they stay
+            # uploaded after we let go of this copy.
+            model.prepareScene(gsg)
+            model.removeNode()
+
+        return task.cont
+
+    def cleanup(self):
+        self.saveManifest()
+        if self.task:
+            self.task.remove()
+            self.task = None
+        if self.saveTask:
+            self.saveTask.remove()
+            self.saveTask = None
+        for request in self.loading.values():
+            loader.cancelRequest(request)
+        self.loading = None
+        for model in self.ready:
+            model.removeNode()
+        self.ready = None
+        self.pending = None
+        self.path2entry = None
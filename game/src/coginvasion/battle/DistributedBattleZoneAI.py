@@ -22,15 +22,15 @@ from src.coginvasion.battle.GameRulesAI import GameRulesAI
 from src.coginvasion.gags import GagGlobals
 from src.coginvasion.quest.Objectives import DefeatCog, DefeatCogBuilding, RecoverItem
 from src.coginvasion.phys.PhysicsUtils import detachAndRemoveBulletNodes
+from src.coginvasion.cog.ai.ThinkManagerAI import ThinkManager
+from src.coginvasion.cog.ai.PerceptionCacheAI import PerceptionCache
+from src.coginvasion.battle.HitResolverAI import HitResolver
+from src.coginvasion.attack.ProjectileManagerAI import ProjectileManager
+from src.coginvasion.battle.PathPlannerAI import PathPlanner
 
 import BattleGlobals
 import itertools
 
-try:
-    from scipy.spatial.ckdtree import cKDTree
-except:
-    raise ImportError("You need to pull in the scipy package")
-
 class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
     notify = directNotify.newCategory('DistributedBattleZoneAI')
 
@@ -54,13 +54,29 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
         self.avReadyToContinue = []
         
         self.bspLoader = None
+        # The PrefetchedLevel of the level we expect to load next, if any.
+        self.prefetchedLevel = None
         self.navMeshNp = None
+        # The MapAssets we have acquired for our loaded level
+        self.mapAssets = None
 
-        # List of info_hint_cover entites, which indicate cover locations for AIs.
+        # Where the info_hint_cover entities of our level are, which indicate
+        # cover locations for AIs. Queries on the KD-tree index coverPositions.
         self.coverKDTree = None
-        self.coverHints = []
+        self.coverPositions = []
         
         self.physicsWorld = None
+        
+        # Runs the AI of every NPC in this zone.
+        self.thinkManager = None
+        # Shares leaf, PVS and line of sight results between NPCs each tick.
+        self.perceptionCache = None
+        # Finds the avatars hit by attacks.
+        self.hitResolver = None
+        # Steps the colliders of every projectile in this zone.
+        self.projectileManager = None
+        # Plans and caches the nav mesh paths of this zone.
+        self.pathPlanner = None
 
         self.gameRules = self.makeGameRules()
         
@@ -124,8 +140,8 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
     def getGameRules(self):
         return self.gameRules
 
-    def getCoverHints(self):
-        return self.coverHints
+    def getCoverPositions(self):
+        return self.coverPositions
 
     def traceLine(self, start, end):
         if not self.bspLoader.hasActiveLevel():
@@ -143,32 +159,47 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
         DistributedObjectAI.generate(self)
         self.air.battleZones[self.zoneId] = self
 
-        self.bspLoader = Py_AI_BSPLoader()
-        self.bspLoader.setAi(True)
-        self.bspLoader.setMaterialsFile("phase_14/etc/materials.txt")
-        #self.bspLoader.setTextureContentsFile("phase_14/etc/texturecontents.txt")
+        self.bspLoader = self.makeBSPLoader()
         self.bspLoader.setServerEntityDispatcher(self)
         AvatarWatcher.zoneId = self.zoneId
         
-        # Link up networked entities
+        self.physicsWorld = BulletWorld()
+        self.physicsWorld.setGravity(Vec3(0, 0, -32.1740))
+        self.bspLoader.setPhysicsWorld(self.physicsWorld)
+        
+        self.thinkManager = ThinkManager(self.zoneId)
+        self.perceptionCache = PerceptionCache(self)
+        self.hitResolver = HitResolver(self)
+        self.projectileManager = ProjectileManager(self.zoneId)
+        self.pathPlanner = PathPlanner(self)
+        
+    def makeBSPLoader(self):
+        """Returns a new loader that is set up to load our levels."""
+
+        bspLoader = Py_AI_BSPLoader()
+        bspLoader.setAi(True)
+        bspLoader.setMaterialsFile("phase_14/etc/materials.txt")
+        #bspLoader.setTextureContentsFile("phase_14/etc/texturecontents.txt")
+        self.linkServerEntities(bspLoader)
+        return bspLoader
+
+    def linkServerEntities(self, bspLoader):
+        """Links up the networked entities of our levels. Override to link more of them."""
+
         from src.coginvasion.szboss import (DistributedTriggerAI, DistributedFuncDoorAI,
                                             DistributedButtonAI, DistributedFuncRotatingAI, LogicCounter,
                                             HintsAI, InfoTimer, InfoBgmAI)
         from src.coginvasion.szboss.InfoPlayerStart import InfoPlayerStart
-        self.bspLoader.linkServerEntityToClass("trigger_once",          DistributedTriggerAI.DistributedTriggerOnceAI)
-        self.bspLoader.linkServerEntityToClass("trigger_multiple",      DistributedTriggerAI.DistributedTriggerMultipleAI)
-        self.bspLoader.linkServerEntityToClass("func_door",             DistributedFuncDoorAI.DistributedFuncDoorAI)
-        self.bspLoader.linkServerEntityToClass("func_button",           DistributedButtonAI.DistributedButtonAI)
-        self.bspLoader.linkServerEntityToClass("func_rotating",         DistributedFuncRotatingAI.DistributedFuncRotatingAI)
-        self.bspLoader.linkServerEntityToClass("logic_counter",         LogicCounter.LogicCounter)
-        self.bspLoader.linkServerEntityToClass("info_hint_cover",       HintsAI.InfoHintCover)
-        self.bspLoader.linkServerEntityToClass("info_timer",            InfoTimer.InfoTimer)
-        self.bspLoader.linkServerEntityToClass("info_player_start",     InfoPlayerStart)
-        self.bspLoader.linkServerEntityToClass("info_bgm",              InfoBgmAI.InfoBgmAI)
-        
-        self.physicsWorld = BulletWorld()
-        self.physicsWorld.setGravity(Vec3(0, 0, -32.1740))
-        self.bspLoader.setPhysicsWorld(self.physicsWorld)
+        bspLoader.linkServerEntityToClass("trigger_once",          DistributedTriggerAI.DistributedTriggerOnceAI)
+        bspLoader.linkServerEntityToClass("trigger_multiple",      DistributedTriggerAI.DistributedTriggerMultipleAI)
+        bspLoader.linkServerEntityToClass("func_door",             DistributedFuncDoorAI.DistributedFuncDoorAI)
+        bspLoader.linkServerEntityToClass("func_button",           DistributedButtonAI.DistributedButtonAI)
+        bspLoader.linkServerEntityToClass("func_rotating",         DistributedFuncRotatingAI.DistributedFuncRotatingAI)
+        bspLoader.linkServerEntityToClass("logic_counter",         LogicCounter.LogicCounter)
+        bspLoader.linkServerEntityToClass("info_hint_cover",       HintsAI.InfoHintCover)
+        bspLoader.linkServerEntityToClass("info_timer",            InfoTimer.InfoTimer)
+        bspLoader.linkServerEntityToClass("info_player_start",     InfoPlayerStart)
+        bspLoader.linkServerEntityToClass("info_bgm",              InfoBgmAI.InfoBgmAI)
         
     def announceGenerate(self):
         DistributedObjectAI.announceGenerate(self)
@@ -176,6 +207,8 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
         taskMgr.add(self.__updateTask, self.uniqueName('battleZoneUpdate'))
 
     def __updateTask(self, task):
+        # The ServerClock keeps this at one tick period, so every tick
+        # steps the world by the same amount.
         dt = globalClock.getDt()
         try:
             #self.physicsWorld.doPhysics(dt, metadata.PHYS_SUBSTEPS, dt / (metadata.PHYS_SUBSTEPS + 1))
@@ -191,18 +224,75 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
     def getPhysicsWorld(self):
         return self.physicsWorld
 
+    def prefetchBSPLevel(self, lfile):
+        """
+        Starts reading `lfile` in the background with a loader of its own,
+        which loadBSPLevel() adopts if it is asked for the same level.
+        """
+
+        self.cancelPrefetch()
+        self.prefetchedLevel = self.air.mapAssetCache.prefetch(lfile, self.makeBSPLoader())
+
+    def cancelPrefetch(self):
+        if self.prefetchedLevel:
+            self.air.mapAssetCache.cancel(self.prefetchedLevel)
+            self.prefetchedLevel = None
+
     def loadBSPLevel(self, lfile):
-        self.bspLoader.read(lfile)
-        self.setupNavMesh(self.bspLoader.getResult())
-
-        coverPositions = []
-        self.coverHints = []
-        for hint in self.bspLoader.findAllEntities("info_hint_cover"):
-            pos = hint.getCEntity().getOrigin()
-            coverPositions.append([pos[0], pos[1], pos[2]])
-            self.coverHints.append(hint)
-        if len(coverPositions) > 0:
-            self.coverKDTree = cKDTree(coverPositions)
+        level = None
+        if self.prefetchedLevel and self.prefetchedLevel.mapFile == lfile:
+            level = self.air.mapAssetCache.takePrefetchedLevel(self.prefetchedLevel)
+            self.prefetchedLevel = None
+        else:
+            self.cancelPrefetch()
+
+        if level:
+            self.adoptPrefetchedLevel(level)
+        else:
+            self.bspLoader.read(lfile)
+        
+        # The nav mesh and cover locations are shared with every other
+        # battle zone that has this level loaded.
+        self.cleanupNavMesh()
+        self.mapAssets = self.air.mapAssetCache.acquire(lfile, self.bspLoader)
+        self.navMeshNp = self.mapAssets.navMeshNp
+        self.coverKDTree = self.mapAssets.coverKDTree
+        self.coverPositions = self.mapAssets.coverPositions
+
+    def adoptPrefetchedLevel(self, level):
+        """Makes the loader of a PrefetchedLevel ours, and generates the entities of its level."""
+
+        if self.bspLoader.hasActiveLevel():
+            self.unloadBSPLevel()
+        self.bspLoader.cleanup()
+
+        self.bspLoader = level.bspLoader
+        level.bspLoader = None
+        self.bspLoader.setServerEntityDispatcher(self)
+        self.bspLoader.setPhysicsWorld(self.physicsWorld)
+
+        # Move the level geometry into our physics world.
+        world = level.physicsWorld
+        for i in xrange(world.getNumRigidBodies() - 1, -1, -1):
+            body = world.getRigidBody(i)
+            world.removeRigidBody(body)
+            self.physicsWorld.attachRigidBody(body)
+        for i in xrange(world.getNumGhosts() - 1, -1, -1):
+            ghost = world.getGhost(i)
+            world.removeGhost(ghost)
+            self.physicsWorld.attachGhost(ghost)
+
+        # Generate the entities the loader deferred. All of them are
+        # generated before any is loaded, so they can find each other.
+        entities = []
+        for deferred in level.getEntities():
+            entity = self.createServerEntity(deferred.cls, deferred.entnum)
+            self.bspLoader.linkCentToPyent(deferred.entnum, entity)
+            entities.append(entity)
+        for entity in entities:
+            entity.load()
+
+        level.cleanup()
 
     def findClosestCoverPoint(self, currPos, n = 1):
         if not self.coverKDTree:
@@ -213,40 +303,34 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
     def unloadBSPLevel(self):
         self.cleanupNavMesh()
         self.coverKDTree = None
-        self.coverHints = []
+        self.coverPositions = []
         if self.bspLoader:
             detachAndRemoveBulletNodes(self.bspLoader.getResult(), world = self.physicsWorld)
             self.bspLoader.cleanup()
         
     def cleanupNavMesh(self):
-        if self.navMeshNp:
-            self.navMeshNp.removeNode()
-            self.navMeshNp = None
-        
-    def setupNavMesh(self, node):
-        self.cleanupNavMesh()
-        
-        nmMgr = base.nmMgr
-        self.navMeshNp = nmMgr.create_nav_mesh()
-        self.navMeshNp.node().set_owner_node_path(node)
-        self.navMeshNp.node().setup()
+        if self.mapAssets:
+            # Not ours to remove.
+            self.air.mapAssetCache.release(self.mapAssets.mapFile)
+            self.mapAssets = None
+        self.navMeshNp = None
+        self.invalidatePaths()
         
     def planPath(self, startPos, endPos):
-        """Uses recast/detour to find a path from the generated nav mesh from the BSP file."""
-
-        if not self.navMeshNp:
-            return [startPos, endPos]
-        result = []
-        valueList = self.navMeshNp.node().path_find_follow(startPos, endPos)
-        currDir = Vec3(0)
-        for i in xrange(valueList.get_num_values()):
-            if i > 0 and i < valueList.get_num_values() - 1:
-                dir = (valueList.get_value(i - 1) - valueList.get_value(i)).normalized()
-                if dir.almostEqual(currDir, 0.05):
-                    continue
-                currDir = dir
-            result.append(valueList.get_value(i))
-        return result
+        """Finds a path on the nav mesh right away, see PathPlanner."""
+
+        return self.pathPlanner.planPath(startPos, endPos)
+
+    def requestPath(self, startPos, endPos):
+        """Asks for a path on the nav mesh that will be planned over the next ticks, see PathPlanner."""
+
+        return self.pathPlanner.requestPath(startPos, endPos)
+
+    def invalidatePaths(self):
+        """Call when something changes the ways through the level, like a door opening."""
+
+        if self.pathPlanner:
+            self.pathPlanner.invalidate()
         
     def createServerEntity(self, cls, entnum):
         """
@@ -318,8 +402,29 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
     def delete(self):
         taskMgr.remove(self.uniqueName('battleZoneUpdate'))
         self.ignoreEvents()
+        self.cancelPrefetch()
+        
+        if self.thinkManager:
+            self.thinkManager.cleanup()
+            self.thinkManager = None
 
-        self.coverHints = None
+        if self.perceptionCache:
+            self.perceptionCache.cleanup()
+            self.perceptionCache = None
+
+        if self.hitResolver:
+            self.hitResolver.cleanup()
+            self.hitResolver = None
+
+        if self.projectileManager:
+            self.projectileManager.cleanup()
+            self.projectileManager = None
+
+        if self.pathPlanner:
+            self.pathPlanner.cleanup()
+            self.pathPlanner = None
+
+        self.coverPositions = None
 
         del self.air.battleZones[self.zoneId]
 
@@ -540,6 +645,9 @@ class DistributedBattleZoneAI(DistributedObjectAI, AvatarWatcher):
 
                     objectiveProgresses.append(objectiveProgress)
                 questManager.updateQuestData(objectiveProgresses = objectiveProgresses)
+
+                # The battle is over, save what they earned.
+                avatar.flushDBFields()
                 
                 blobs.append(rpData.toNetString(avId))
                 
@@ -64,30 +64,17 @@ class DistributedPieTurretAI(DistributedAvatarAI, DistributedSmoothNodeAI):
         if self.isDead() or self.shooting == True:
             return
         
-        # Let's search for some targets.
-        suitId2range = {}
-        self.targets = []
-        for obj in base.air.doId2do.values():
-            className = obj.__class__.__name__
-            if obj.zoneId == self.zoneId:
-                if className == 'DistributedSuitAI':
-                    if not obj.isDead():
-                        suitId2range[obj.doId] = obj.getDistance(self)
+        # Let's search for some targets in our zone.
+        suitsInRange = []
+        for obj in self.air.getNPCsInZone(self.zoneId):
+            if obj.__class__.__name__ == 'DistributedSuitAI' and not obj.isDead():
+                distance = obj.getDistance(self)
+                if distance < self.maximumRange:
+                    suitsInRange.append((distance, obj))
                         
-        # Let's organize the suits by distance.
-        ranges = []
-        for distance in suitId2range.values():
-            ranges.append(distance)
-        ranges.sort()
-        
-        # Let's see if there's some suits that match our criteria.
-        for suitId in suitId2range.keys():
-            distance = suitId2range[suitId]
-            suit = self.air.doId2do.get(suitId)
-            if len(self.targets) < self.MAX_TARGETS:
-                if suit.getDistance(self) < self.maximumRange and not suit.isDead():
-                    self.targets.append(self.air.doId2do.get(suitId))
-            else: break
+        # Let's organize the suits by distance, closest first.
+        suitsInRange.sort(key = lambda suit: suit[0])
+        self.targets = [suit for _, suit in suitsInRange[:self.MAX_TARGETS]]
             
         # If we found some targets, let's shoot the closest one.
         if len(self.targets) > 0:
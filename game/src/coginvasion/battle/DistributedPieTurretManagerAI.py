@@ -56,12 +56,10 @@ class DistributedPieTurretManagerAI(DistributedObjectAI):
     def getTurretCount(self):
         turrets = 0
             
-        for obj in base.air.doId2do.values():
-            className = obj.__class__.__name__
-            if obj.zoneId == self.zoneId:
-                if className in CIGlobals.ToonClasses:
-                    if obj.getPUInventory()[0] > 0:
-                        turrets += 1
-                elif className == 'DistributedPieTurretAI':
-                    turrets += 1
+        for toon in base.air.getToonsInZone(self.zoneId):
+            if toon.getPUInventory()[0] > 0:
+                turrets += 1
+        for npc in base.air.getNPCsInZone(self.zoneId):
+            if npc.__class__.__name__ == 'DistributedPieTurretAI':
+                turrets += 1
         return turrets
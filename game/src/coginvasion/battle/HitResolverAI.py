@@ -0,0 +1,110 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file HitResolverAI.py
+
+"""
+
+from src.coginvasion.globals import CIGlobals
+
+import math
+
+class HitResolver:
+    """
+    Finds out which avatars in a battle zone were hit by an attack.
+
+    A hit collision node is resolved straight to its avatar by the key of
+    the avatar's NodePath. Radius queries (explosions) go through a grid of
+    the avatars in the zone, which is built at most once per tick.
+    """
+
+    def __init__(self, battleZone, cellSize = None):
+        if cellSize is None:
+            cellSize = config.GetFloat('ai-hit-grid-cell-size', 16.0)
+
+        self.battleZone = battleZone
+        self.cellSize = float(cellSize)
+
+        self.frame = -1
+        # (cellX, cellY) -> [(avatar, pos)]
+        self.grid = {}
+
+    def getAvatarFromNode(self, hitNP):
+        """
+        Returns the avatar in our zone that owns the collision node `hitNP`,
+        or None if it doesn't belong to one.
+        """
+
+        if hitNP.isEmpty():
+            return None
+
+        avNP = hitNP.getParent()
+        if avNP.isEmpty():
+            return None
+
+        av = base.air.getAvatarByKey(avNP.getKey())
+        if (not av or not CIGlobals.isAvatar(av) or
+            base.air.avatarRegistry.getAvatarZone(av) != self.battleZone.zoneId):
+            return None
+
+        return av
+
+    def __getCell(self, x, y):
+        return (int(math.floor(x / self.cellSize)), int(math.floor(y / self.cellSize)))
+
+    def __buildGrid(self):
+        frame = globalClock.getFrameCount()
+        if frame == self.frame:
+            return
+
+        self.frame = frame
+        self.grid.clear()
+        for av in base.air.getAvatarsInZone(self.battleZone.zoneId):
+            if av.isEmpty() or not CIGlobals.isAvatar(av):
+                continue
+            pos = av.getPos(render)
+            self.grid.setdefault(self.__getCell(pos[0], pos[1]), []).append((av, pos))
+
+    def getAvatarsInRadius(self, center, radius):
+        """
+        Returns (avatar, distance) for each avatar in our zone
+        within `radius` of `center`.
+        """
+
+        self.__buildGrid()
+
+        minX, minY = self.__getCell(center[0] - radius, center[1] - radius)
+        maxX, maxY = self.__getCell(center[0] + radius, center[1] + radius)
+
+        result = []
+        for cellX in xrange(minX, maxX + 1):
+            for cellY in xrange(minY, maxY + 1):
+                for av, pos in self.grid.get((cellX, cellY), ()):
+                    dist = (pos - center).length()
+                    if dist <= radius:
+                        result.append((av, dist))
+        return result
+
+    def cleanup(self):
+        self.grid = None
+        self.battleZone = None
+
+def getAvatarsInRadius(zoneId, center, radius):
+    """
+    Returns (avatar, distance) for each avatar in `zoneId` within `radius`
+    of `center`, using the zone's HitResolver if it is a battle zone.
+    """
+
+    bz = base.air.getBattleZone(zoneId)
+    if bz and bz.hitResolver:
+        return bz.hitResolver.getAvatarsInRadius(center, radius)
+
+    result = []
+    for av in base.air.getAvatarsInZone(zoneId):
+        if not CIGlobals.isAvatar(av):
+            continue
+        dist = (av.getPos(render) - center).length()
+        if dist <= radius:
+            result.append((av, dist))
+    return result
@@ -0,0 +1,342 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file MapAssetCacheAI.py
+
+"""
+
+from panda3d.core import NodePath, Point3
+from panda3d.bullet import BulletWorld
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+from direct.stdpy import threading
+
+from collections import OrderedDict
+
+try:
+    from scipy.spatial.ckdtree import cKDTree
+except:
+    raise ImportError("You need to pull in the scipy package")
+
+class MapAssets:
+    """
+    The data of a BSP level that never changes between battle zones
+    that use the level: the nav mesh and the cover hint locations.
+    """
+
+    def __init__(self, mapFile):
+        self.mapFile = mapFile
+        self.refCount = 0
+
+        # The nav mesh is built from our own copy of the level geometry,
+        # so it does not go away with the battle zone that loaded it first.
+        self.navMeshOwner = None
+        self.navMeshNp = None
+
+        # The position of each cover hint, in the order of the points of
+        # the KD-tree, so a query on the tree indexes this list.
+        self.coverPositions = []
+        self.coverKDTree = None
+
+    def build(self, bspLoader):
+        # The nav mesh manager isn't thread safe, this must run on the main thread.
+        self.buildNavMesh(bspLoader)
+        self.buildCover(bspLoader)
+
+    def buildNavMesh(self, bspLoader):
+        self.navMeshNp = base.nmMgr.create_nav_mesh()
+        self.navMeshOwner = bspLoader.getResult().copyTo(NodePath("navMeshOwner-" + self.mapFile))
+        self.navMeshNp.node().set_owner_node_path(self.navMeshOwner)
+        self.navMeshNp.node().setup()
+
+    def buildCover(self, bspLoader):
+        self.coverPositions = []
+        for hint in bspLoader.findAllEntities("info_hint_cover"):
+            self.coverPositions.append(Point3(bspLoader.getCEntity(hint.entnum).getOrigin()))
+        if len(self.coverPositions) > 0:
+            self.coverKDTree = cKDTree([[pos[0], pos[1], pos[2]] for pos in self.coverPositions])
+
+    def cleanup(self):
+        if self.navMeshNp:
+            self.navMeshNp.removeNode()
+            self.navMeshNp = None
+        if self.navMeshOwner:
+            self.navMeshOwner.removeNode()
+            self.navMeshOwner = None
+        self.coverPositions = None
+        self.coverKDTree = None
+        self.refCount = None
+
+class DeferredServerEntity:
+    """
+    Stands in for a server entity of a prefetched level. The battle zone
+    that adopts the level generates the real entity in its place.
+    """
+
+    def __init__(self, cls, entnum):
+        self.cls = cls
+        self.entnum = entnum
+
+    def load(self):
+        pass
+
+    def unload(self):
+        pass
+
+class PrefetchDispatcher:
+    """
+    Server entity dispatcher of a prefetch loader. Entities can't be
+    generated off the main thread, so this only remembers which ones to make.
+    """
+
+    def __init__(self):
+        self.entities = []
+
+    def createServerEntity(self, cls, entnum):
+        entity = DeferredServerEntity(cls, entnum)
+        self.entities.append(entity)
+        return entity
+
+class PrefetchedLevel:
+    """
+    A BSP level read by a loader of its own on the prefetch task chain,
+    waiting for a battle zone to adopt it. The level's geometry goes in a
+    physics world of its own until then.
+
+    Only the level itself is read in the background. Its MapAssets are
+    built on the main thread when the zone adopts it, if the cache doesn't
+    have them, since the nav mesh manager is used by every zone's PathPlanner.
+    """
+
+    def __init__(self, mapFile, bspLoader):
+        self.mapFile = mapFile
+        self.bspLoader = bspLoader
+        self.physicsWorld = BulletWorld()
+        self.dispatcher = PrefetchDispatcher()
+
+        self.bspLoader.setServerEntityDispatcher(self.dispatcher)
+        self.bspLoader.setPhysicsWorld(self.physicsWorld)
+
+        # Set by the worker before it hands us back.
+        self.loaded = False
+
+        # Only touched on the main thread.
+        self.ready = False
+        self.cancelled = False
+
+    def load(self):
+        """Reads the level. Runs on the prefetch task chain."""
+
+        self.bspLoader.read(self.mapFile)
+
+    def getEntities(self):
+        return self.dispatcher.entities
+
+    def cleanup(self):
+        if self.bspLoader:
+            self.bspLoader.cleanup()
+            self.bspLoader = None
+        self.physicsWorld = None
+        self.dispatcher = None
+
+class MapAssetCache:
+    """
+    Process-wide cache of MapAssets keyed by BSP file.
+
+    Battle zones acquire the assets of their level when they load it and
+    release them when they unload it. Assets nobody is using are kept around
+    (up to ai-map-cache-size of them) so that the next zone to load the same
+    level doesn't have to rebuild them.
+
+    A battle zone can also prefetch a level before it needs it. The level is
+    read by the zone's spare loader on the prefetch task chain (a thread, if
+    Panda was built with threads) and handed back to the main thread through a locked list. The zone
+    then adopts the loaded level instead of reading it again.
+    """
+
+    PrefetchChain = "mapAssetPrefetch"
+
+    notify = directNotify.newCategory("MapAssetCache")
+
+    def __init__(self, maxUnused = None):
+        if maxUnused is None:
+            maxUnused = config.GetInt('ai-map-cache-size', 4)
+        self.maxUnused = maxUnused
+
+        # mapFile -> MapAssets
+        self.assets = {}
+        # mapFile -> MapAssets, least recently released first
+        self.unused = OrderedDict()
+
+        # PrefetchedLevels the worker hasn't handed back yet. Main thread only.
+        self.prefetching = []
+        self.pollTask = None
+
+        # Guards finished and closed, which the worker touches.
+        self.lock = threading.Lock()
+        # PrefetchedLevels the worker is done with.
+        self.finished = []
+        # We were cleaned up, the worker cleans up after itself.
+        self.closed = False
+
+        taskMgr.setupTaskChain(self.PrefetchChain, numThreads = 1)
+
+    def hasAssets(self, mapFile):
+        return mapFile in self.assets
+
+    def acquire(self, mapFile, bspLoader):
+        """
+        Returns the assets of `mapFile`, building them from `bspLoader` if we
+        don't have them. `bspLoader` must have `mapFile` loaded.
+        """
+
+        assets = self.assets.get(mapFile)
+        if not assets:
+            self.notify.info("Building assets for %s" % mapFile)
+            assets = MapAssets(mapFile)
+            assets.build(bspLoader)
+            self.assets[mapFile] = assets
+        elif assets.refCount == 0:
+            del self.unused[mapFile]
+
+        assets.refCount += 1
+        return assets
+
+    def release(self, mapFile):
+        assets = self.assets.get(mapFile)
+        if not assets or assets.refCount <= 0:
+            self.notify.warning("Released assets for %s more times than acquired" % mapFile)
+            return
+
+        assets.refCount -= 1
+        if assets.refCount == 0:
+            self.unused[mapFile] = assets
+            self.__evictUnused()
+
+    def isPrefetching(self, mapFile):
+        for level in self.prefetching:
+            if level.mapFile == mapFile:
+                return True
+        return False
+
+    def prefetch(self, mapFile, bspLoader):
+        """
+        Starts reading `mapFile` with `bspLoader` in the background. Returns
+        the PrefetchedLevel, to hand to takePrefetchedLevel() or cancel().
+        """
+
+        self.notify.info("Prefetching %s" % mapFile)
+
+        level = PrefetchedLevel(mapFile, bspLoader)
+        self.prefetching.append(level)
+        taskMgr.add(self.__prefetchTask, "MapAssetCache.prefetch-" + mapFile,
+                    taskChain = self.PrefetchChain, extraArgs = [level], appendTask = True)
+        if not self.pollTask:
+            self.pollTask = taskMgr.add(self.__pollTask, "MapAssetCache.poll")
+
+        return level
+
+    def takePrefetchedLevel(self, level):
+        """
+        Hands the loaded `level` over to the caller, who owns its loader from
+        then on. Returns None (and cancels it) if it isn't loaded yet.
+        """
+
+        self.__collectFinished()
+
+        if not level.ready:
+            self.notify.info("%s isn't prefetched yet" % level.mapFile)
+            self.cancel(level)
+            return None
+
+        level.ready = False
+        return level
+
+    def cancel(self, level):
+        """Throws away a level we prefetched for somebody that doesn't want it anymore."""
+
+        if level in self.prefetching:
+            # Cleaned up once the worker hands it back.
+            level.cancelled = True
+        elif level.ready:
+            level.ready = False
+            level.cleanup()
+
+    def __prefetchTask(self, level, task):
+        try:
+            level.load()
+            loaded = True
+        except Exception, e:
+            self.notify.warning("Couldn't prefetch %s: %s" % (level.mapFile, e))
+            loaded = False
+
+        self.lock.acquire()
+        try:
+            level.loaded = loaded
+            closed = self.closed
+            if not closed:
+                self.finished.append(level)
+        finally:
+            self.lock.release()
+
+        if closed:
+            # Nobody is left to take the level.
+            level.bspLoader.cleanup()
+
+        return task.done
+
+    def __pollTask(self, task):
+        self.__collectFinished()
+        if len(self.prefetching) == 0:
+            self.pollTask = None
+            return task.done
+        return task.cont
+
+    def __collectFinished(self):
+        self.lock.acquire()
+        try:
+            finished = self.finished
+            self.finished = []
+        finally:
+            self.lock.release()
+
+        for level in finished:
+            self.__prefetchFinished(level)
+
+    def __prefetchFinished(self, level):
+        self.prefetching.remove(level)
+
+        if level.loaded and not level.cancelled:
+            level.ready = True
+        else:
+            level.cleanup()
+
+    def __evictUnused(self):
+        while len(self.unused) > self.maxUnused:
+            mapFile, assets = self.unused.popitem(last = False)
+            self.notify.info("Evicting assets for %s" % mapFile)
+            del self.assets[mapFile]
+            assets.cleanup()
+
+    def cleanup(self):
+        self.lock.acquire()
+        try:
+            self.closed = True
+            finished = self.finished
+            self.finished = []
+        finally:
+            self.lock.release()
+
+        # The levels still being read are left to the worker.
+        for level in finished:
+            level.cleanup()
+        self.prefetching = None
+        if self.pollTask:
+            self.pollTask.remove()
+            self.pollTask = None
+
+        for assets in self.assets.values():
+            assets.cleanup()
+        self.assets = None
+        self.unused = None
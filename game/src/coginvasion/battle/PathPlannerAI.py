@@ -0,0 +1,203 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file PathPlannerAI.py
+
+"""
+
+from panda3d.core import Vec3, TrueClock
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+from collections import OrderedDict, deque
+
+import math
+
+class PathRequest:
+    """A path that has been asked for, and might not have been planned yet."""
+
+    def __init__(self, startPos, endPos):
+        self.startPos = startPos
+        self.endPos = endPos
+        self.path = None
+        self.cancelled = False
+
+    def isDone(self):
+        return self.path is not None
+
+    def getPath(self):
+        return self.path
+
+    def finish(self, path):
+        self.path = path
+
+    def cancel(self):
+        self.cancelled = True
+
+class PathPlanner:
+    """
+    Plans the nav mesh paths of a battle zone.
+
+    Planned paths are cached by their start and goal, snapped to a grid of
+    ai-path-cell-size feet, so a group of NPCs that path to the same place
+    from about the same place only plan it once. The cache is thrown away
+    when the nav mesh changes or something opens or blocks a way.
+
+    Paths can be planned right away with planPath(), or requested with
+    requestPath(). Requests are planned from a task, which spends no more
+    than ai-path-budget milliseconds per tick on them (but always plans at
+    least one). Requests for the same cached path are planned once.
+    """
+
+    notify = directNotify.newCategory("PathPlanner")
+
+    def __init__(self, battleZone, budget = None, cellSize = None, cacheSize = None):
+        if budget is None:
+            budget = config.GetFloat('ai-path-budget', 2.0)
+        if cellSize is None:
+            cellSize = config.GetFloat('ai-path-cell-size', 2.0)
+        if cacheSize is None:
+            cacheSize = config.GetInt('ai-path-cache-size', 256)
+
+        self.battleZone = battleZone
+        self.budget = budget / 1000.0
+        self.cellSize = float(cellSize)
+        self.cacheSize = cacheSize
+        self.trueClock = TrueClock.getGlobalPtr()
+
+        # (startCell, goalCell) -> path, least recently used first
+        self.cache = OrderedDict()
+
+        # Keys of paths waiting to be planned, in the order they were requested.
+        self.queue = deque()
+        # key -> [PathRequest]
+        self.pending = {}
+
+        self.task = None
+
+    def __getCell(self, pos):
+        size = self.cellSize
+        return (int(math.floor(pos[0] / size)), int(math.floor(pos[1] / size)), int(math.floor(pos[2] / size)))
+
+    def __makeKey(self, startPos, endPos):
+        return (self.__getCell(startPos), self.__getCell(endPos))
+
+    def __plan(self, startPos, endPos):
+        """Uses recast/detour to find a path from the generated nav mesh from the BSP file."""
+
+        navMeshNp = self.battleZone.navMeshNp
+        if not navMeshNp:
+            return [startPos, endPos]
+        result = []
+        valueList = navMeshNp.node().path_find_follow(startPos, endPos)
+        currDir = Vec3(0)
+        for i in xrange(valueList.get_num_values()):
+            if i > 0 and i < valueList.get_num_values() - 1:
+                dir = (valueList.get_value(i - 1) - valueList.get_value(i)).normalized()
+                if dir.almostEqual(currDir, 0.05):
+                    continue
+                currDir = dir
+            result.append(valueList.get_value(i))
+        return result
+
+    def __getCached(self, key):
+        path = self.cache.get(key)
+        if path is not None:
+            # Move it to the back, it was just used.
+            del self.cache[key]
+            self.cache[key] = path
+        return path
+
+    def __cache(self, key, path):
+        self.cache[key] = path
+        while len(self.cache) > self.cacheSize:
+            self.cache.popitem(last = False)
+
+    @staticmethod
+    def __fitPath(path, startPos):
+        """
+        Returns a copy of a cached `path` that starts exactly at `startPos`,
+        it may have been planned from elsewhere in the same cell.
+        """
+
+        if len(path) < 2:
+            return list(path)
+        return [startPos] + path[1:]
+
+    def planPath(self, startPos, endPos):
+        key = self.__makeKey(startPos, endPos)
+        path = self.__getCached(key)
+        if path is None:
+            path = self.__plan(startPos, endPos)
+            self.__cache(key, path)
+        return self.__fitPath(path, startPos)
+
+    def requestPath(self, startPos, endPos):
+        """
+        Returns a PathRequest for a path from `startPos` to `endPos`.
+        It is finished right away if we already have the path.
+        """
+
+        request = PathRequest(startPos, endPos)
+
+        key = self.__makeKey(startPos, endPos)
+        path = self.__getCached(key)
+        if path is not None:
+            request.finish(self.__fitPath(path, startPos))
+            return request
+
+        requests = self.pending.get(key)
+        if requests is None:
+            requests = []
+            self.pending[key] = requests
+            self.queue.append(key)
+        requests.append(request)
+
+        if not self.task:
+            self.task = taskMgr.add(self.__planTask, "PathPlanner.planTask-" + str(self.battleZone.zoneId))
+
+        return request
+
+    def hasPendingRequests(self):
+        return len(self.queue) > 0
+
+    def invalidate(self):
+        """Throws away every cached path, call when the ways through the level change."""
+        self.cache.clear()
+
+    def __planTask(self, task):
+        start = self.trueClock.getShortTime()
+
+        while len(self.queue) > 0:
+            key = self.queue.popleft()
+            requests = [request for request in self.pending.pop(key) if not request.cancelled]
+            if len(requests) == 0:
+                continue
+
+            path = self.__plan(requests[0].startPos, requests[0].endPos)
+            self.__cache(key, path)
+            for request in requests:
+                request.finish(self.__fitPath(path, request.startPos))
+
+            if self.trueClock.getShortTime() - start >= self.budget:
+                break
+
+        if len(self.queue) == 0:
+            self.task = None
+            return task.done
+
+        return task.cont
+
+    def cleanup(self):
+        if self.task:
+            self.task.remove()
+            self.task = None
+        for requests in self.pending.values():
+            for request in requests:
+                request.cancel()
+        self.pending = None
+        self.queue = None
+        self.cache = None
+        self.battleZone = None
+        self.trueClock = None
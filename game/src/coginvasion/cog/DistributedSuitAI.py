@@ -34,17 +34,17 @@ import math
 
 class Task_GetFlyDownPath(BaseTaskAI):
     
-    def runTask(self):
+    def runTask(self, npc):
         maxFly = 20.0
-        groundPos = self.npc.getPos()
-        skyPos = self.npc.getBattleZone().bspLoader.clipLine(groundPos, groundPos + (0, 0, maxFly))
-        self.npc.getMotor().setFwdSpeed(5.0)
-        self.npc.getMotor().lookAtWaypoints = False
-        self.npc.getMotor().setWaypoints([skyPos, groundPos])
-        self.npc.setPos(skyPos)
-        self.npc.d_clearSmoothing()
-        if self.npc.d_broadcastPosHpr:
-            self.npc.d_broadcastPosHpr()
+        groundPos = npc.getPos()
+        skyPos = npc.getBattleZone().bspLoader.clipLine(groundPos, groundPos + (0, 0, maxFly))
+        npc.getMotor().setFwdSpeed(5.0)
+        npc.getMotor().lookAtWaypoints = False
+        npc.getMotor().setWaypoints([skyPos, groundPos])
+        npc.setPos(skyPos)
+        npc.d_clearSmoothing()
+        if npc.d_broadcastPosHpr:
+            npc.d_broadcastPosHpr()
         return SCHED_COMPLETE
 
 class DistributedSuitAI(DistributedAvatarAI, BaseNPCAI):
@@ -107,38 +107,43 @@ class DistributedSuitAI(DistributedAvatarAI, BaseNPCAI):
                            ACT_DIE          :   6.0,
                            ACT_VICTORY_DANCE:   9.0,
                            ACT_COG_FLY_DOWN :   6.834}
-                           
-        self.schedules.update({
+        
+    @classmethod
+    def makeSchedules(cls):
+        schedules = BaseNPCAI.makeSchedules()
+        schedules.update({
         
             "VICTORY_TAUNT" :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_Speak(self, 0.5, ["Aha, Toon! You thought you could get past me!",
-                                           "Caught tweakin, jit!",
-                                           "I told you it was my turn to play on the XBOX!"]),
-                    Task_SetActivity(self, ACT_VICTORY_DANCE),
-                    Task_AwaitActivity(self)
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_Speak(0.5, ["Aha, Toon! You thought you could get past me!",
+                                     "Caught tweakin, jit!",
+                                     "I told you it was my turn to play on the XBOX!"]),
+                    Task_SetActivity(ACT_VICTORY_DANCE),
+                    Task_AwaitActivity()
                 ],
                 interruptMask = COND_LIGHT_DAMAGE|COND_HEAVY_DAMAGE
             ),
             
             "SUPA_FLY_IN_MOVE"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_GetFlyDownPath(self),
-                    Task_SetActivity(self, ACT_COG_FLY_DOWN),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self, changeYaw = False),
-                    Task_AwaitActivity(self),
-                    Task_Func(self.resetFwdSpeed)
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_GetFlyDownPath(),
+                    Task_SetActivity(ACT_COG_FLY_DOWN),
+                    Task_RunPath(),
+                    Task_AwaitMovement(changeYaw = False),
+                    Task_AwaitActivity(),
+                    Task_Func("resetFwdSpeed")
                 ],
                 interruptMask = COND_SCHEDULE_DONE|COND_TASK_FAILED
             )
         
         })
         
+        return schedules
+        
     def resetFwdSpeed(self):
         baseSpeed = 10.0
         classAttrs = self.suitPlan.getCogClassAttrs()
@@ -164,10 +169,10 @@ class DistributedSuitAI(DistributedAvatarAI, BaseNPCAI):
         if state != self.npcState:
             if state == STATE_COMBAT:
                 if self.hasConditions(COND_NEW_TARGET):
-                    task_oneOff(Task_Speak(self, 0.3, ["Your silly jokes can't stop me, Toon.",
-                                                       "Contact confirmed. Subject: Anarchy",
-                                                       "Toon spotted!",
-                                                       "Cogs, catch that Toon!"]))
+                    task_oneOff(Task_Speak(0.3, ["Your silly jokes can't stop me, Toon.",
+                                                 "Contact confirmed. Subject: Anarchy",
+                                                 "Toon spotted!",
+                                                 "Cogs, catch that Toon!"]), self)
         BaseNPCAI.setNPCState(self, state)
         
     def getSchedule(self):
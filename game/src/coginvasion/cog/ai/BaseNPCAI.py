@@ -8,7 +8,7 @@ from src.coginvasion.cog.ai.tasks.BaseTaskAI import BaseTaskAI
 from src.coginvasion.cog.ai.tasks.TasksAI import *
 from src.coginvasion.avatar.Activities import ACT_WAKE_ANGRY, ACT_NONE, ACT_SMALL_FLINCH, ACT_DIE
 from src.coginvasion.avatar.Motor import Motor
-from ScheduleAI import Schedule
+from ScheduleAI import Schedule, ScheduleCursor
 from ConditionsAI import *
 from RelationshipsAI import *
 from StatesAI import *
@@ -91,31 +91,65 @@ class BaseNPCAI(BaseCombatCharacterAI):
 
         self.path = []
 
-        self.schedules = {
+        # Our schedules are shared with every other NPC of our class,
+        # where we are in our current schedule is kept by the cursor.
+        self.schedules, self.scheduleNames = self.getScheduleTemplates()
+        self.scheduleCursor = ScheduleCursor(self)
+
+        self.motor = Motor(self)
+        # The path we asked our battle zone's planner for, if it hasn't arrived yet.
+        self.pathRequest = None
+
+        self.idealYaw = 0.0
+        self.yawSpeed = 9.0
+        
+        self.avatarsInSight = []
+        
+        self.capableAttacks = []
+        
+        self.oldTargets = deque(maxlen = self.MAX_OLD_ENEMIES)
+        
+        self.runAITask = None
+        self.thinkManager = None
+        # Time since our last think, set by whoever is running our AI.
+        self.thinkDt = 0.0
+
+    @classmethod
+    def makeSchedules(cls):
+        """
+        Returns a dictionary of schedule name -> Schedule for this NPC class.
+        Override this to add or replace schedules, starting from the
+        schedules of your base class.
+
+        This is only called once per NPC class, the schedules are shared by
+        every instance of the class and must not reference an instance.
+        """
+
+        return {
             "DIE"           :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_SetActivity(self, ACT_DIE),
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_SetActivity(ACT_DIE),
                     Task_Wait(-1)
                 ],
                 interruptMask = 0
             ),
             "SMALL_FLINCH"  :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_SetActivity(self, ACT_SMALL_FLINCH),
-                    Task_Remember(self, MEMORY_FLINCHED),
-                    Task_AwaitActivity(self)
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_SetActivity(ACT_SMALL_FLINCH),
+                    Task_Remember(MEMORY_FLINCHED),
+                    Task_AwaitActivity()
                 ]
             ),
 
             "IDLE_STAND"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_SetActivity(self, ACT_NONE),
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_SetActivity(ACT_NONE),
                     Task_Wait(-1)
                 ],
                 interruptMask = COND_NEW_TARGET|COND_SEE_FEAR|COND_LIGHT_DAMAGE|COND_HEAVY_DAMAGE|COND_FRIEND_IN_WAY
@@ -123,47 +157,47 @@ class BaseNPCAI(BaseCombatCharacterAI):
 
             "WAKE_ANGRY"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_Remember(self, MEMORY_COMBAT_WAKE),
-                    Task_SetActivity(self, ACT_WAKE_ANGRY),
-                    Task_AwaitActivity(self)#,
-                    #Task_FaceIdeal(self)
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_Remember(MEMORY_COMBAT_WAKE),
+                    Task_SetActivity(ACT_WAKE_ANGRY),
+                    Task_AwaitActivity()#,
+                    #Task_FaceIdeal()
                 ]
             ),
 
             "COMBAT_FACE"   :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_SetActivity(self, ACT_NONE),
-                    Task_FaceTarget(self)
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_SetActivity(ACT_NONE),
+                    Task_FaceTarget()
                 ]
             ),
 
             "TAKE_COVER_FROM_ORIGIN"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_FindCoverFromOrigin(self),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self),
-                    Task_Remember(self, MEMORY_IN_COVER),
-                    Task_Func(self.setIdealYaw, [179])
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_FindCoverFromOrigin(),
+                    Task_RunPath(),
+                    Task_AwaitMovement(),
+                    Task_Remember(MEMORY_IN_COVER),
+                    Task_Func("setIdealYaw", [179])
                 ],
                 interruptMask = COND_NEW_TARGET|COND_FRIEND_IN_WAY
             ),
 
             "TAKE_COVER_FROM_TARGET"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
+                    Task_StopMoving(),
+                    Task_StopAttack(),
                     Task_Wait(0.2),
-                    Task_FindCoverFromTarget(self),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self),
-                    Task_Remember(self, MEMORY_IN_COVER),
-                    Task_FaceTarget(self),
+                    Task_FindCoverFromTarget(),
+                    Task_RunPath(),
+                    Task_AwaitMovement(),
+                    Task_Remember(MEMORY_IN_COVER),
+                    Task_FaceTarget(),
                     Task_Wait(1.0)
                 ],
                 interruptMask = COND_NEW_TARGET|COND_FRIEND_IN_WAY
@@ -171,13 +205,13 @@ class BaseNPCAI(BaseCombatCharacterAI):
 
             "CHASE_TARGET_FAILED"   :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
+                    Task_StopMoving(),
+                    Task_StopAttack(),
                     Task_Wait(0.2),
-                    Task_FindCoverFromTarget(self),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self),
-                    Task_FaceTarget(self),
+                    Task_FindCoverFromTarget(),
+                    Task_RunPath(),
+                    Task_AwaitMovement(),
+                    Task_FaceTarget(),
                     Task_Wait(1.0)
                 ],
                 interruptMask = COND_NEW_TARGET|COND_CAN_ATTACK|COND_FRIEND_IN_WAY
@@ -185,86 +219,81 @@ class BaseNPCAI(BaseCombatCharacterAI):
 
             "CHASE_TARGET"  :   Schedule(
                 [
-                    Task_StopAttack(self),
-                    Task_GetPathToTarget(self),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self)
+                    Task_StopAttack(),
+                    Task_GetPathToTarget(),
+                    Task_RunPath(),
+                    Task_AwaitMovement()
                 ],
                 failSched = "CHASE_TARGET_FAILED",
                 interruptMask = COND_NEW_TARGET | COND_TASK_FAILED | COND_CAN_ATTACK | COND_FRIEND_IN_WAY
             ),
             "ATTACK"        :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_FaceTarget(self),
-                    Task_EquipAttack(self),
-                    Task_SpeakAttack(self),
-                    Task_FireAttack(self),
-                    Task_AwaitAttack(self),
-                    Task_SetPostAttackSchedule(self)
+                    Task_StopMoving(),
+                    Task_FaceTarget(),
+                    Task_EquipAttack(),
+                    Task_SpeakAttack(),
+                    Task_FireAttack(),
+                    Task_AwaitAttack(),
+                    Task_SetPostAttackSchedule()
                 ],
                 interruptMask=COND_HEAVY_DAMAGE|COND_LIGHT_DAMAGE|COND_TARGET_OCCLUDED|COND_TARGET_DEAD|COND_NEW_TARGET
             ),
             "ALERT_FACE"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_SetActivity(self, ACT_NONE),
-                    Task_FaceIdeal(self)
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_SetActivity(ACT_NONE),
+                    Task_FaceIdeal()
                 ],
                 interruptMask=COND_NEW_TARGET|COND_SEE_FEAR|COND_LIGHT_DAMAGE|COND_HEAVY_DAMAGE
             ),
             "ALERT_SMALL_FLINCH"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_SetActivity(self, ACT_SMALL_FLINCH),
-                    Task_Remember(self, MEMORY_FLINCHED),
-                    Task_AwaitActivity(self),
-                    Task_SetSchedule(self, "ALERT_FACE")
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_SetActivity(ACT_SMALL_FLINCH),
+                    Task_Remember(MEMORY_FLINCHED),
+                    Task_AwaitActivity(),
+                    Task_SetSchedule("ALERT_FACE")
                 ]
             ),
             "RETURN_TO_MEMORY_POSITION" :   Schedule(
                 [
-                    Task_StopAttack(self),
-                    Task_StopMoving(self),
-                    Task_GetPathToMemoryPosition(self),
-                    Task_ForgetPosition(self),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self),
-                    Task_FaceIdeal(self)
+                    Task_StopAttack(),
+                    Task_StopMoving(),
+                    Task_GetPathToMemoryPosition(),
+                    Task_ForgetPosition(),
+                    Task_RunPath(),
+                    Task_AwaitMovement(),
+                    Task_FaceIdeal()
                 ],
                 interruptMask=COND_NEW_TARGET|COND_LIGHT_DAMAGE|COND_HEAVY_DAMAGE|COND_SEE_HATE|COND_SEE_DISLIKE|COND_FRIEND_IN_WAY
             ),
             "YIELD_TO_FRIEND"   :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_GetPathYieldToFriend(self),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self, watchTarget = True),
-                    Task_RestartLastSchedule(self)
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_GetPathYieldToFriend(),
+                    Task_RunPath(),
+                    Task_AwaitMovement(watchTarget = True),
+                    Task_RestartLastSchedule()
                 ],
                 interruptMask=COND_NEW_TARGET|COND_SCHEDULE_DONE|COND_TASK_FAILED
             )
         }
 
-        self.motor = Motor(self)
-
-        self.scheduleNames = {v : k for k,v in self.schedules.items()}
-        #print self.schedules
-        #print self.scheduleNames
+    @classmethod
+    def getScheduleTemplates(cls):
+        """
+        Returns the shared schedules of this NPC class and the reverse
+        Schedule -> name lookup, building them the first time.
+        """
 
-        self.idealYaw = 0.0
-        self.yawSpeed = 9.0
-        
-        self.avatarsInSight = []
-        
-        self.capableAttacks = []
-        
-        self.oldTargets = deque(maxlen = self.MAX_OLD_ENEMIES)
-        
-        self.runAITask = None
+        if '_scheduleTemplates' not in cls.__dict__:
+            schedules = cls.makeSchedules()
+            cls._scheduleTemplates = (schedules, {v : k for k,v in schedules.items()})
+        return cls._scheduleTemplates
 
     def remember(self, bits):
         self.memory |= bits
@@ -313,13 +342,14 @@ class BaseNPCAI(BaseCombatCharacterAI):
         #print "findCover"
 
         # Find cover hint nodes in radius of me
-        kdTree = self.getBattleZone().coverKDTree
+        battleZone = self.getBattleZone()
+        kdTree = battleZone.coverKDTree
         if kdTree:
             nearby = kdTree.query_ball_point([myPos[0], myPos[1], myPos[2]], maxDist)
         else:
             nearby = []
         for nodeIdx in nearby:
-            nodePos = self.getBattleZone().coverHints[nodeIdx].getCEntity().getOrigin()
+            nodePos = battleZone.coverPositions[nodeIdx]
             result = world.rayTestClosest(nodePos + viewOffset, lookersOffset, CIGlobals.WorldGroup)
             #print "findCover result:", result, result.hasHit(), result.getNode()
             # if this cover point will block the threat's line of sight to me
@@ -386,7 +416,7 @@ class BaseNPCAI(BaseCombatCharacterAI):
         ideal = self.idealYaw
         #print current, ideal
         if current != ideal:
-            speed = yawSpeed * globalClock.getDt() * 10
+            speed = yawSpeed * self.thinkDt * 10
             move = ideal - current
             if ideal > current:
                 if move >= 180:
@@ -430,7 +460,11 @@ class BaseNPCAI(BaseCombatCharacterAI):
         return self.scheduleNames.get(schedInst, "Not found")
 
     def addSchedule(self, name, schedInst):
+        # Don't add to the schedules shared with the rest of our class.
+        self.schedules = dict(self.schedules)
         self.schedules[name] = schedInst
+        self.scheduleNames = dict(self.scheduleNames)
+        self.scheduleNames[schedInst] = name
 
     def getScheduleByName(self, name):
         return self.schedules.get(name, None)
@@ -441,8 +475,8 @@ class BaseNPCAI(BaseCombatCharacterAI):
         for target in self.oldTargets:
             if target:
                 target.cleanup()
-        for sched in self.schedules.values():
-            sched.cleanup()
+        self.scheduleCursor.cleanup()
+        self.scheduleCursor = None
         self.motor.cleanup()
         self.motor = None
         self.memoryPosition = None
@@ -450,6 +484,7 @@ class BaseNPCAI(BaseCombatCharacterAI):
         self.idealState = None
         self.capableAttacks = None
         self.schedules = None
+        self.scheduleNames = None
         self.oldTargets = None
         self.lastConditions = None
         self.conditionsMask = None
@@ -486,6 +521,9 @@ class BaseNPCAI(BaseCombatCharacterAI):
     def clearAllConditions(self):
         self.conditionsMask = 0
 
+    def getPerceptionCache(self):
+        return getattr(self.battleZone, 'perceptionCache', None)
+
     def isPlayerAlive(self, plyr):
         return not plyr.isDead()
 
@@ -493,6 +531,10 @@ class BaseNPCAI(BaseCombatCharacterAI):
         if not CIGlobals.isNodePathOk(plyr) or not CIGlobals.isNodePathOk(self):
             return False
 
+        cache = self.getPerceptionCache()
+        if cache:
+            return cache.isSameLeaf(self, plyr)
+
         plLeaf = self.battleZone.bspLoader.findLeaf(plyr.getPos() + (0, 0, 0.05))
         myLeaf = self.battleZone.bspLoader.findLeaf(self.getPos() + (0, 0, 0.05))
         return plLeaf == myLeaf
@@ -501,6 +543,10 @@ class BaseNPCAI(BaseCombatCharacterAI):
         if not CIGlobals.isNodePathOk(plyr) or not CIGlobals.isNodePathOk(self):
             return False
         
+        cache = self.getPerceptionCache()
+        if cache:
+            return cache.isInPVS(self, plyr)
+        
         plLeaf = self.battleZone.bspLoader.findLeaf(plyr.getPos() + (0, 0, 0.05))
         myLeaf = self.battleZone.bspLoader.findLeaf(self.getPos() + (0, 0, 0.05))
         return self.battleZone.bspLoader.isClusterVisible(myLeaf, plLeaf)
@@ -513,6 +559,9 @@ class BaseNPCAI(BaseCombatCharacterAI):
         
     def doesLineTraceToPlayer(self, plyr):
         # Is the player occluded by any BSP faces?
+        cache = self.getPerceptionCache()
+        if cache:
+            return cache.doesLineTrace(self, plyr)
         return self.battleZone.traceLine(self.getPos(render) + (0, 0, 3.5 / 2), plyr.getPos(render) + (0, 0, 2.0))
         
     def isPlayerInVisionCone(self, plyr):
@@ -858,8 +907,7 @@ class BaseNPCAI(BaseCombatCharacterAI):
         del self.avatarsInSight[:]
         
         # Go through all known avatars in my zone.
-        for i in xrange(len(base.air.avatars[self.battleZone.zoneId])):
-            av = base.air.avatars[self.battleZone.zoneId][i]
+        for av in base.air.getAvatarsInZone(self.battleZone.zoneId):
             # Ignore myself
             if av == self:
                 continue
@@ -919,9 +967,13 @@ class BaseNPCAI(BaseCombatCharacterAI):
     def scheduleChange(self):
         pass
 
+    def getScheduleCursor(self):
+        return self.scheduleCursor
+
     def changeSchedule(self, sched):
-        if sched:
-            sched.reset()
+        # A path asked for by the old schedule isn't wanted anymore.
+        self.cancelPathRequest()
+        self.scheduleCursor.reset(sched)
 
         #print "Change schedule to", self.getScheduleName(sched)
         self.lastSchedule = self.schedule
@@ -974,7 +1026,7 @@ class BaseNPCAI(BaseCombatCharacterAI):
                     self.changeSchedule(newSched)
 
         if self.schedule:
-            run = self.schedule.runSchedule()
+            run = self.scheduleCursor.runSchedule()
             if run == SCHED_COMPLETE:
                 #print "schedule complete"
                 self.setConditions(COND_SCHEDULE_DONE)
@@ -988,13 +1040,30 @@ class BaseNPCAI(BaseCombatCharacterAI):
     def startAI(self):
         self.stopAI()
         
-        self.runAITask = taskMgr.add(self.__runAITask, "BaseNPCAI.runAITask-" + str(id(self)))
+        # Let our battle zone think us along with the other NPCs in the zone
+        # if it can, otherwise we have to run our own task.
+        thinkMgr = getattr(self.battleZone, 'thinkManager', None)
+        if thinkMgr:
+            self.thinkManager = thinkMgr
+            thinkMgr.addNPC(self)
+        else:
+            self.runAITask = taskMgr.add(self.__runAITask, "BaseNPCAI.runAITask-" + str(id(self)))
         
     def __runAITask(self, task):
+        self.thinkDt = globalClock.getDt()
         self.runAI()
         return task.cont
         
+    def cancelPathRequest(self):
+        if self.pathRequest:
+            self.pathRequest.cancel()
+            self.pathRequest = None
+
     def stopAI(self):
+        self.cancelPathRequest()
+        if self.thinkManager:
+            self.thinkManager.removeNPC(self)
+            self.thinkManager = None
         if self.runAITask:
             self.runAITask.remove()
             self.runAITask = None
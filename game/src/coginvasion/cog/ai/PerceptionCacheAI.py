@@ -0,0 +1,99 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file PerceptionCacheAI.py
+
+"""
+
+class PerceptionCache:
+    """
+    Caches the BSP queries that NPCs make when they look at the world.
+
+    Each avatar's leaf is only looked up once per tick, the cluster
+    visibility between two leafs is only tested once per tick for each
+    pair, no matter which one of the pair is looking, and the line of sight
+    from one avatar to another is only traced once per tick. Everything is
+    thrown away at the start of the next tick.
+    """
+
+    # How far above an avatar's origin we find its leaf.
+    LeafOffset = (0, 0, 0.05)
+    # Where the line of sight test starts and ends on the avatars.
+    EyeOffset = (0, 0, 3.5 / 2)
+    TargetOffset = (0, 0, 2.0)
+
+    def __init__(self, battleZone):
+        self.battleZone = battleZone
+        self.frame = -1
+
+        # id(avatar) -> leaf
+        self.leafs = {}
+        # (leaf, leaf) -> is cluster visible
+        self.clusterVis = {}
+        # (id(looking avatar), id(target avatar)) -> does line trace
+        # The trace goes from the eyes to the target's chest, so it isn't
+        # the same the other way around.
+        self.lineTraces = {}
+
+    def __checkFrame(self):
+        frame = globalClock.getFrameCount()
+        if frame != self.frame:
+            self.frame = frame
+            self.leafs.clear()
+            self.clusterVis.clear()
+            self.lineTraces.clear()
+
+    @staticmethod
+    def __makePairKey(a, b):
+        if a < b:
+            return (a, b)
+        return (b, a)
+
+    def getLeaf(self, av):
+        self.__checkFrame()
+
+        key = id(av)
+        leaf = self.leafs.get(key)
+        if leaf is None:
+            leaf = self.battleZone.bspLoader.findLeaf(av.getPos() + self.LeafOffset)
+            self.leafs[key] = leaf
+        return leaf
+
+    def isSameLeaf(self, av, other):
+        return self.getLeaf(av) == self.getLeaf(other)
+
+    def isInPVS(self, av, other):
+        """Is the leaf of `other` potentially visible from the leaf of `av`?"""
+
+        myLeaf = self.getLeaf(av)
+        otherLeaf = self.getLeaf(other)
+
+        key = self.__makePairKey(myLeaf, otherLeaf)
+        vis = self.clusterVis.get(key)
+        if vis is None:
+            vis = self.battleZone.bspLoader.isClusterVisible(myLeaf, otherLeaf)
+            self.clusterVis[key] = vis
+        return vis
+
+    def doesLineTrace(self, av, other):
+        """
+        Is there a clear line from the eyes of `av` to `other`?
+        The result is kept for the rest of this tick.
+        """
+
+        self.__checkFrame()
+
+        key = (id(av), id(other))
+        traces = self.lineTraces.get(key)
+        if traces is None:
+            traces = self.battleZone.traceLine(av.getPos(render) + self.EyeOffset,
+                                               other.getPos(render) + self.TargetOffset)
+            self.lineTraces[key] = traces
+        return traces
+
+    def cleanup(self):
+        self.leafs = None
+        self.clusterVis = None
+        self.lineTraces = None
+        self.battleZone = None
@@ -1,4 +1,3 @@
-
 from ScheduleResultsAI import *
 from ConditionsAI import *
 
@@ -6,75 +5,119 @@ class Schedule:
     """
     A schedule is just a list of tasks for the AI to run.
     A task is the smallest atomic action that an AI character can perform.
-    
+
     The interrupt mask is a bitmask of conditions that will cause the schedule
     to abort.
-    
+
     The schedule/task system can be used to make a wide variety of AI actions.
+
+    Schedules are templates. They are built once per NPC class and shared by
+    every NPC of that class, so they never change after they are made. Where
+    an NPC is in a schedule is kept by its ScheduleCursor.
     """
-    
+
     def __init__(self, tasks = [], interruptMask = COND_TASK_FAILED | COND_NEW_TARGET | COND_SCHEDULE_DONE, failSched = None):
-        self.tasks = tasks
+        self.tasks = tuple(tasks)
         self.interruptMask = interruptMask
-        self.currentTask = 0
         self.failSchedule = failSched
-        
-        self.__newTask = True
 
     def cleanup(self):
         for task in self.tasks:
             task.cleanup()
         del self.tasks
         del self.interruptMask
-        del self.currentTask
         del self.failSchedule
-        del self.__newTask
-
-    def reset(self):
-        self.currentTask = 0
-        self.__newTask = True
 
     def getFailSchedule(self):
         return self.failSchedule
 
     def hasFailSchedule(self):
         return self.failSchedule is not None
-        
-    def getCurrentTask(self):
-        return self.currentTask
-        
+
+    def getNumTasks(self):
+        return len(self.tasks)
+
     def getTaskList(self):
         return self.tasks
-        
+
     def getInterruptMask(self):
         return self.interruptMask
-        
-    def hasInterrupts(self, interrups):
+
+    def hasInterrupts(self, interrupts):
         return (self.interruptMask & interrupts) != 0
-        
+
+class ScheduleCursor:
+    """
+    The per-NPC execution state of the schedule an NPC is running.
+    """
+
+    def __init__(self, npc):
+        self.npc = npc
+        self.schedule = None
+        self.currentTask = 0
+        self.taskStartTime = 0.0
+        self.__newTask = True
+
+        # Bumped every time the schedule is changed, so we can tell
+        # if a task changed our schedule while it was running.
+        self.__changes = 0
+
+    def cleanup(self):
+        self.npc = None
+        self.schedule = None
+        del self.currentTask
+        del self.taskStartTime
+        del self.__newTask
+        del self.__changes
+
+    def getSchedule(self):
+        return self.schedule
+
+    def reset(self, schedule):
+        self.schedule = schedule
+        self.currentTask = 0
+        self.taskStartTime = 0.0
+        self.__newTask = True
+        self.__changes += 1
+
+    def getCurrentTask(self):
+        return self.currentTask
+
+    def getTaskElapsedTime(self):
+        if self.__newTask:
+            return 0.0
+
+        return globalClock.getFrameTime() - self.taskStartTime
+
     def runSchedule(self):
         """
         Runs a task in the schedule.
-        
-        Returns True when the schedule has completed,
-        False if more tasks needs to run.
+
+        Returns SCHED_COMPLETE when the schedule has completed,
+        SCHED_CONTINUE if more tasks needs to run.
         """
-        
-        if self.currentTask >= len(self.tasks):
+
+        if not self.schedule or self.currentTask >= len(self.schedule.tasks):
             # The schedule has run through completely.
             return SCHED_COMPLETE
-        
-        task = self.tasks[self.currentTask]
-            
+
+        task = self.schedule.tasks[self.currentTask]
+
         if self.__newTask:
-            task.startTask()
+            self.taskStartTime = globalClock.getFrameTime()
             self.__newTask = False
-            
-        run = task.runTask()
+            task.startTask(self.npc)
+
+        changes = self.__changes
+        run = task.runTask(self.npc)
         if run == SCHED_COMPLETE:
             # Task has completed
-            task.stopTask()
-            
+            task.stopTask(self.npc)
+
+            if changes != self.__changes:
+                # The task put us on another schedule, which has already been reset.
+                return SCHED_CONTINUE
+
             self.currentTask += 1
             self.__newTask = True
         elif run == SCHED_FAILED:
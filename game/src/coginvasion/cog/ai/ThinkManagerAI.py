@@ -0,0 +1,146 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file ThinkManagerAI.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+class NPCThinkData:
+
+    def __init__(self, npc, nextThinkTime):
+        self.npc = npc
+        self.nextThinkTime = nextThinkTime
+        self.lastThinkTime = None
+
+    def cleanup(self):
+        self.npc = None
+        self.nextThinkTime = None
+        self.lastThinkTime = None
+
+class ThinkManager:
+    """
+    Thinks every BaseNPCAI registered in a zone from a single task.
+
+    Instead of each NPC adding its own per-frame runAI task, the NPCs in a
+    zone register here and are thought in one pass. NPCs can think at a
+    lower rate than the server ticks (ai-think-rate, in thinks per second,
+    0 means every tick). Newly registered NPCs are spread across
+    ai-think-slots staggered slots so that their thinks don't all land on
+    the same frame.
+    """
+
+    notify = directNotify.newCategory("ThinkManager")
+
+    def __init__(self, zoneId, thinkRate = None, numSlots = None):
+        if thinkRate is None:
+            thinkRate = config.GetFloat('ai-think-rate', 0.0)
+        if numSlots is None:
+            numSlots = config.GetInt('ai-think-slots', 4)
+
+        self.zoneId = zoneId
+
+        # NPCs are keyed by id(), a NodePath's hash and equality
+        # change once it has been removed.
+        self.thinkOrder = []
+        self.thinkData = {}
+
+        self.thinkInterval = 0.0
+        self.numSlots = max(1, numSlots)
+        self.nextSlot = 0
+        self.setThinkRate(thinkRate)
+
+        self.task = None
+
+    def setThinkRate(self, thinkRate):
+        if thinkRate > 0:
+            self.thinkInterval = 1.0 / thinkRate
+        else:
+            self.thinkInterval = 0.0
+
+    def getThinkInterval(self):
+        return self.thinkInterval
+
+    def getNumNPCs(self):
+        return len(self.thinkOrder)
+
+    def hasNPC(self, npc):
+        return id(npc) in self.thinkData
+
+    def addNPC(self, npc):
+        key = id(npc)
+        if key in self.thinkData:
+            return
+
+        now = globalClock.getFrameTime()
+
+        # Put this NPC in the next think slot.
+        slot = self.nextSlot
+        self.nextSlot = (self.nextSlot + 1) % self.numSlots
+        nextThink = now + (self.thinkInterval * slot / self.numSlots)
+
+        self.thinkOrder.append(key)
+        self.thinkData[key] = NPCThinkData(npc, nextThink)
+
+        if not self.task:
+            self.start()
+
+    def removeNPC(self, npc):
+        key = id(npc)
+        data = self.thinkData.pop(key, None)
+        if not data:
+            return
+
+        data.cleanup()
+        self.thinkOrder.remove(key)
+
+        if len(self.thinkOrder) == 0:
+            self.stop()
+
+    def start(self):
+        self.stop()
+        self.task = taskMgr.add(self.__thinkTask, "ThinkManager.thinkTask-" + str(self.zoneId))
+
+    def stop(self):
+        if self.task:
+            self.task.remove()
+            self.task = None
+
+    def __thinkTask(self, task):
+        now = globalClock.getFrameTime()
+        interval = self.thinkInterval
+
+        # NPCs may stop thinking (or be deleted) while we are thinking others.
+        for key in list(self.thinkOrder):
+            data = self.thinkData.get(key)
+            if not data or now < data.nextThinkTime:
+                continue
+
+            if data.lastThinkTime is None:
+                data.npc.thinkDt = globalClock.getDt()
+            else:
+                data.npc.thinkDt = now - data.lastThinkTime
+            data.lastThinkTime = now
+
+            if interval > 0:
+                data.nextThinkTime += interval
+                if data.nextThinkTime <= now:
+                    # We fell behind, don't try to catch up.
+                    data.nextThinkTime = now + interval
+            else:
+                data.nextThinkTime = now
+
+            data.npc.runAI()
+
+        return task.cont
+
+    def cleanup(self):
+        self.stop()
+        for key in list(self.thinkOrder):
+            data = self.thinkData.get(key)
+            if data:
+                data.npc.stopAI()
+        self.thinkOrder = None
+        self.thinkData = None
@@ -11,42 +11,27 @@ Copyright (c) CIO Team. All rights reserved.
 from src.coginvasion.cog.ai.ScheduleResultsAI import *
 
 class BaseTaskAI:
+    """
+    Tasks are part of schedule templates, which are shared by every NPC of
+    the same class. A task must not keep any per-NPC state, the NPC running
+    the task is passed in and its ScheduleCursor keeps track of when the
+    task started.
+    """
 
-    def __init__(self, npc):
-        self.npc = npc
-        self.startTime = 0.0
-        self.running = False
+    def __init__(self):
+        pass
 
-    def isRunning(self):
-        return self.running
+    def getElapsedTime(self, npc):
+        return npc.getScheduleCursor().getTaskElapsedTime()
 
-    def getElapsedTime(self):
-        if not self.isRunning():
-            return 0.0
+    def startTask(self, npc):
+        pass
 
-        return globalClock.getFrameTime() - self.getStartTime()
-
-    def getStartTime(self):
-        return self.startTime
-
-    def startTask(self):
-        self.startTime = globalClock.getFrameTime()
-        self.running = True
-
-    def runTask(self):
+    def runTask(self, npc):
         return SCHED_COMPLETE
 
-    def stopTask(self):
-        self.running = False
-        self.startTime = 0.0
-
-    def setNPC(self, npc):
-        self.npc = npc
-
-    def getNPC(self):
-        return self.npc
+    def stopTask(self, npc):
+        pass
 
     def cleanup(self):
-        del self.npc
-        del self.startTime
-        del self.running
\ No newline at end of file
+        pass
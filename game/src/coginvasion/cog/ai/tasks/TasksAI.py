@@ -15,12 +15,12 @@ A Task is the smallest atomic action that can be performed by an NPC.
 
 class Task_SetActivity(BaseTaskAI):
 
-    def __init__(self, npc, activity):
-        BaseTaskAI.__init__(self, npc)
+    def __init__(self, activity):
+        BaseTaskAI.__init__(self)
         self.activity = activity
 
-    def runTask(self):
-        self.npc.b_setActivity(self.activity)
+    def runTask(self, npc):
+        npc.b_setActivity(self.activity)
         return SCHED_COMPLETE
 
     def cleanup(self):
@@ -29,8 +29,8 @@ class Task_SetActivity(BaseTaskAI):
 
 class Task_AwaitActivity(BaseTaskAI):
 
-    def runTask(self):
-        if self.npc.isDoingActivity():
+    def runTask(self, npc):
+        if npc.isDoingActivity():
             return SCHED_CONTINUE
 
         return SCHED_COMPLETE
@@ -38,15 +38,15 @@ class Task_AwaitActivity(BaseTaskAI):
 class Task_Wait(BaseTaskAI):
 
     def __init__(self, seconds):
-        BaseTaskAI.__init__(self, None)
+        BaseTaskAI.__init__(self)
         self.seconds = seconds
 
-    def runTask(self):
+    def runTask(self, npc):
         if self.seconds < 0:
             # indefinite wait
             return SCHED_CONTINUE
 
-        if self.getElapsedTime() >= self.seconds:
+        if self.getElapsedTime(npc) >= self.seconds:
             return SCHED_COMPLETE
         return SCHED_CONTINUE
 
@@ -55,46 +55,50 @@ class Task_Wait(BaseTaskAI):
         BaseTaskAI.cleanup(self)
 
 class Task_Func(BaseTaskAI):
-
-    def __init__(self, func, args = []):
-        BaseTaskAI.__init__(self, None)
-        self.func = func
+    """
+    Calls a method of the NPC running the task.
+    The method is given by name so the task can be shared by all NPCs.
+    """
+
+    def __init__(self, funcName, args = []):
+        BaseTaskAI.__init__(self)
+        self.funcName = funcName
         self.args = args
 
-    def runTask(self):
-        self.func(*self.args)
+    def runTask(self, npc):
+        getattr(npc, self.funcName)(*self.args)
         return SCHED_COMPLETE
 
     def cleanup(self):
-        del self.func
+        del self.funcName
         del self.args
         BaseTaskAI.cleanup(self)
 
 class Task_EquipAttack(BaseTaskAI):
 
-    def runTask(self):
-        if len(self.npc.capableAttacks) == 0:
+    def runTask(self, npc):
+        if len(npc.capableAttacks) == 0:
             return SCHED_FAILED
 
-        attackID = random.choice(self.npc.capableAttacks)
-        if attackID != self.npc.getEquippedAttack():
-            self.npc.b_setEquippedAttack(attackID)
+        attackID = random.choice(npc.capableAttacks)
+        if attackID != npc.getEquippedAttack():
+            npc.b_setEquippedAttack(attackID)
         return SCHED_COMPLETE
 
 class Task_StopAttack(BaseTaskAI):
 
-    def runTask(self):
-        if self.npc.getEquippedAttack() != -1:
-            self.npc.b_setEquippedAttack(-1)
+    def runTask(self, npc):
+        if npc.getEquippedAttack() != -1:
+            npc.b_setEquippedAttack(-1)
         return SCHED_COMPLETE
         
 class Task_SpeakAttack(BaseTaskAI):
     
-    def runTask(self):
-        if self.npc.getEquippedAttack() == -1:
+    def runTask(self, npc):
+        if npc.getEquippedAttack() == -1:
             return SCHED_FAILED
             
-        attack = self.npc.attacks[self.npc.getEquippedAttack()]
+        attack = npc.attacks[npc.getEquippedAttack()]
         phrases = attack.getTauntPhrases()
         chance = attack.getTauntChance()
         
@@ -103,36 +107,36 @@ class Task_SpeakAttack(BaseTaskAI):
             
         if random.random() <= chance:
             phrase = random.choice(phrases)
-            self.npc.d_setChat(phrase)
+            npc.d_setChat(phrase)
             
         return SCHED_COMPLETE
 
 class Task_FireAttack(BaseTaskAI):
 
-    def runTask(self):
-        if self.npc.getEquippedAttack() == -1:
+    def runTask(self, npc):
+        if npc.getEquippedAttack() == -1:
             return SCHED_FAILED
-        if self.npc.target is None:
+        if npc.target is None:
             return SCHED_FAILED
 
-        self.npc.attacks[self.npc.getEquippedAttack()].npcUseAttack(self.npc.target.entity)
+        npc.attacks[npc.getEquippedAttack()].npcUseAttack(npc.target.entity)
 
         return SCHED_COMPLETE
 
 class Task_FaceTarget(BaseTaskAI):
 
-    def runTask(self):
-        if not self.npc.target:
+    def runTask(self, npc):
+        if not npc.target:
             #print "fail: no target"
             return SCHED_FAILED
 
         # Determine a yaw to look at the target and move that way
-        self.npc.makeIdealYaw(self.npc.target.lastKnownPosition)
-        self.npc.changeYaw()
+        npc.makeIdealYaw(npc.target.lastKnownPosition)
+        npc.changeYaw()
 
-        #print "Ideal is", self.npc.idealYaw
+        #print "Ideal is", npc.idealYaw
 
-        if self.npc.isFacingIdeal():
+        if npc.isFacingIdeal():
             #print "complete: facing ideal"
             return SCHED_COMPLETE
 
@@ -140,67 +144,93 @@ class Task_FaceTarget(BaseTaskAI):
 
 class Task_FaceIdeal(BaseTaskAI):
 
-    def runTask(self):
+    def runTask(self, npc):
 
-        if self.npc.isFacingIdeal():
+        if npc.isFacingIdeal():
             return SCHED_COMPLETE
         
-        # Simply turn towards whatever self.npc.idealYaw is
-        self.npc.changeYaw()
+        # Simply turn towards whatever npc.idealYaw is
+        npc.changeYaw()
 
         return SCHED_CONTINUE
 
-class Task_GetPathToTarget(BaseTaskAI):
-
-    def runTask(self):
-        if not self.npc.target:
+class Task_GetPath(BaseTaskAI):
+    """
+    Base of the tasks that path the NPC somewhere. The path is requested
+    from the battle zone's planner when the task starts, the NPC keeps
+    following its previous path until the new one has been planned.
+    """
+
+    def getGoal(self, npc):
+        return None
+
+    def startTask(self, npc):
+        npc.cancelPathRequest()
+        goal = self.getGoal(npc)
+        if goal is not None:
+            npc.pathRequest = npc.getBattleZone().requestPath(npc.getPos(), goal)
+
+    def runTask(self, npc):
+        request = npc.pathRequest
+        if not request:
             return SCHED_FAILED
+        if not request.isDone():
+            return SCHED_CONTINUE
 
-        path = self.npc.getBattleZone().planPath(self.npc.getPos(), self.npc.target.lastKnownPosition)
+        npc.pathRequest = None
+        path = request.getPath()
         if len(path) < 2:
             return SCHED_FAILED
 
-        self.npc.getMotor().setWaypoints(path)
+        # We may have moved along our old path while this one was planned.
+        npc.getMotor().setWaypoints([npc.getPos()] + path[1:])
         return SCHED_COMPLETE
 
+class Task_GetPathToTarget(Task_GetPath):
+
+    def getGoal(self, npc):
+        if not npc.target:
+            return None
+        return npc.target.lastKnownPosition
+
 class Task_RunPath(BaseTaskAI):
 
-    def runTask(self):
-        self.npc.getMotor().startMotor()
+    def runTask(self, npc):
+        npc.getMotor().startMotor()
         return SCHED_COMPLETE
 
 class Task_ClearPath(BaseTaskAI):
 
-    def runTask(self):
-        self.npc.getMotor().clearWaypoints()
+    def runTask(self, npc):
+        npc.getMotor().clearWaypoints()
         return SCHED_COMPLETE
 
 class Task_StopMoving(BaseTaskAI):
 
-    def runTask(self):
-        self.npc.getMotor().stopMotor()
+    def runTask(self, npc):
+        npc.getMotor().stopMotor()
         return SCHED_COMPLETE
 
 class Task_AwaitMovement(BaseTaskAI):
     
-    def __init__(self, npc, watchTarget = False, changeYaw = True):
-        BaseTaskAI.__init__(self, npc)
+    def __init__(self, watchTarget = False, changeYaw = True):
+        BaseTaskAI.__init__(self)
         self.watchTarget = watchTarget
         self.changeYaw = changeYaw
 
-    def runTask(self):
-        if len(self.npc.getMotor().getWaypoints()) == 0:
-            self.npc.getMotor().stopMotor()
+    def runTask(self, npc):
+        if len(npc.getMotor().getWaypoints()) == 0:
+            npc.getMotor().stopMotor()
             return SCHED_COMPLETE
         
         if self.watchTarget:
-            if self.npc.hasConditions(COND_SEE_TARGET) and self.npc.target:
-                if CIGlobals.isNodePathOk(self.npc.target.entity):
-                    self.npc.makeIdealYaw(self.npc.target.entity.getPos())
+            if npc.hasConditions(COND_SEE_TARGET) and npc.target:
+                if CIGlobals.isNodePathOk(npc.target.entity):
+                    npc.makeIdealYaw(npc.target.entity.getPos())
                 
         if self.changeYaw:
             # Continue looking in our ideal direction
-            self.npc.changeYaw()
+            npc.changeYaw()
 
         return SCHED_CONTINUE
         
@@ -211,19 +241,19 @@ class Task_AwaitMovement(BaseTaskAI):
 
 class Task_FindCoverFromTarget(BaseTaskAI):
 
-    def runTask(self):
-        if self.npc.target:
-            coverFrom = self.npc.target.entity
+    def runTask(self, npc):
+        if npc.target:
+            coverFrom = npc.target.entity
         else:
-            coverFrom = self.npc
+            coverFrom = npc
 
         threatPos = coverFrom.getPos()
         viewOffset = coverFrom.getEyePosition()
 
-        if self.npc.findLateralCover(threatPos, viewOffset):
+        if npc.findLateralCover(threatPos, viewOffset):
             # Try lateral first
             return SCHED_COMPLETE
-        elif self.npc.findCover(threatPos, viewOffset, 0, self.npc.getCoverRadius()):
+        elif npc.findCover(threatPos, viewOffset, 0, npc.getCoverRadius()):
             # Then try for plain cover
             return SCHED_COMPLETE
 
@@ -233,19 +263,19 @@ class Task_FindCoverFromTarget(BaseTaskAI):
 
 class Task_FindCoverFromOrigin(BaseTaskAI):
 
-    def runTask(self):
-        if self.npc.findCover(self.npc.getPos(), self.npc.getEyePosition(), 0, self.npc.getCoverRadius()):
+    def runTask(self, npc):
+        if npc.findCover(npc.getPos(), npc.getEyePosition(), 0, npc.getCoverRadius()):
             return SCHED_COMPLETE
         return SCHED_FAILED
 
 class Task_Remember(BaseTaskAI):
 
-    def __init__(self, npc, bits):
-        BaseTaskAI.__init__(self, npc)
+    def __init__(self, bits):
+        BaseTaskAI.__init__(self)
         self.bits = bits
 
-    def runTask(self):
-        self.npc.remember(self.bits)
+    def runTask(self, npc):
+        npc.remember(self.bits)
         return SCHED_COMPLETE
 
     def cleanup(self):
@@ -254,12 +284,12 @@ class Task_Remember(BaseTaskAI):
 
 class Task_Forget(BaseTaskAI):
 
-    def __init__(self, npc, bits):
-        BaseTaskAI.__init__(self, npc)
+    def __init__(self, bits):
+        BaseTaskAI.__init__(self)
         self.bits = bits
 
-    def runTask(self):
-        self.npc.forget(self.bits)
+    def runTask(self, npc):
+        npc.forget(self.bits)
         return SCHED_COMPLETE
 
     def cleanup(self):
@@ -268,23 +298,23 @@ class Task_Forget(BaseTaskAI):
 
 class Task_AwaitAttack(BaseTaskAI):
 
-    def runTask(self):
-        if self.npc.getEquippedAttack() == -1 or self.npc.attacks[self.npc.getEquippedAttack()].getAction() == 0:
+    def runTask(self, npc):
+        if npc.getEquippedAttack() == -1 or npc.attacks[npc.getEquippedAttack()].getAction() == 0:
             return SCHED_COMPLETE
         return SCHED_CONTINUE
         
 class Task_SetSchedule(BaseTaskAI):
     
-    def __init__(self, npc, schedName):
-        BaseTaskAI.__init__(self, npc)
+    def __init__(self, schedName):
+        BaseTaskAI.__init__(self)
         self.schedName = schedName
     
-    def runTask(self):
-        sched = self.npc.getScheduleByName(self.schedName)
+    def runTask(self, npc):
+        sched = npc.getScheduleByName(self.schedName)
         if not sched:
             return SCHED_FAILED
             
-        self.npc.changeSchedule(sched)
+        npc.changeSchedule(sched)
         return SCHED_COMPLETE
         
     def cleanup(self):
@@ -293,67 +323,59 @@ class Task_SetSchedule(BaseTaskAI):
         
 class Task_RestartLastSchedule(BaseTaskAI):
     
-    def runTask(self):
-        if self.npc.lastSchedule is None:
+    def runTask(self, npc):
+        if npc.lastSchedule is None:
             return SCHED_FAILED
             
-        self.npc.changeSchedule(self.npc.lastSchedule)
+        npc.changeSchedule(npc.lastSchedule)
         return SCHED_COMPLETE
         
 class Task_RememberPosition(BaseTaskAI):
     
-    def runTask(self):
-        self.npc.memoryPosition = self.npc.getPos()
+    def runTask(self, npc):
+        npc.memoryPosition = npc.getPos()
         return SCHED_COMPLETE
         
 class Task_ForgetPosition(BaseTaskAI):
     
-    def runTask(self):
-        self.npc.memoryPosition = None
+    def runTask(self, npc):
+        npc.memoryPosition = None
         return SCHED_COMPLETE
         
-class Task_GetPathToMemoryPosition(BaseTaskAI):
+class Task_GetPathToMemoryPosition(Task_GetPath):
     
-    def runTask(self):
-        if not self.npc.memoryPosition:
-            return SCHED_FAILED
-            
-        path = self.npc.getBattleZone().planPath(self.npc.getPos(), self.npc.memoryPosition)
-        if len(path) < 2:
-            return SCHED_FAILED
-
-        self.npc.getMotor().setWaypoints(path)
-        return SCHED_COMPLETE
+    def getGoal(self, npc):
+        return npc.memoryPosition
 
 class Task_SetPostAttackSchedule(BaseTaskAI):
 
-    def runTask(self):
-        if self.npc.getEquippedAttack() == -1:
+    def runTask(self, npc):
+        if npc.getEquippedAttack() == -1:
             return SCHED_FAILED
-        schedName = self.npc.attacks[self.npc.getEquippedAttack()].getPostAttackSchedule()
+        schedName = npc.attacks[npc.getEquippedAttack()].getPostAttackSchedule()
         if not schedName:
             return SCHED_FAILED
-        sched = self.npc.getScheduleByName(schedName)
+        sched = npc.getScheduleByName(schedName)
         if not sched:
             return SCHED_FAILED
-        self.npc.changeSchedule(sched)
+        npc.changeSchedule(sched)
         return SCHED_COMPLETE
 
 class Task_Speak(BaseTaskAI):
 
-    def __init__(self, npc, chance, phrases):
-        BaseTaskAI.__init__(self, npc)
+    def __init__(self, chance, phrases):
+        BaseTaskAI.__init__(self)
         self.chance = chance
         self.phrases = phrases
 
-    def runTask(self):
+    def runTask(self, npc):
         chance = random.random()
         if chance <= self.chance:
             if isinstance(self.phrases, list):
                 phrase = random.choice(self.phrases)
             else:
                 phrase = self.phrases
-            self.npc.d_setChat(phrase)
+            npc.d_setChat(phrase)
         return SCHED_COMPLETE
 
     def cleanup(self):
@@ -361,19 +383,19 @@ class Task_Speak(BaseTaskAI):
         del self.phrases
         BaseTaskAI.cleanup(self)
         
-class Task_GetPathYieldToFriend(BaseTaskAI):
+class Task_GetPathYieldToFriend(Task_GetPath):
     
-    def runTask(self):
+    def getGoal(self, npc):
         moveVector = Vec3()
-        currPos = self.npc.getPos()
-        for i in xrange(len(self.npc.avatarsInSight)):
-            av = self.npc.avatarsInSight[i]
-            if self.npc.getRelationshipTo(av) != RELATIONSHIP_FRIEND:
+        currPos = npc.getPos()
+        for i in xrange(len(npc.avatarsInSight)):
+            av = npc.avatarsInSight[i]
+            if npc.getRelationshipTo(av) != RELATIONSHIP_FRIEND:
                 continue
             otherPos = av.getPos()
             moveAway = currPos - otherPos
             
-            if moveAway.length() > self.npc.getYieldDistance():
+            if moveAway.length() > npc.getYieldDistance():
                 continue
             moveMag = 1.0 / max(moveAway.lengthSquared(), 0.1)
             moveAway.normalize()
@@ -382,17 +404,10 @@ class Task_GetPathYieldToFriend(BaseTaskAI):
             moveVector += moveAway
 
         moveVector.normalize()
-        newPos = currPos + (moveVector * self.npc.getYieldDistance())
-        
-        path = self.npc.getBattleZone().planPath(currPos, newPos)
-        if len(path) < 2:
-            return SCHED_FAILED
-
-        self.npc.getMotor().setWaypoints(path)
-        return SCHED_COMPLETE
+        return currPos + (moveVector * npc.getYieldDistance())
 
-def task_oneOff(task):
-    task.startTask()
-    task.runTask()
-    task.stopTask()
+def task_oneOff(task, npc):
+    task.startTask(npc)
+    task.runTask(npc)
+    task.stopTask(npc)
     task.cleanup()
@@ -3,7 +3,7 @@ from panda3d.bullet import BulletCylinderShape, BulletSphereShape, BulletRigidBo
 
 from src.coginvasion.attack.Attacks import ATTACK_BOMB
 from src.coginvasion.attack.TakeDamageInfo import TakeDamageInfo
-from src.coginvasion.globals import CIGlobals
+from src.coginvasion.battle.HitResolverAI import getAvatarsInRadius
 from src.coginvasion.phys.DistributedPhysicsEntityAI import DistributedPhysicsEntityAI
 
 class BombProjectileAI(DistributedPhysicsEntityAI):
@@ -41,12 +41,10 @@ class BombProjectileAI(DistributedPhysicsEntityAI):
     def __explodeTask(self, task):
         self.sendUpdate('explode')
 
-        for obj in self.air.avatars[self.zoneId]:
-            if CIGlobals.isAvatar(obj) and self.attack.canDamage(obj):
-                dist = obj.getDistance(self)
-                if dist <= 10.0:
-                    info = TakeDamageInfo(self.avatar, ATTACK_BOMB, self.attack.calcDamage(dist), self.getPos())
-                    obj.takeDamage(info)
+        for obj, dist in getAvatarsInRadius(self.zoneId, self.getPos(render), 10.0):
+            if self.attack.canDamage(obj):
+                info = TakeDamageInfo(self.avatar, ATTACK_BOMB, self.attack.calcDamage(dist), self.getPos())
+                obj.takeDamage(info)
 
         self.requestDelete()
         return task.done
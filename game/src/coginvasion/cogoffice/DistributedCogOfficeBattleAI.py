@@ -62,6 +62,9 @@ class DistributedCogOfficeBattleAI(DistributedBattleZoneAI):
         self.currentFloor = 0
         self.tauntSuitId = 0
         self.currentRoom = ""
+        # The room of the next floor, picked when the current floor is cleared
+        # so that its level can be prefetched during the intermission.
+        self.nextRoom = None
         self.readyAvatars = []
         self.elevators = [None, None]
         self.entranceElevator = None
@@ -205,11 +208,23 @@ class DistributedCogOfficeBattleAI(DistributedBattleZoneAI):
         if self.elevators[0]:
             self.elevators[0].b_setState('closed')
         self.readyAvatars = []
-        
-    def pickAndStartFloor(self, floorIdx):
-        """Picks and starts the next floor,
-        or the floor index specified."""
-            
+
+        self.prefetchNextFloor()
+
+    def prefetchNextFloor(self):
+        """Picks the room of the next floor and starts loading
+        its level in the background while everyone gets ready."""
+
+        nextFloor = self.currentFloor + 1
+        if nextFloor >= self.numFloors:
+            return
+
+        self.nextRoom = self.pickRoom(nextFloor)
+        self.prefetchBSPLevel(self.MapFormatString.format(self.nextRoom))
+
+    def pickRoom(self, floorIdx):
+        """Picks the room to use for the floor index specified."""
+
         floors = numFloors2roomsVisited[self.numFloors]
         newFloor = floors[floorIdx]
         if newFloor == RANDOM_FLOOR:
@@ -229,7 +244,19 @@ class DistributedCogOfficeBattleAI(DistributedBattleZoneAI):
             else:
                 newFloor = random.choice(choices)
         self.notify.debug('Chose floor: ' + newFloor)
-        self.startFloor(floorIdx, newFloor)
+        return newFloor
+
+    def pickAndStartFloor(self, floorIdx):
+        """Picks and starts the next floor,
+        or the floor index specified."""
+
+        if floorIdx == self.currentFloor + 1 and self.nextRoom:
+            # We already picked this one during the intermission.
+            room = self.nextRoom
+        else:
+            room = self.pickRoom(floorIdx)
+        self.nextRoom = None
+        self.startFloor(floorIdx, room)
 
     def readyForNextFloor(self):
         avId = self.air.getAvatarIdFromSender()
@@ -264,20 +291,20 @@ class DistributedCogOfficeBattleAI(DistributedBattleZoneAI):
     def getCurrentFloor(self):
         return self.currentFloor
 
-    def generate(self):
-        DistributedBattleZoneAI.generate(self)
+    def linkServerEntities(self, bspLoader):
+        DistributedBattleZoneAI.linkServerEntities(self, bspLoader)
 
         import AIEntities
         from src.coginvasion.szboss import (InfoTimer, DistributedFuncDoorAI, DistributedTriggerAI)
         from src.coginvasion.battle import (DistributedHPBarrelAI, DistributedGagBarrelAI)
-        self.bspLoader.linkServerEntityToClass("cogoffice_suitspawn",       AIEntities.SuitSpawn)
-        self.bspLoader.linkServerEntityToClass("cogoffice_hangoutpoint",    AIEntities.SuitHangout)
-        self.bspLoader.linkServerEntityToClass("cogoffice_elevator",        DistributedCogOfficeElevatorAI)
-        self.bspLoader.linkServerEntityToClass("info_timer",                InfoTimer.InfoTimer)
-        self.bspLoader.linkServerEntityToClass("func_door",                 DistributedFuncDoorAI.DistributedFuncDoorAI)
-        self.bspLoader.linkServerEntityToClass("info_cogoffice_floor",      AIEntities.InfoCogOfficeFloor)
-        self.bspLoader.linkServerEntityToClass("item_gagbarrel",            DistributedGagBarrelAI.DistributedGagBarrelAI)
-        self.bspLoader.linkServerEntityToClass("item_laffbarrel",           DistributedHPBarrelAI.DistributedHPBarrelAI)
+        bspLoader.linkServerEntityToClass("cogoffice_suitspawn",       AIEntities.SuitSpawn)
+        bspLoader.linkServerEntityToClass("cogoffice_hangoutpoint",    AIEntities.SuitHangout)
+        bspLoader.linkServerEntityToClass("cogoffice_elevator",        DistributedCogOfficeElevatorAI)
+        bspLoader.linkServerEntityToClass("info_timer",                InfoTimer.InfoTimer)
+        bspLoader.linkServerEntityToClass("func_door",                 DistributedFuncDoorAI.DistributedFuncDoorAI)
+        bspLoader.linkServerEntityToClass("info_cogoffice_floor",      AIEntities.InfoCogOfficeFloor)
+        bspLoader.linkServerEntityToClass("item_gagbarrel",            DistributedGagBarrelAI.DistributedGagBarrelAI)
+        bspLoader.linkServerEntityToClass("item_laffbarrel",           DistributedHPBarrelAI.DistributedHPBarrelAI)
 
     def cleanupGuardSuits(self):
         for suit in self.guardSuits:
@@ -290,6 +317,8 @@ class DistributedCogOfficeBattleAI(DistributedBattleZoneAI):
     def resetEverything(self):
         DistributedBattleZoneAI.resetStats(self)
         self.currentFloor = 0
+        self.nextRoom = None
+        self.cancelPrefetch()
         self.toonId2suitsTargeting = {}
         self.spotTaken2suitId = {}
         self.cleanupGuardSuits()
@@ -307,6 +336,7 @@ class DistributedCogOfficeBattleAI(DistributedBattleZoneAI):
         self.fsm = None
         self.infoEntity = None
         self.currentFloor = None
+        self.nextRoom = None
         self.toonId2suitsTargeting = None
         self.spotTaken2suitId = None
         self.cleanupGuardSuits()
@@ -16,11 +16,11 @@ class DistributedDeathmatchBattleAI(DistributedBattleZoneAI):
     def makeGameRules(self):
         return DeathmatchRulesAI(self)
 
-    def generate(self):
-        DistributedBattleZoneAI.generate(self)
+    def linkServerEntities(self, bspLoader):
+        DistributedBattleZoneAI.linkServerEntities(self, bspLoader)
         
         from src.coginvasion.deathmatch.DistributedGagPickupAI import DistributedGagPickupAI
-        self.bspLoader.linkServerEntityToClass("gag_pickup", DistributedGagPickupAI)
+        bspLoader.linkServerEntityToClass("gag_pickup", DistributedGagPickupAI)
         
     def handleAvatarLeave(self, avatar, reason):
         DistributedBattleZoneAI.handleAvatarLeave(self, avatar, reason)
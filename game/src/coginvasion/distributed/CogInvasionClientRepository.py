@@ -51,6 +51,7 @@ from CogInvasionDoGlobals import DO_ID_NAME_SERVICES_MANAGER, DO_ID_UNIQUE_INTER
 from CogInvasionDoGlobals import DO_ID_STATS_MANAGER
 
 from CogInvasionErrorCodes import ErrorCode2ErrorMsg, UnknownErrorMsg
+from DoIndex import DoIndex
 
 import os, sys
 import random
@@ -72,6 +73,8 @@ class CogInvasionClientRepository(AstronClientRepository):
 
     def __init__(self, serverVersion):
         self.serverVersion = serverVersion
+        # Which zone every object is in, and the objects of every class.
+        self.doIndex = DoIndex()
         AstronClientRepository.__init__(self, ['phase_3/etc/direct.dc', 'phase_3/etc/toon.dc'])
         self.loginFSM = ClassicFSM('login', [State('off', self.enterOff, self.exitOff),
                     State('connect', self.enterConnect, self.exitConnect),
@@ -232,6 +235,8 @@ class CogInvasionClientRepository(AstronClientRepository):
             obj = self.doId2do[doId]
             # Remove it from the dictionary
             del self.doId2do[doId]
+            # And from the index, even if its delete is delayed.
+            self.doIndex.removeObject(obj)
             # Disable, announce, and delete the object itself...
             # unless delayDelete is on...
             obj.deleteOrDelay()
@@ -284,16 +289,36 @@ class CogInvasionClientRepository(AstronClientRepository):
     def showPlayerIds(self):
         print "Showing player ids..."
         self.isShowingPlayerIds = True
-        for av in self.doId2do.values():
-            if av.__class__.__name__ in ["DistributedPlayerToon", "LocalToon", "DistributedSuit"]:
-                av.showAvId()
+        for av in self.getObjectsOfClass(["DistributedPlayerToon", "LocalToon", "DistributedSuit"]):
+            av.showAvId()
 
     def hidePlayerIds(self):
         print "Hiding player ids..."
         self.isShowingPlayerIds = False
-        for av in self.doId2do.values():
-            if av.__class__.__name__ in ["DistributedPlayerToon", "LocalToon", 'DistributedSuit']:
-                av.showName()
+        for av in self.getObjectsOfClass(["DistributedPlayerToon", "LocalToon", "DistributedSuit"]):
+            av.showName()
+
+    def storeObjectLocation(self, object, parentId, zoneId):
+        AstronClientRepository.storeObjectLocation(self, object, parentId, zoneId)
+        if object.zoneId is None:
+            self.doIndex.removeObject(object)
+        else:
+            self.doIndex.storeObject(object, object.zoneId)
+
+    def deleteObjectLocation(self, object, parentId, zoneId):
+        AstronClientRepository.deleteObjectLocation(self, object, parentId, zoneId)
+        self.doIndex.removeObject(object)
+
+    def getObjectsInZone(self, zoneId, classNames):
+        """Returns the objects in `zoneId` whose class name is in `classNames`."""
+        return self.doIndex.getObjectsInZone(zoneId, classNames)
+
+    def getObjectsOfClass(self, classNames):
+        """Returns the objects we can see whose class name is in `classNames`."""
+        return self.doIndex.getObjectsOfClass(classNames)
+
+    def getSuitsInZone(self, zoneId):
+        return self.doIndex.getObjectsInZone(zoneId, CIGlobals.SuitClasses)
 
     def sendSetLocation(self, doId, parentId, zoneId):
         dg = PyDatagram()
@@ -0,0 +1,103 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file DoIndex.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+class DoIndex:
+    """
+    Keeps track of the distributed objects of every class, and which zone
+    each of them is in, so looking for objects doesn't mean scanning all of
+    doId2do.
+
+    Objects are indexed by their class name, the same names the rest of the
+    code compares against (e.g. CIGlobals.SuitClasses). The repository keeps
+    the index up to date as objects get a location, change zones and are
+    deleted. Objects without a location aren't indexed.
+    """
+
+    notify = directNotify.newCategory("DoIndex")
+
+    def __init__(self):
+        # zoneId -> className -> {doId: object}
+        self.zone2objects = {}
+        # className -> {doId: object}
+        self.class2objects = {}
+        # doId -> (zoneId, className)
+        self.entries = {}
+
+    def storeObject(self, obj, zoneId):
+        """Indexes `obj` in `zoneId`, or moves it there if it's already indexed."""
+
+        doId = obj.doId
+        className = obj.__class__.__name__
+        if self.entries.get(doId) == (zoneId, className) and self.class2objects[className][doId] is obj:
+            return
+
+        if doId in self.entries:
+            self.__remove(doId)
+
+        self.entries[doId] = (zoneId, className)
+        self.class2objects.setdefault(className, {})[doId] = obj
+        self.zone2objects.setdefault(zoneId, {}).setdefault(className, {})[doId] = obj
+
+    def removeObject(self, obj):
+        doId = obj.doId
+        entry = self.entries.get(doId)
+        if not entry:
+            return
+
+        if self.class2objects[entry[1]][doId] is not obj:
+            # Something else has this doId now.
+            return
+
+        self.__remove(doId)
+
+    def __remove(self, doId):
+        zoneId, className = self.entries.pop(doId)
+
+        objects = self.class2objects[className]
+        del objects[doId]
+        if len(objects) == 0:
+            del self.class2objects[className]
+
+        class2objects = self.zone2objects[zoneId]
+        objects = class2objects[className]
+        del objects[doId]
+        if len(objects) == 0:
+            del class2objects[className]
+            if len(class2objects) == 0:
+                del self.zone2objects[zoneId]
+
+    def getObjectsInZone(self, zoneId, classNames):
+        """Returns the objects in `zoneId` whose class is in `classNames`."""
+
+        class2objects = self.zone2objects.get(zoneId)
+        if not class2objects:
+            return []
+
+        result = []
+        for className in classNames:
+            objects = class2objects.get(className)
+            if objects:
+                result.extend(objects.values())
+        return result
+
+    def getObjectsOfClass(self, classNames):
+        """Returns the objects in any zone whose class is in `classNames`."""
+
+        result = []
+        for className in classNames:
+            objects = self.class2objects.get(className)
+            if objects:
+                result.extend(objects.values())
+        return result
+
+    def cleanup(self):
+        self.zone2objects = {}
+        self.class2objects = {}
+        self.entries = {}
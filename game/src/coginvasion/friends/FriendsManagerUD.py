@@ -13,6 +13,14 @@ from direct.distributed.DistributedObjectGlobalUD import DistributedObjectGlobal
 
 from src.coginvasion.hood import ZoneUtil
 
+class OnlineToon:
+    """What we know about a toon while it is being played."""
+
+    def __init__(self, name, friendsList, accessLevel):
+        self.name = name
+        self.friendsList = list(friendsList)
+        self.accessLevel = accessLevel
+
 class RequestFriendsListProcess:
     notify = directNotify.newCategory('RequestFriendsListProcess')
 
@@ -20,102 +28,136 @@ class RequestFriendsListProcess:
         self.csm = csm
         self.air = air
         self.sender = sender
-        self.realFriendsList = [[], [], [], []]
         self.avatarFriendsList = []
-        self.friendIndex = 0
-        self.senderDclass = None
-
-        self.air.dbInterface.queryObject(
-            self.air.dbId,
-            sender,
-            self.senderRetrieved
-        )
+        # friendId -> (name, accessLevel)
+        self.friendInfo = {}
+        self.deletedFriends = []
+        self.numPending = 0
+        self.senderDclass = self.air.dclassesByName['DistributedPlayerToonUD']
+
+        onlineToon = self.csm.toonsOnline.get(sender)
+        if onlineToon:
+            # We keep the friends lists of online toons up to date.
+            self.gotFriendsList(onlineToon.friendsList)
+        else:
+            self.air.dbInterface.queryObject(
+                self.air.dbId,
+                sender,
+                self.senderRetrieved
+            )
 
-    def __updatedFriendsListDeletedToonDone(self, foo = None):
-        self.csm.requestFriendsList(self.sender)
-        self.cleanup()
-
-    def friendRetrieved(self, dclass, fields):
+    def senderRetrieved(self, dclass, fields):
         if dclass != self.air.dclassesByName['DistributedPlayerToonUD']:
-            self.notify.warning("Toon on friends list was deleted.")
-            self.avatarFriendsList.remove(self.avatarFriendsList[self.friendIndex])
-            dg = self.senderDclass.aiFormatUpdate('setFriendsList', self.sender, self.sender, self.air.ourChannel, [self.avatarFriendsList])
-            self.air.send(dg)
-            self.air.dbInterface.updateObject(self.air.dbId, self.sender, self.senderDclass, {'setFriendsList': [self.avatarFriendsList]}, callback = self.__updatedFriendsListDeletedToonDone)
+            self.notify.warning("Queried a non toon object?!")
+            self.cleanup()
             return
 
-        name = fields['setName'][0]
-        accessLevel = fields['setAccessLevel'][0]
-        avatarId = self.avatarFriendsList[self.friendIndex]
-        self.realFriendsList[0].append(avatarId)
-        self.realFriendsList[1].append(name)
-        isOnline = int(avatarId in self.csm.toonsOnline)
-        self.realFriendsList[2].append(isOnline)
-        self.realFriendsList[3].append(accessLevel)
-        if self.friendIndex >= len(self.avatarFriendsList) - 1:
-            # Done, send it out
-            self.csm.sendUpdateToAvatarId(self.sender, 'friendsList', self.realFriendsList)
+        self.gotFriendsList(fields['setFriendsList'][0])
+
+    def gotFriendsList(self, friendsList):
+        self.avatarFriendsList = list(friendsList)
+
+        if len(self.avatarFriendsList) == 0:
+            self.csm.sendUpdateToAvatarId(self.sender, 'friendsList', [[], [], [], []])
             self.cleanup()
             return
-        self.friendIndex += 1
-
-        self.air.dbInterface.queryObject(
-            self.air.dbId,
-            self.avatarFriendsList[self.friendIndex],
-            self.friendRetrieved
-        )
 
-    def senderRetrieved(self, dclass, fields):
-        if dclass != self.air.dclassesByName['DistributedPlayerToonUD']:
-            self.notify.warning("Queried a non toon object?!")
+        # Ask for every friend at once. Online friends are answered from
+        # what we know about them, offline ones from the avatar summary cache.
+        friendIds = set(self.avatarFriendsList)
+        self.numPending = len(friendIds)
+        for friendId in friendIds:
+            onlineToon = self.csm.toonsOnline.get(friendId)
+            if onlineToon:
+                self.friendRetrieved(friendId, onlineToon.name, onlineToon.accessLevel)
+            else:
+                self.air.avatarSummaryCache.querySummary(friendId, lambda summary, friendId = friendId:
+                                                         self.summaryRetrieved(friendId, summary))
+
+    def summaryRetrieved(self, friendId, summary):
+        if summary is None:
+            self.notify.warning("Toon on friends list was deleted.")
+            self.deletedFriends.append(friendId)
+            self.friendRetrieved(friendId, None, None)
             return
 
-        self.senderDclass = dclass
+        self.friendRetrieved(friendId, summary.name, summary.accessLevel)
 
-        self.avatarFriendsList = fields['setFriendsList'][0]
+    def friendRetrieved(self, friendId, name, accessLevel):
+        if name is not None:
+            self.friendInfo[friendId] = (name, accessLevel)
 
-        if len(self.avatarFriendsList) == 0:
-            self.csm.sendUpdateToAvatarId(self.sender, 'friendsList', [[], [], [], []])
+        self.numPending -= 1
+        if self.numPending > 0:
             return
 
-        self.air.dbInterface.queryObject(
-            self.air.dbId,
-            self.avatarFriendsList[self.friendIndex],
-            self.friendRetrieved
-        )
+        if len(self.deletedFriends) > 0:
+            self.avatarFriendsList = [avId for avId in self.avatarFriendsList if not avId in self.deletedFriends]
+            dg = self.senderDclass.aiFormatUpdate('setFriendsList', self.sender, self.sender, self.air.ourChannel, [self.avatarFriendsList])
+            self.air.send(dg)
+            self.air.dbInterface.updateObject(self.air.dbId, self.sender, self.senderDclass, {'setFriendsList': [self.avatarFriendsList]})
+            self.csm.updateOnlineFriendsList(self.sender, self.avatarFriendsList)
+
+        # Done, send it out in the order of their friends list.
+        realFriendsList = [[], [], [], []]
+        for avatarId in self.avatarFriendsList:
+            name, accessLevel = self.friendInfo[avatarId]
+            realFriendsList[0].append(avatarId)
+            realFriendsList[1].append(name)
+            realFriendsList[2].append(int(avatarId in self.csm.toonsOnline))
+            realFriendsList[3].append(accessLevel)
+        self.csm.sendUpdateToAvatarId(self.sender, 'friendsList', realFriendsList)
+        self.cleanup()
 
     def cleanup(self):
-        del self.air
-        del self.csm
-        del self.sender
-        del self.realFriendsList
-        del self.avatarFriendsList
-        del self.friendIndex
-        del self.senderDclass
+        self.air = None
+        self.csm = None
+        self.friendInfo = None
+        self.deletedFriends = None
+        self.avatarFriendsList = None
+        self.senderDclass = None
 
 class FriendsManagerUD(DistributedObjectGlobalUD):
     notify = directNotify.newCategory("FriendsManagerUD")
 
     def __init__(self, air):
         DistributedObjectGlobalUD.__init__(self, air)
-        self.toonsOnline = []
+        # avatarId -> OnlineToon
+        self.toonsOnline = {}
         self.air.netMessenger.accept('avatarOnline', self, self.toonOnline)
         self.air.netMessenger.accept('avatarOffline', self, self.toonOffline)
 
+    def getAvatarName(self, avatarId, callback):
+        """
+        Calls `callback` with the name of `avatarId`. Online toons are answered
+        right away, the rest go through the avatar summary cache.
+        """
+
+        onlineToon = self.toonsOnline.get(avatarId)
+        if onlineToon:
+            callback(onlineToon.name)
+            return
+
+        def summaryResponse(summary):
+            if summary is not None:
+                callback(summary.name)
+
+        self.air.avatarSummaryCache.querySummary(avatarId, summaryResponse)
+
+    def updateOnlineFriendsList(self, avatarId, friendsList):
+        """Keeps our copy of an online toon's friends list up to date."""
+
+        onlineToon = self.toonsOnline.get(avatarId)
+        if onlineToon:
+            onlineToon.friendsList = list(friendsList)
+
     def sendWhisper(self, target, message):
         sender = self.air.getAvatarIdFromSender()
 
-        def senderAvatarResponse(dclass, fields):
-            if dclass != self.air.dclassesByName['DistributedPlayerToonUD']:
-                return
-            name = fields['setName'][0]
+        def senderName(name):
             self.sendUpdateToAvatarId(target, 'whisper', [sender, message, name])
 
-        self.air.dbInterface.queryObject(
-            self.air.dbId,
-            sender,
-            senderAvatarResponse
-        )
+        self.getAvatarName(sender, senderName)
 
     def requestFriendsList(self, sender = None):
         if sender is None:
@@ -131,7 +173,8 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
 
             name = fields['setName'][0]
             friendsList = fields['setFriendsList'][0]
-            self.d_toonOnline(avatarId, friendsList, name)
+            accessLevel = fields['setAccessLevel'][0]
+            self.d_toonOnline(avatarId, friendsList, name, accessLevel)
         
         self.air.dbInterface.queryObject(
             self.air.dbId,
@@ -140,6 +183,10 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
         )
         
     def toonOffline(self, avatarId):
+        onlineToon = self.toonsOnline.get(avatarId)
+        if onlineToon:
+            self.d_toonOffline(avatarId, onlineToon.friendsList, onlineToon.name)
+            return
         
         def avatarResponse(dclass, fields):
             if dclass != self.air.dclassesByName['DistributedPlayerToonUD']:
@@ -156,17 +203,15 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
             avatarResponse
         )
 
-    def d_toonOnline(self, avatarId, friendsList, name):
-        if not avatarId in self.toonsOnline:
-            self.toonsOnline.append(avatarId)
+    def d_toonOnline(self, avatarId, friendsList, name, accessLevel = 0):
+        self.toonsOnline[avatarId] = OnlineToon(name, friendsList, accessLevel)
 
         for friendId in friendsList:
             if friendId in self.toonsOnline:
                 self.sendUpdateToAvatarId(friendId, 'toonOnline', [avatarId, name])
 
     def d_toonOffline(self, avatarId, friendsList, name):
-        if avatarId in self.toonsOnline:
-            self.toonsOnline.remove(avatarId)
+        self.toonsOnline.pop(avatarId, None)
 
         for friendId in friendsList:
             if friendId in self.toonsOnline:
@@ -232,6 +277,7 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
             dg = dclass.aiFormatUpdate('setFriendsList', sender, sender, self.air.ourChannel, [newList])
             self.air.send(dg)
             self.air.dbInterface.updateObject(self.air.dbId, sender, dclass, {'setFriendsList': [newList]})
+            self.updateOnlineFriendsList(sender, newList)
 
         def removeeAvatarResponse(dclass, fields):
             if dclass != self.air.dclassesByName["DistributedPlayerToonUD"]:
@@ -243,6 +289,7 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
             dg = dclass.aiFormatUpdate('setFriendsList', friendId, friendId, self.air.ourChannel, [newList])
             self.air.send(dg)
             self.air.dbInterface.updateObject(self.air.dbId, friendId, dclass, {'setFriendsList': [newList]})
+            self.updateOnlineFriendsList(friendId, newList)
 
         self.air.dbInterface.queryObject(
             self.air.dbId,
@@ -270,6 +317,7 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
             dg = dclass.aiFormatUpdate('setFriendsList', sender, sender, self.air.ourChannel, [newList])
             self.air.send(dg)
             self.air.dbInterface.updateObject(self.air.dbId, sender, dclass, {'setFriendsList': [newList]})
+            self.updateOnlineFriendsList(sender, newList)
 
         def requesterAvatarResponse(dclass, fields):
             if dclass != self.air.dclassesByName["DistributedPlayerToonUD"]:
@@ -281,6 +329,7 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
             dg = dclass.aiFormatUpdate('setFriendsList', avatarId, avatarId, self.air.ourChannel, [newList])
             self.air.send(dg)
             self.air.dbInterface.updateObject(self.air.dbId, avatarId, dclass, {'setFriendsList': [newList]})
+            self.updateOnlineFriendsList(avatarId, newList)
 
         self.air.dbInterface.queryObject(
             self.air.dbId,
@@ -317,16 +366,8 @@ class FriendsManagerUD(DistributedObjectGlobalUD):
     def myAvatarLocation(self, avatarId, shardId, zoneId):
         sender = self.air.getAvatarIdFromSender()
 
-        def teleportingAvatarResponse(dclass, fields):
-            if dclass != self.air.dclassesByName['DistributedPlayerToonUD']:
-                return
-
-            name = fields['setName'][0]
+        def teleportingAvatarName(name):
             self.sendUpdateToAvatarId(sender, 'teleportNotify', [name])
 
-        self.air.dbInterface.queryObject(
-            self.air.dbId,
-            avatarId,
-            teleportingAvatarResponse
-        )
+        self.getAvatarName(avatarId, teleportingAvatarName)
         self.sendUpdateToAvatarId(avatarId, 'avatarLocation', [sender, shardId, zoneId])
@@ -192,11 +192,7 @@ class ActivateTrapGag(TrapGag, LocationGag):
         if self.isSafeLocation(self.gag):
             self.entities.append(self.gag)
             # Let's suck the closest suit into our trap.
-            suits = []
-            for obj in base.cr.doId2do.values():
-                if obj.__class__.__name__ == "DistributedSuit":
-                    if obj.getPlace() == base.localAvatar.zoneId:
-                        suits.append(obj)
+            suits = base.cr.getObjectsInZone(base.localAvatar.zoneId, ["DistributedSuit"])
             nearestCog = self.getClosestObject(self.gag, suits)
             suits = []
             if nearestCog and nearestCog.getDistance(self.gag) <= self.minSafeDistance:
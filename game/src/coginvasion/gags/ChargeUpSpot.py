@@ -13,7 +13,6 @@ from direct.showbase.InputStateGlobal import inputState
 from direct.interval.IntervalGlobal import Sequence, Parallel, LerpScaleInterval, SoundInterval
 from direct.interval.IntervalGlobal import Func, LerpColorScaleInterval
 from panda3d.core import VBase4
-from src.coginvasion.globals import CIGlobals
 
 class ChargeUpSpot(LocationSeeker):
 
@@ -65,12 +64,10 @@ class ChargeUpSpot(LocationSeeker):
 
     def __selectNearbyCogs(self):
         self.selectedCogs = []
-        for obj in base.cr.doId2do.values():
-            if obj.__class__.__name__ in CIGlobals.SuitClasses:
-                dist = obj.getDistance(self.dropShadow)
-                if obj.getPlace() == self.avatar.zoneId and dist <= self.selectionRadius \
-                    and len(self.selectedCogs) < self.maxCogs and not obj.isDead():
-                        self.selectedCogs.append(obj)
+        for obj in base.cr.getSuitsInZone(self.avatar.zoneId):
+            dist = obj.getDistance(self.dropShadow)
+            if dist <= self.selectionRadius and len(self.selectedCogs) < self.maxCogs and not obj.isDead():
+                self.selectedCogs.append(obj)
 
     # This returns a track that
     # does a quick red flash effect with a sound.
@@ -17,6 +17,7 @@ from direct.distributed.PyDatagram import PyDatagram
 from direct.distributed.PyDatagramIterator import PyDatagramIterator
 
 from collections import OrderedDict
+import struct
 import types
 import math
 
@@ -803,17 +804,54 @@ def getGagData(gagName):
 
     return gagData.get(gagName)
 
+# Backpack and track experience blobs start with this marker and the version
+# of their layout. Blobs without the marker were saved before we had versions,
+# they are still read and are replaced the next time the toon is saved.
+BlobMarker = 0xFF
+
+# Version 1: a uint8 gag id and uint8 supply for each gag, by gag id.
+BackpackBlobVersion = 1
+
+# Version 1: a uint8 number of tracks, then an int16 of experience for each
+# track, by track id.
+TrackExperienceBlobVersion = 1
+
+def getBlobVersion(netString, latestVersion):
+    # Returns the version of the blob, and where its data starts.
+    # Old blobs without a version are version 0.
+    if len(netString) < 2 or ord(netString[0]) != BlobMarker:
+        return 0, 0
+    version = ord(netString[1])
+    if version > latestVersion:
+        raise ValueError("Blob version %d is newer than %d" % (version, latestVersion))
+    return version, 2
+
+# Expecting a dictionary like so:
+# GAG_ID : SUPPLY
+# Returns a blob of the backpack.
+def backpackToNetString(supplies):
+    data = [BlobMarker, BackpackBlobVersion]
+    for gagId in sorted(supplies.keys()):
+        data.append(gagId)
+        data.append(supplies[gagId])
+    return struct.pack('<%dB' % len(data), *data)
+
+# Returns a GAG_ID : SUPPLY dictionary from a backpack blob.
+def getBackpackFromNetString(netString):
+    _, start = getBlobVersion(netString, BackpackBlobVersion)
+
+    # Every version is gag id and supply pairs.
+    data = struct.unpack_from('<%dB' % (len(netString) - start), netString, start)
+    return dict(zip(data[0::2], data[1::2]))
+
 # Expecting a dictionary like so:
 # TRACK_NAME : EXP
 # Returns a blob of the track data.
 def trackExperienceToNetString(tracks):
-    dg = PyDatagram()
-    
-    for track, exp in tracks.iteritems():
-        dg.addUint8(TrackNameById.values().index(track))
-        dg.addInt16(exp)
-    dgi = PyDatagramIterator(dg)
-    return dgi.getRemainingBytes()
+    trackIds = sorted(TrackNameById.keys())
+    exps = [tracks.get(TrackNameById[trackId], 0) for trackId in trackIds]
+    return (struct.pack('<3B', BlobMarker, TrackExperienceBlobVersion, len(exps)) +
+            struct.pack('<%dh' % len(exps), *exps))
 
 # Expects a TRACK_NAME : EXP dictionary and the backpack that should get updates.
 def processTrackData(trackData, backpack, isAI = False):
@@ -841,13 +879,22 @@ def processTrackData(trackData, backpack, isAI = False):
     return addedGag
 
 def getTrackExperienceFromNetString(netString):
-    dg = PyDatagram(netString)
-    dgi = PyDatagramIterator(dg)
-    
     tracks = {}
     
     for track in TrackNameById.values():
         tracks[track] = 0
+
+    version, start = getBlobVersion(netString, TrackExperienceBlobVersion)
+    if version >= 1:
+        numTracks = ord(netString[start])
+        exps = struct.unpack_from('<%dh' % numTracks, netString, start + 1)
+        for trackId, exp in zip(sorted(TrackNameById.keys()), exps):
+            tracks[TrackNameById[trackId]] = exp
+        return tracks
+
+    # Old blobs are track id and experience pairs.
+    dg = PyDatagram(netString)
+    dgi = PyDatagramIterator(dg)
     
     while dgi.getRemainingSize() > 0:
         trackId = dgi.getUint8()
@@ -951,14 +998,7 @@ def getDefaultBackpack(isAI = False):
     return DefaultBackpack
     
 def getDefaultBackpackNetString(isAI = False):    
-    bp = getDefaultBackpack(isAI)
-    
-    dg = PyDatagram()
-    for gagId, supply in bp.items():
-        dg.addUint8(gagId)
-        dg.addUint8(supply)
-    dgi = PyDatagramIterator(dg)
-    return dgi.getRemainingBytes()
+    return backpackToNetString(getDefaultBackpack(isAI))
 
 # Specifies which gags are allowed to be used. This should only be temporary until all the gags are implemented correctly.
 #tempAllowedGags = #[Cupcake, FruitPieSlice, CreamPieSlice, WholeFruitPie, WholeCreamPie, BirthdayCake,
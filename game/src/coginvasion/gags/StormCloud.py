@@ -12,7 +12,6 @@ from src.coginvasion.gags.SquirtGag import SquirtGag
 from src.coginvasion.gags.LocationGag import LocationGag
 from src.coginvasion.gags import GagGlobals
 from src.coginvasion.gags import GagUtils
-from src.coginvasion.globals import CIGlobals
 from direct.actor.Actor import Actor
 from direct.interval.IntervalGlobal import Sequence, Func, Wait
 from direct.interval.IntervalGlobal import Parallel, LerpScaleInterval, ParticleInterval
@@ -118,12 +117,10 @@ class StormCloud(SquirtGag, LocationGag):
 
     def getClosestCog(self, radius = 6):
         loc = LocationGag.getLocation(self)
-        for cog in base.cr.doId2do.values():
-            if cog.__class__.__name__ in CIGlobals.SuitClasses:
-                if cog.getPlace() == base.localAvatar.zoneId:
-                    distance = (cog.getPos(render) - loc).length()
-                    if distance <= radius:
-                        return cog
+        for cog in base.cr.getSuitsInZone(base.localAvatar.zoneId):
+            distance = (cog.getPos(render) - loc).length()
+            if distance <= radius:
+                return cog
 
     def start(self):
         SquirtGag.start(self)
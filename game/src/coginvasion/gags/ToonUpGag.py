@@ -66,12 +66,11 @@ class ToonUpGag(Gag):
     def getClosestAvatar(self, radius):
         avatars = {}
         distances = []
-        for obj in base.cr.doId2do.values():
-            if obj.__class__.__name__ in ToonClasses:
-                distance = self.avatar.getDistance(obj)
-                if obj != self.avatar:
-                    if distance <= radius:
-                        avatars.update({obj : distance})
+        for obj in base.cr.getObjectsOfClass(ToonClasses):
+            distance = self.avatar.getDistance(obj)
+            if obj != self.avatar:
+                if distance <= radius:
+                    avatars.update({obj : distance})
         for dist in avatars.values():
             distances.append(dist)
         distances.sort()
@@ -81,8 +80,7 @@ class ToonUpGag(Gag):
                 return avatar
 
     def healNearbyAvatars(self, radius):
-        for obj in base.cr.doId2do.values():
-            if obj.__class__.__name__ in ToonClasses:
-                if self.avatar.getDistance(obj) <= radius:
-                    if obj.getHealth() < obj.getMaxHealth():
-                        obj.sendUpdate('toonUp', [self.healAmount, 1, 1])
+        for obj in base.cr.getObjectsOfClass(ToonClasses):
+            if self.avatar.getDistance(obj) <= radius:
+                if obj.getHealth() < obj.getMaxHealth():
+                    obj.sendUpdate('toonUp', [self.healAmount, 1, 1])
@@ -11,9 +11,7 @@ Copyright (c) CIO Team. All rights reserved.
 """
 
 from src.coginvasion.gags.backpack.BackpackBase import BackpackBase
-
-from direct.distributed.PyDatagram import PyDatagram
-from direct.distributed.PyDatagramIterator import PyDatagramIterator
+from src.coginvasion.gags import GagGlobals
 
 class Backpack(BackpackBase):
 
@@ -78,16 +76,10 @@ class Backpack(BackpackBase):
     # updates supplies.
     def updateSuppliesFromNetString(self, netString):
         self.netString = netString
-        
-        dg = PyDatagram(netString)
-        dgi = PyDatagramIterator(dg)
 
         addedGag = False
         
-        while dgi.getRemainingSize() > 0:
-            gagId = dgi.getUint8()
-            supply = dgi.getUint8()
-            
+        for gagId, supply in GagGlobals.getBackpackFromNetString(netString).iteritems():
             if self.hasGag(gagId):
                 self.setSupply(gagId, supply)
             else:
@@ -13,9 +13,6 @@ Copyright (c) CIO Team. All rights reserved.
 from src.coginvasion.gags import GagGlobals
 from src.coginvasion.attack import Attacks
 
-from direct.distributed.PyDatagram import PyDatagram
-from direct.distributed.PyDatagramIterator import PyDatagramIterator
-
 MAXIMUM_SUPPLY = 255
 
 class BackpackBase:
@@ -169,7 +166,7 @@ class BackpackBase:
     # Converts out backpack to a blob for storing.
     # Returns a blob of bytes.
     def toNetString(self):
-        dg = PyDatagram()
+        supplies = {}
         
         for gagId in self.avatar.attacks.keys():
             supply = self.avatar.attacks[gagId].getAmmo()
@@ -178,25 +175,15 @@ class BackpackBase:
                 print "Gag ID {0} is about to cause a cause with supply: {1}".format(str(gagId), str(supply))
                 supply = 0
             
-            dg.addUint8(gagId)
-            dg.addUint8(supply)
+            supplies[gagId] = supply
 
-        return dg.getMessage()
+        return GagGlobals.backpackToNetString(supplies)
     
     # Converts a net string blob back to data that we can handle.
     # Returns a dictionary of {gagIds : supply}
     def fromNetString(self, netString):
         self.netString = netString
-        
-        dg = PyDatagram(netString)
-        dgi = PyDatagramIterator(dg)
-        dictionary = {}
-        
-        while dgi.getRemainingSize() > 0:
-            gagId = dgi.getUint8()
-            supply = dgi.getUint8()
-            dictionary[gagId] = supply
-        return dictionary
+        return GagGlobals.getBackpackFromNetString(netString)
         
     def cleanup(self):
         del self.netString
@@ -3,8 +3,8 @@ from panda3d.bullet import BulletCylinderShape, BulletRigidBodyNode, ZUp
 from src.coginvasion.phys.DistributedPhysicsEntityAI import DistributedPhysicsEntityAI
 from src.coginvasion.gags import GagGlobals
 from src.coginvasion.attack.Attacks import ATTACK_GAG_TNT
-from src.coginvasion.globals import CIGlobals
 from src.coginvasion.attack.TakeDamageInfo import TakeDamageInfo
+from src.coginvasion.battle.HitResolverAI import getAvatarsInRadius
 
 class TNTProjectileAI(DistributedPhysicsEntityAI):
 
@@ -39,12 +39,10 @@ class TNTProjectileAI(DistributedPhysicsEntityAI):
     def __explodeTask(self, task):
         self.sendUpdate('explode')
 
-        for obj in self.air.avatars[self.zoneId]:
-            if CIGlobals.isAvatar(obj) and self.attack.canDamage(obj):
-                dist = obj.getDistance(self)
-                if dist <= GagGlobals.TNT_RANGE:
-                    info = TakeDamageInfo(self.avatar, ATTACK_GAG_TNT, self.attack.calcDamage(dist), self.getPos())
-                    obj.takeDamage(info)
+        for obj, dist in getAvatarsInRadius(self.zoneId, self.getPos(render), GagGlobals.TNT_RANGE):
+            if self.attack.canDamage(obj):
+                info = TakeDamageInfo(self.avatar, ATTACK_GAG_TNT, self.attack.calcDamage(dist), self.getPos())
+                obj.takeDamage(info)
 
         self.requestDelete()
         return task.done
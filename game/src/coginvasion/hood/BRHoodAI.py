@@ -12,6 +12,7 @@ from direct.directnotify.DirectNotifyGlobal import directNotify
 
 import ToonHoodAI
 import ZoneUtil
+from DNAPreparerAI import HoodDNAFiles
 from playground import DistributedBRPondAI
 
 class BRHoodAI(ToonHoodAI.ToonHoodAI):
@@ -25,8 +26,7 @@ class BRHoodAI(ToonHoodAI.ToonHoodAI):
 
 	def startup(self):
 		self.notify.info("Creating hood {0}...".format(ZoneUtil.TheBrrrgh))
-		self.dnaFiles = ['phase_8/dna/the_burrrgh_3100.pdna', 'phase_8/dna/the_burrrgh_3200.pdna',
-            'phase_8/dna/the_burrrgh_3300.pdna', 'phase_8/dna/the_burrrgh_sz.pdna']
+		self.dnaFiles = HoodDNAFiles[self.zoneId]
 		ToonHoodAI.ToonHoodAI.startup(self)
 		# The pond is broken right now without having a proper collisions system. No thanks.
 		#self.pond = DistributedBRPondAI.DistributedBRPondAI(self.air)
@@ -13,6 +13,7 @@ from direct.directnotify.DirectNotifyGlobal import directNotify
 from ToonHoodAI import ToonHoodAI
 from playground import DistributedBoatAI
 import ZoneUtil
+from DNAPreparerAI import HoodDNAFiles
 
 class DDHoodAI(ToonHoodAI):
     notify = directNotify.newCategory('DDHoodAI')
@@ -23,8 +24,7 @@ class DDHoodAI(ToonHoodAI):
         self.startup()
 
     def startup(self):
-        self.dnaFiles = ['phase_6/dna/donalds_dock_1100.pdna', 'phase_6/dna/donalds_dock_1200.pdna',
-            'phase_6/dna/donalds_dock_1300.pdna', 'phase_6/dna/donalds_dock_sz.pdna']
+        self.dnaFiles = HoodDNAFiles[self.zoneId]
         ToonHoodAI.startup(self)
         self.notify.info("Making Donald's Dock boat...")
         self.boat = DistributedBoatAI.DistributedBoatAI(self.air)
@@ -12,6 +12,7 @@ from direct.directnotify.DirectNotifyGlobal import directNotify
 
 from ToonHoodAI import ToonHoodAI
 import ZoneUtil
+from DNAPreparerAI import HoodDNAFiles
 
 class DGHoodAI(ToonHoodAI):
     notify = directNotify.newCategory('DGHoodAI')
@@ -21,6 +22,5 @@ class DGHoodAI(ToonHoodAI):
         self.startup()
 
     def startup(self):
-        self.dnaFiles = ['phase_8/dna/daisys_garden_5100.pdna', 'phase_8/dna/daisys_garden_5200.pdna',
-            'phase_8/dna/daisys_garden_5300.pdna', 'phase_8/dna/daisys_garden_sz.pdna']
+        self.dnaFiles = HoodDNAFiles[self.zoneId]
         ToonHoodAI.startup(self)
@@ -12,6 +12,7 @@ from direct.directnotify.DirectNotifyGlobal import directNotify
 
 from ToonHoodAI import ToonHoodAI
 import ZoneUtil
+from DNAPreparerAI import HoodDNAFiles
 
 class DLHoodAI(ToonHoodAI):
     notify = directNotify.newCategory('DLHoodAI')
@@ -21,6 +22,5 @@ class DLHoodAI(ToonHoodAI):
         self.startup()
 
     def startup(self):
-        self.dnaFiles = ['phase_8/dna/donalds_dreamland_9100.pdna', 'phase_8/dna/donalds_dreamland_9200.pdna',
-            'phase_8/dna/donalds_dreamland_sz.pdna']
+        self.dnaFiles = HoodDNAFiles[self.zoneId]
         ToonHoodAI.startup(self)
@@ -0,0 +1,181 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file DNAPreparerAI.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+from direct.stdpy import threading
+
+from src.coginvasion.dna.DNALoader import DNAStorage, loadDNAFileAI
+from src.coginvasion.hood import ZoneUtil
+
+from collections import deque
+
+# Hood zone id -> the DNA files the AI loads for it, streets first.
+HoodDNAFiles = {
+    # Toontown Central, its safezone DNA is in phase_4.
+    ZoneUtil.ToontownCentralId: ['phase_5/dna/toontown_central_2100.pdna',
+                                 'phase_5/dna/toontown_central_2200.pdna',
+                                 'phase_5/dna/toontown_central_2300.pdna',
+                                 'phase_4/dna/new_ttc_sz.pdna'],
+    ZoneUtil.TheBrrrghId: ['phase_8/dna/the_burrrgh_3100.pdna',
+                           'phase_8/dna/the_burrrgh_3200.pdna',
+                           'phase_8/dna/the_burrrgh_3300.pdna',
+                           'phase_8/dna/the_burrrgh_sz.pdna'],
+    ZoneUtil.DonaldsDockId: ['phase_6/dna/donalds_dock_1100.pdna',
+                             'phase_6/dna/donalds_dock_1200.pdna',
+                             'phase_6/dna/donalds_dock_1300.pdna',
+                             'phase_6/dna/donalds_dock_sz.pdna'],
+    ZoneUtil.MinniesMelodylandId: ['phase_6/dna/minnies_melody_land_4100.pdna',
+                                   'phase_6/dna/minnies_melody_land_4200.pdna',
+                                   'phase_6/dna/minnies_melody_land_4300.pdna',
+                                   'phase_6/dna/minnies_melody_land_sz.pdna'],
+    ZoneUtil.DaisyGardensId: ['phase_8/dna/daisys_garden_5100.pdna',
+                              'phase_8/dna/daisys_garden_5200.pdna',
+                              'phase_8/dna/daisys_garden_5300.pdna',
+                              'phase_8/dna/daisys_garden_sz.pdna'],
+    ZoneUtil.DonaldsDreamlandId: ['phase_8/dna/donalds_dreamland_9100.pdna',
+                                  'phase_8/dna/donalds_dreamland_9200.pdna',
+                                  'phase_8/dna/donalds_dreamland_sz.pdna']
+}
+
+def loadDNA(dnaFile):
+    """Loads `dnaFile` for the AI, returns (dnaStore, dnaData)."""
+
+    dnaStore = DNAStorage()
+    dnaData = loadDNAFileAI(dnaStore, dnaFile)
+    return dnaStore, dnaData
+
+class DNAPreparer:
+    """
+    Loads the DNA files of every hood on worker threads while the district
+    boots, so HoodAI doesn't have to read them one by one on the main loop
+    right before it creates their buildings.
+
+    A phase's files are handed to the workers as soon as its multifile is
+    mounted, while the rest of the multifiles are still being mounted.
+    HoodAI picks the DNAStorage of a file up with getDNA(), which waits for
+    the file if a worker is still on it, and loads it right there if no
+    worker ever got it.
+    """
+
+    notify = directNotify.newCategory("DNAPreparer")
+
+    def __init__(self, numThreads):
+        self.cv = threading.Condition()
+
+        # DNA files waiting for a worker.
+        self.queue = deque()
+        # Files that are queued or being loaded.
+        self.preparing = set()
+        # dnaFile -> (dnaStore, dnaData), or None if a worker couldn't load it.
+        self.prepared = {}
+        # No more files are coming, the workers quit once the queue is empty.
+        self.doneQueuing = False
+
+        self.workers = []
+        for i in xrange(numThreads):
+            worker = threading.Thread(target = self.__workerMain, name = "DNAPreparer-%d" % i)
+            worker.start()
+            self.workers.append(worker)
+
+    def phaseMounted(self, phase):
+        """Starts loading the hood DNA files in `phase`, call this once its multifile is mounted."""
+
+        prefix = phase + '/'
+        self.prepare([dnaFile for dnaFiles in HoodDNAFiles.values()
+                      for dnaFile in dnaFiles if dnaFile.startswith(prefix)])
+
+    def prepare(self, dnaFiles):
+        """Hands `dnaFiles` to the workers."""
+
+        if not self.workers:
+            # getDNA() will load them.
+            return
+
+        self.cv.acquire()
+        try:
+            for dnaFile in dnaFiles:
+                if dnaFile in self.preparing or dnaFile in self.prepared:
+                    continue
+                self.preparing.add(dnaFile)
+                self.queue.append(dnaFile)
+            self.cv.notifyAll()
+        finally:
+            self.cv.release()
+
+    def finishQueuing(self):
+        """Lets the workers quit once they have loaded everything that is queued."""
+
+        self.cv.acquire()
+        try:
+            self.doneQueuing = True
+            self.cv.notifyAll()
+        finally:
+            self.cv.release()
+
+    def getDNA(self, dnaFile):
+        """
+        Returns (dnaStore, dnaData) of `dnaFile`. Each prepared file is only
+        handed out once, the caller owns it from then on.
+        """
+
+        self.cv.acquire()
+        try:
+            while dnaFile in self.preparing:
+                self.cv.wait()
+            result = self.prepared.pop(dnaFile, None)
+        finally:
+            self.cv.release()
+
+        if result is None:
+            self.notify.info("%s wasn't prepared, loading it now." % dnaFile)
+            result = loadDNA(dnaFile)
+
+        return result
+
+    def __workerMain(self):
+        while True:
+            self.cv.acquire()
+            try:
+                while not self.queue and not self.doneQueuing:
+                    self.cv.wait()
+                if not self.queue:
+                    return
+                dnaFile = self.queue.popleft()
+            finally:
+                self.cv.release()
+
+            self.notify.debug("Loading %s" % dnaFile)
+            try:
+                result = loadDNA(dnaFile)
+            except Exception, e:
+                # getDNA() will try it again on the main thread.
+                self.notify.warning("Couldn't load %s: %s" % (dnaFile, e))
+                result = None
+
+            self.cv.acquire()
+            try:
+                if result is not None:
+                    self.prepared[dnaFile] = result
+                self.preparing.discard(dnaFile)
+                self.cv.notifyAll()
+            finally:
+                self.cv.release()
+
+    def cleanup(self):
+        self.cv.acquire()
+        try:
+            # Whatever is still queued won't be loaded.
+            for dnaFile in self.queue:
+                self.preparing.discard(dnaFile)
+            self.queue.clear()
+            self.doneQueuing = True
+            self.cv.notifyAll()
+        finally:
+            self.cv.release()
+
+        self.prepared.clear()
@@ -25,6 +25,7 @@ from street import DistributedKnockKnockDoorAI
 from street import CinemaGlobals
 from street import KnockKnockGlobals
 
+import DNAPreparerAI
 import DistributedDoorAI
 import DistributedToonInteriorAI
 import DistributedToonHQInteriorAI
@@ -67,8 +68,10 @@ class HoodAI:
                         if segment.isdigit():
                             zoneId = int(segment)
                             break
-            dnaStore = DNAStorage()
-            dnaData = loadDNAFileAI(dnaStore, dnaFile)
+            if self.air.dnaPreparer:
+                dnaStore, dnaData = self.air.dnaPreparer.getDNA(dnaFile)
+            else:
+                dnaStore, dnaData = DNAPreparerAI.loadDNA(dnaFile)
             self.air.dnaStoreMap[zoneId] = dnaStore
             self.air.dnaDataMap[zoneId] = dnaData
             self.buildings[zoneId] = []
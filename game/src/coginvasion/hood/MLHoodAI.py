@@ -12,6 +12,7 @@ from direct.directnotify.DirectNotifyGlobal import directNotify
 
 from ToonHoodAI import ToonHoodAI
 import ZoneUtil
+from DNAPreparerAI import HoodDNAFiles
 
 class MLHoodAI(ToonHoodAI):
     notify = directNotify.newCategory('MLHoodAI')
@@ -21,6 +22,5 @@ class MLHoodAI(ToonHoodAI):
         self.startup()
 
     def startup(self):
-        self.dnaFiles = ['phase_6/dna/minnies_melody_land_4100.pdna', 'phase_6/dna/minnies_melody_land_4200.pdna',
-            'phase_6/dna/minnies_melody_land_4300.pdna', 'phase_6/dna/minnies_melody_land_sz.pdna']
+        self.dnaFiles = HoodDNAFiles[self.zoneId]
         ToonHoodAI.startup(self)
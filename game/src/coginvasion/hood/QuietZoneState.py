@@ -56,6 +56,8 @@ class QuietZoneState(StateData):
     def enter(self, requestStatus):
         StateData.enter(self)
         self._requestStatus = requestStatus
+        if base.precacheScheduler:
+            base.precacheScheduler.enterZone(requestStatus)
         base.localAvatar.b_setAnimState('off')
         self.fsm.request('waitForQuietZoneResponse')
 
@@ -12,6 +12,7 @@ from direct.directnotify.DirectNotifyGlobal import directNotify
 
 import ToonHoodAI
 import ZoneUtil
+from DNAPreparerAI import HoodDNAFiles
 
 class TTHoodAI(ToonHoodAI.ToonHoodAI):
     notify = directNotify.newCategory("TTHoodAI")
@@ -24,8 +25,7 @@ class TTHoodAI(ToonHoodAI.ToonHoodAI):
 
     def startup(self):
         self.notify.info("Creating hood %s" % ZoneUtil.ToontownCentral)
-        self.dnaFiles = ['phase_5/dna/toontown_central_2100.pdna', 'phase_5/dna/toontown_central_2200.pdna',
-            'phase_5/dna/toontown_central_2300.pdna', 'phase_4/dna/new_ttc_sz.pdna']
+        self.dnaFiles = HoodDNAFiles[self.zoneId]
         ToonHoodAI.ToonHoodAI.startup(self)
         self.notify.info("Finished creating hood %s" % ZoneUtil.ToontownCentral)
 
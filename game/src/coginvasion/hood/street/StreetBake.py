@@ -0,0 +1,85 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file StreetBake.py
+
+"""
+
+from panda3d.core import Filename, VirtualFileSystem, getModelPath
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+import hashlib
+import glob
+import os
+
+notify = directNotify.newCategory("StreetBake")
+
+# Bump this whenever TownLoader changes what it does to a street's scene graph,
+# so the bakes made by the old code aren't used anymore.
+StreetBakeVersion = 1
+
+def isEnabled():
+    return config.GetBool('want-street-bake', True)
+
+def getBakeDir():
+    return config.GetString('street-bake-dir', 'cache/streets')
+
+def hashDNAFile(md5, dnaFile):
+    vfs = VirtualFileSystem.getGlobalPtr()
+    filename = Filename(dnaFile)
+    vfs.resolveFilename(filename, getModelPath().getValue())
+    md5.update(vfs.readFile(filename, True))
+
+def getBakeFile(dnaFile, storageFiles, branchZone):
+    """
+    Returns where the bake of the street in `dnaFile` goes. The name has a
+    hash of the street's DNA and the DNA storage it was built with, so a
+    bake is never used with DNA that changed since it was made.
+    """
+
+    md5 = hashlib.md5()
+    md5.update(str(StreetBakeVersion))
+    for filename in [dnaFile] + list(storageFiles):
+        hashDNAFile(md5, filename)
+
+    name = '%s-%d-%s.bam' % (os.path.splitext(os.path.basename(dnaFile))[0], branchZone, md5.hexdigest()[:12])
+    return os.path.join(getBakeDir(), name)
+
+def readBake(bakeFile):
+    """Returns the root of the bake in `bakeFile`, or None if there isn't one."""
+
+    if not os.path.isfile(bakeFile):
+        return None
+
+    try:
+        root = loader.loadModel(Filename.fromOsSpecific(bakeFile), noCache = True, okMissing = True)
+    except IOError:
+        root = None
+
+    if not root or root.isEmpty():
+        notify.warning("Couldn't read street bake %s" % bakeFile)
+        return None
+
+    return root
+
+def writeBake(bakeFile, root):
+    """Writes the bake `root` to `bakeFile`, and removes the older bakes of the same street."""
+
+    bakeDir = os.path.dirname(bakeFile)
+    if bakeDir and not os.path.isdir(bakeDir):
+        os.makedirs(bakeDir)
+
+    # Everything but the hash, the bakes of this street made from other DNA.
+    prefix = bakeFile.rsplit('-', 1)[0]
+    for oldBake in glob.glob(prefix + '-*.bam'):
+        if oldBake != bakeFile:
+            os.remove(oldBake)
+
+    if not root.writeBamFile(Filename.fromOsSpecific(bakeFile)):
+        notify.warning("Couldn't write street bake %s" % bakeFile)
+        return False
+
+    notify.info("Baked street to %s" % bakeFile)
+    return True
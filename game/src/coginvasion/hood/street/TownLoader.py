@@ -23,10 +23,18 @@ from src.coginvasion.hood import ToonInterior
 from src.coginvasion.cogoffice import CogOfficeInterior
 from src.coginvasion.globals import CIGlobals
 from src.coginvasion.phys import PhysicsUtils
+from src.coginvasion.dna.DNALoader import loadDNAFileAI
+
+import StreetBake
+import json
 
 class TownLoader(StateData):
     notify = directNotify.newCategory("TownLoader")
 
+    # Tags on the root of a street bake and on its vis groups.
+    BakeInfoTag = 'streetBakeInfo'
+    BakeZoneTag = 'streetBakeZone'
+
     def __init__(self, hood, parentFSMState, doneEvent):
         self.hood = hood
         self.parentFSMState = parentFSMState
@@ -211,9 +219,19 @@ class TownLoader(StateData):
         pass
 
     def createHood(self, dnaFile, loadStorage = 1, flattenNow = True):
+        storageFiles = []
         if loadStorage:
-            loader.loadDNAFile(self.hood.dnaStore, 'phase_5/dna/storage_town.pdna')
-            loader.loadDNAFile(self.hood.dnaStore, self.townStorageDNAFile)
+            storageFiles = ['phase_5/dna/storage_town.pdna', self.townStorageDNAFile]
+            for storageFile in storageFiles:
+                loader.loadDNAFile(self.hood.dnaStore, storageFile)
+
+        # A street that we flatten right away can be read from its bake instead.
+        bakeFile = None
+        if flattenNow and StreetBake.isEnabled():
+            bakeFile = StreetBake.getBakeFile(dnaFile, storageFiles, self.branchZone)
+            if self.loadBake(dnaFile, bakeFile):
+                return
+
         node = loader.loadDNAFile(self.hood.dnaStore, dnaFile)
         if node.getNumParents() == 1:
             self.geom = NodePath(node.getParent(0))
@@ -224,6 +242,97 @@ class TownLoader(StateData):
             self.doFlatten()
         self.geom.setName('town_top_level')
 
+        if bakeFile:
+            self.writeBake(bakeFile)
+
+    def loadBake(self, dnaFile, bakeFile):
+        """
+        Sets the street up from its bake, the scene graph that doFlatten()
+        made the last time we loaded it. Returns False if there is no bake.
+        """
+
+        root = StreetBake.readBake(bakeFile)
+        if not root:
+            return False
+
+        geom = root.find('**/town_top_level')
+        landmarkBlocks = root.find('**/landmarkBlocks')
+        if geom.isEmpty() or landmarkBlocks.isEmpty() or not geom.hasTag(self.BakeInfoTag):
+            self.notify.warning("Street bake %s is missing something, rebaking it." % bakeFile)
+            root.removeNode()
+            return False
+
+        bakeInfo = json.loads(geom.getTag(self.BakeInfoTag))
+        geom.clearTag(self.BakeInfoTag)
+
+        # The street's buildings, suit points and battle cells still have to go
+        # in the DNA storage, but we don't need its geometry.
+        loadDNAFileAI(self.hood.dnaStore, dnaFile)
+
+        self.geom = geom
+        self.geom.reparentTo(hidden)
+        self.landmarkBlocks = landmarkBlocks
+        self.landmarkBlocks.reparentTo(hidden)
+        root.removeNode()
+
+        self.resetDictionaries()
+        groupNodes = {}
+        for groupNode in self.geom.findAllMatches('**/=' + self.BakeZoneTag):
+            groupNodes[int(groupNode.getTag(self.BakeZoneTag))] = groupNode
+        for zoneId in bakeInfo['zones']:
+            self.addVisGroup(zoneId, groupNodes[zoneId], bakeInfo['visibles'][str(zoneId)])
+        for zoneId in bakeInfo['zones']:
+            for nextZoneId in bakeInfo['nodes'][str(zoneId)]:
+                self.nodeDict[zoneId].append(self.zoneDict[nextZoneId])
+
+        self.storeBlockDoors()
+        self.resetDNAVisGroups()
+
+        CIGlobals.preRenderScene(self.geom)
+        return True
+
+    def writeBake(self, bakeFile):
+        """Writes the flattened street and its dictionaries to `bakeFile`."""
+
+        node2zone = {}
+        for zoneId, groupNode in self.zoneDict.items():
+            groupNode.setTag(self.BakeZoneTag, str(zoneId))
+            node2zone[groupNode.getName()] = zoneId
+
+        zones = [int(groupNode.getTag(self.BakeZoneTag)) for groupNode in self.nodeList]
+        nodes = {}
+        for zoneId, visNodes in self.nodeDict.items():
+            nodes[zoneId] = [node2zone[visNode.getName()] for visNode in visNodes]
+        bakeInfo = {'zones': zones, 'visibles': self.zoneVisDict, 'nodes': nodes}
+
+        root = NodePath('streetBake')
+        self.geom.setTag(self.BakeInfoTag, json.dumps(bakeInfo))
+        self.geom.reparentTo(root)
+        self.landmarkBlocks.reparentTo(root)
+        try:
+            StreetBake.writeBake(bakeFile, root)
+        except (IOError, OSError), e:
+            self.notify.warning("Couldn't bake %s: %s" % (bakeFile, e))
+        self.geom.clearTag(self.BakeInfoTag)
+        self.geom.reparentTo(hidden)
+        self.landmarkBlocks.reparentTo(hidden)
+        root.removeNode()
+
+    def storeBlockDoors(self):
+        """
+        Points the DNA storage at the door of each building. Loading the DNA
+        does this when it builds the street, a bake has to do it itself.
+        """
+
+        buildings = self.geom.findAllMatches('**/tb*:*_landmark_*_DNARoot;+s')
+        buildings.addPathsFrom(self.landmarkBlocks.findAllMatches('**/sb*:*_landmark_*_DNARoot;+s'))
+        for building in buildings:
+            doorOrigin = building.find('**/*door_origin;+s')
+            if doorOrigin.isEmpty():
+                continue
+            block = int(building.getName().split(':')[0][2:])
+            self.hood.dnaStore.storeBlockDoor(block, doorOrigin)
+
     def doFlatten(self):
         self.makeDictionaries(self.hood.dnaStore)
         self.reparentLandmarkBlockNodes()
@@ -245,15 +354,33 @@ class TownLoader(StateData):
             nodePath = npc.getPath(i)
             nodePath.wrtReparentTo(bucket)
 
-    def makeDictionaries(self, dnaStore):
+    def resetDictionaries(self):
         self.nodeDict = {}
         self.zoneDict = {}
         self.zoneVisDict = {}
         self.nodeList = []
         self.fadeInDict = {}
         self.fadeOutDict = {}
+
+    def addVisGroup(self, zoneId, groupNode, visibles):
+        self.nodeDict[zoneId] = []
+        self.nodeList.append(groupNode)
+        self.zoneDict[zoneId] = groupNode
+        self.zoneVisDict[zoneId] = visibles
         a1 = Vec4(1, 1, 1, 1)
         a0 = Vec4(1, 1, 1, 0)
+        fadeDuration = 0.5
+        self.fadeOutDict[groupNode] = Sequence(Func(groupNode.setTransparency, 1), LerpColorScaleInterval(groupNode, fadeDuration, a0, startColorScale=a1), Func(groupNode.clearColorScale), Func(groupNode.clearTransparency), Func(groupNode.stash), Func(base.disablePhysicsNodes, groupNode), name='fadeZone-' + str(zoneId), autoPause=1)
+        self.fadeInDict[groupNode] = Sequence(Func(base.enablePhysicsNodes, groupNode), Func(groupNode.unstash), Func(groupNode.setTransparency, 1), LerpColorScaleInterval(groupNode, fadeDuration, a1, startColorScale=a0), Func(groupNode.clearColorScale), Func(groupNode.clearTransparency), name='fadeZone-' + str(zoneId), autoPause=1)
+
+    def resetDNAVisGroups(self):
+        self.hood.dnaStore.resetPlaceNodes()
+        self.hood.dnaStore.resetDNAGroups()
+        self.hood.dnaStore.resetDNAVisGroups()
+        self.hood.dnaStore.resetDNAVisGroupsAI()
+
+    def makeDictionaries(self, dnaStore):
+        self.resetDictionaries()
         numVisGroups = dnaStore.getNumDNAVisGroupsAI()
         for i in xrange(numVisGroups):
             groupFullName = dnaStore.getDNAVisGroupName(i)
@@ -318,17 +445,11 @@ class TownLoader(StateData):
             groupNode.flattenStrong()
             #groupNode.ls()
             
-            self.nodeDict[zoneId] = []
-            self.nodeList.append(groupNode)
-            self.zoneDict[zoneId] = groupNode
             visibles = []
             for i in xrange(visGroup.getNumVisibles()):
                 visibles.append(int(visGroup.get_visible(i)))
             visibles.append(ZoneUtil.getBranchZone(zoneId))
-            self.zoneVisDict[zoneId] = visibles
-            fadeDuration = 0.5
-            self.fadeOutDict[groupNode] = Sequence(Func(groupNode.setTransparency, 1), LerpColorScaleInterval(groupNode, fadeDuration, a0, startColorScale=a1), Func(groupNode.clearColorScale), Func(groupNode.clearTransparency), Func(groupNode.stash), Func(base.disablePhysicsNodes, groupNode), name='fadeZone-' + str(zoneId), autoPause=1)
-            self.fadeInDict[groupNode] = Sequence(Func(base.enablePhysicsNodes, groupNode), Func(groupNode.unstash), Func(groupNode.setTransparency, 1), LerpColorScaleInterval(groupNode, fadeDuration, a1, startColorScale=a0), Func(groupNode.clearColorScale), Func(groupNode.clearTransparency), name='fadeZone-' + str(zoneId), autoPause=1)
+            self.addVisGroup(zoneId, groupNode, visibles)
 
         for i in xrange(numVisGroups):
             groupFullName = dnaStore.getDNAVisGroupName(i)
@@ -342,10 +463,7 @@ class TownLoader(StateData):
                 visNode = self.zoneDict[nextZoneId]
                 self.nodeDict[zoneId].append(visNode)
 
-        self.hood.dnaStore.resetPlaceNodes()
-        self.hood.dnaStore.resetDNAGroups()
-        self.hood.dnaStore.resetDNAVisGroups()
-        self.hood.dnaStore.resetDNAVisGroupsAI()
+        self.resetDNAVisGroups()
 
     def renameFloorPolys(self, nodeList):
         for i in nodeList:
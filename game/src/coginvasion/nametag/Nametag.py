@@ -1,4 +1,3 @@
-from direct.task.Task import Task
 from panda3d.core import TextNode, VBase4
 
 from src.coginvasion.toon.ChatBalloon import ChatBalloon
@@ -16,6 +15,9 @@ class Nametag:
 
     CHAT_BALLOON_ALPHA = 1
 
+    # Whether the nametag manager should tick us.
+    MANAGED = True
+
     def __init__(self):
         self.avatar = None
 
@@ -50,14 +52,12 @@ class Nametag:
         self.chatTextNode.setGlyphScale(ChatBalloon.TEXT_GLYPH_SCALE)
         self.chatTextNode.setGlyphShift(ChatBalloon.TEXT_GLYPH_SHIFT)
 
-        # Add the tick task:
-        self.tickTaskName = self.getUniqueName() + '-tick'
-        self.tickTask = taskMgr.add(self.tick, self.tickTaskName, sort=45)
+        # The nametag manager ticks us:
+        if self.MANAGED:
+            base.nametagManager.addNametag(self)
 
     def destroy(self):
-        if self.tickTask is not None:
-            taskMgr.remove(self.tickTask)
-            self.tickTask = None
+        base.nametagManager.removeNametag(self)
 
         self.chatTextNode = None
         self.textNode = None
@@ -93,8 +93,10 @@ class Nametag:
     def getChatBalloonHeight(self):
         pass  # Inheritors should override this method.
 
-    def tick(self, task):
-        return Task.done  # Inheritors should override this method.
+    def tick(self, camPos=None):
+        # The nametag manager passes 3D nametags their position relative to
+        # the camera as `camPos`.
+        pass  # Inheritors should override this method.
 
     def updateClickRegion(self):
         pass  # Inheritors should override this method.
@@ -1,4 +1,3 @@
-from direct.task.Task import Task
 import math
 from panda3d.core import PGButton, VBase4, DepthWriteAttrib, Point3
 
@@ -130,12 +129,12 @@ class Nametag2d(Nametag, Clickable2d, MarginVisible):
             if self.region is not None:
                 self.region.setActive(False)
 
-    def tick(self, task):
+    def tick(self, camPos=None):
         if (self.avatar is None) or self.avatar.isEmpty():
-            return Task.cont
+            return
 
         if (self.cell is None) or (self.arrow is None):
-            return Task.cont
+            return
 
         location = self.avatar.getPos(NametagGlobals.me)
         rotation = NametagGlobals.me.getQuat(base.cam)
@@ -145,8 +144,6 @@ class Nametag2d(Nametag, Clickable2d, MarginVisible):
         arrowDegrees = (arrowRadians/math.pi) * 180
         self.arrow.setR(arrowDegrees - 90)
 
-        return Task.cont
-
     def drawChatBalloon(self, model, modelWidth, modelHeight):
         if self.chatFont is None:
             # We can't draw this without a font.
@@ -1,4 +1,3 @@
-from direct.task.Task import Task
 import math
 from panda3d.core import BillboardEffect, Vec3, Point3, PGButton, VBase4
 from panda3d.core import DepthWriteAttrib, Point2, CardMaker, BitMask32
@@ -24,6 +23,8 @@ class Nametag3d(Nametag, Clickable3d):
         CIGlobals.applyNoGlow(self.contents)
 
         self.distance = 0
+        # Whether we were in the camera's view the last time the nametag manager checked.
+        self.inView = False
 
         self.card = None
         self.cardNP = None
@@ -112,9 +113,16 @@ class Nametag3d(Nametag, Clickable3d):
 
         Nametag.update(self)
 
-    def tick(self, task):
-            
-        distance = self.contents.getPos(base.cam).length()
+    def setInView(self, inView):
+        self.inView = inView
+
+        # Don't leave a click region behind where we were last seen,
+        # and only bring it back if we can be clicked.
+        if self.region is not None:
+            self.region.setActive(inView and self.isClickable())
+
+    def tick(self, camPos):
+        distance = camPos.length()
 
         if distance < self.SCALING_MIN_DISTANCE:
             distance = self.SCALING_MIN_DISTANCE
@@ -125,10 +133,12 @@ class Nametag3d(Nametag, Clickable3d):
             self.contents.setScale(math.sqrt(distance) * self.SCALING_FACTOR)
             self.distance = distance
             
-        if self.isClickable():
+        clickable = self.isClickable()
+        if clickable:
             self.updateClickRegion()
-
-        return Task.cont
+        if self.region is not None:
+            # We may have become clickable (or stopped being) since we came into view.
+            self.region.setActive(clickable)
 
     def drawChatBalloon(self, model, modelWidth, modelHeight):
         if self.chatFont is None:
@@ -1,8 +1,6 @@
-from direct.task.Task import Task
-
 from Nametag3d import Nametag3d
 
 
 class NametagFloat3d(Nametag3d):
-    def tick(self, task):
-        return Task.done
+    # Floating nametags don't scale with distance.
+    MANAGED = False
@@ -59,17 +59,14 @@ class NametagGroup:
         
         self.add(self.nametag3d)
 
-        # Add the tick task:
-        self.tickTaskName = self.getUniqueName() + '-tick'
-        self.tickTask = taskMgr.add(self.tick, self.tickTaskName, sort=45)
+        # The nametag manager ticks us:
+        base.nametagManager.addGroup(self)
 
     def destroy(self):
         if self.marginManager is not None:
             self.unmanage(self.marginManager)
 
-        if self.tickTask is not None:
-            taskMgr.remove(self.tickTask)
-            self.tickTask = None
+        base.nametagManager.removeGroup(self)
 
         self.clearChatText()
 
@@ -93,9 +90,9 @@ class NametagGroup:
     def getUniqueName(self):
         return 'NametagGroup-' + str(id(self))
 
-    def tick(self, task):
+    def tick(self, camNode):
         if (self.avatar is None) or (self.avatar.isEmpty()):
-            return Task.cont
+            return
 
         chatText = self.getChatText()
         if (NametagGlobals.forceOnscreenChat and
@@ -105,7 +102,7 @@ class NametagGroup:
         elif self.avatar == NametagGlobals.me:
             if (chatText and
                 self.chatBalloonType == NametagGlobals.CHAT_BALLOON and
-                not base.cam.node().isInView(self.avatar.getPos(base.cam))):
+                not camNode.isInView(self.avatar.getPos(base.cam))):
                 visible3d = False
             else:
                 visible3d = True
@@ -117,15 +114,13 @@ class NametagGroup:
         elif self.avatar.isHidden():
             visible3d = False
         else:
-            visible3d = base.cam.node().isInView(self.avatar.getPos(base.cam))
+            visible3d = camNode.isInView(self.avatar.getPos(base.cam))
 
         if visible3d != self.visible3d:
             self.visible3d = visible3d
             if self.nametag2d is not None:
                 self.nametag2d.setVisible(not visible3d)
 
-        return Task.cont
-
     def setAvatar(self, avatar):
         self.avatar = avatar
         for nametag in self.nametags:
@@ -0,0 +1,109 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file NametagManager.py
+
+"""
+
+from Nametag3d import Nametag3d
+
+
+class NametagManager:
+    """
+    Ticks every nametag from one task, instead of a task per nametag.
+
+    3D nametags that are hidden or outside of the camera's view aren't
+    touched at all, and the ones in view further than nametag-near-distance
+    from the camera are only updated every nametag-far-interval frames.
+    """
+
+    def __init__(self):
+        self.nearDistance = config.GetFloat('nametag-near-distance', 50.0)
+        self.farInterval = max(1, config.GetInt('nametag-far-interval', 4))
+
+        self.groups = []
+        self.nametags2d = []
+        self.nametags3d = []
+
+        # nametag -> the frame of farInterval it is updated on when it's far away.
+        self.slots = {}
+        self.nextSlot = 0
+        self.frame = 0
+
+        # Same sort as the tick tasks the nametags used to have.
+        self.task = taskMgr.add(self.__tickTask, 'nametagManager', sort=45)
+
+    def addGroup(self, group):
+        if group not in self.groups:
+            self.groups.append(group)
+
+    def removeGroup(self, group):
+        if group in self.groups:
+            self.groups.remove(group)
+
+    def addNametag(self, nametag):
+        if isinstance(nametag, Nametag3d):
+            if nametag in self.slots:
+                return
+            self.nametags3d.append(nametag)
+            self.slots[nametag] = self.nextSlot
+            self.nextSlot = (self.nextSlot + 1) % self.farInterval
+        elif nametag not in self.nametags2d:
+            self.nametags2d.append(nametag)
+
+    def removeNametag(self, nametag):
+        if nametag in self.slots:
+            self.nametags3d.remove(nametag)
+            del self.slots[nametag]
+        elif nametag in self.nametags2d:
+            self.nametags2d.remove(nametag)
+
+    def __tickTask(self, task):
+        self.frame += 1
+        farSlot = self.frame % self.farInterval
+        nearDistSq = self.nearDistance * self.nearDistance
+        cam = base.cam
+        camNode = cam.node()
+
+        # Iterate over copies, a tick can destroy a nametag.
+        for group in list(self.groups):
+            group.tick(camNode)
+
+        for nametag in list(self.nametags2d):
+            nametag.tick()
+
+        for nametag in list(self.nametags3d):
+            if nametag not in self.slots:
+                # Destroyed by an earlier tick this frame.
+                continue
+
+            contents = nametag.contents
+            if contents is None:
+                continue
+
+            camPos = contents.getPos(cam)
+            if contents.isHidden() or not camNode.isInView(camPos):
+                if nametag.inView:
+                    nametag.setInView(False)
+                continue
+
+            if not nametag.inView:
+                # Just came into view, bring it up to date right away.
+                nametag.setInView(True)
+            elif self.slots[nametag] != farSlot and camPos.lengthSquared() > nearDistSq:
+                # Far away, wait for its frame.
+                continue
+
+            nametag.tick(camPos)
+
+        return task.cont
+
+    def cleanup(self):
+        if self.task is not None:
+            self.task.remove()
+            self.task = None
+        self.groups = []
+        self.nametags2d = []
+        self.nametags3d = []
+        self.slots = {}
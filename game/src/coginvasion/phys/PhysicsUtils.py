@@ -115,9 +115,8 @@ def makeBulletCollFromGeoms(rootNode, exclusions = [], enableNow = True, world =
                     prim = geom.getPrimitive(j)
                     prim = prim.decompose()
                     tris = prim.getNumVertices() / 3
-                    for tidx in xrange(tris):
-                        data[numGeoms] = surfaceprop
-                        numGeoms += 1
+                    data.update(dict.fromkeys(xrange(numGeoms, numGeoms + tris), surfaceprop))
+                    numGeoms += tris
             shape = BulletTriangleMeshShape(mesh, False)
             rbnode = BulletRigidBodyNode(faceNp.getName() + "_bullet_type" + str(facetype))
             rbnode.setKinematic(True)
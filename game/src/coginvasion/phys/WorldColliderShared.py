@@ -13,7 +13,7 @@ class WorldColliderShared(NodePath):
                  offset = Point3(0), needSelfInArgs = False,
                  startNow = True, myMask = CIGlobals.EventGroup,
                  exclusions = [], resultInArgs = False, useSweep = False,
-                 world = None, initNp = True, useGhost = True):
+                 world = None, initNp = True, useGhost = True, manager = None):
 
         if self.WantNPInit:
             NodePath.__init__(self)
@@ -32,6 +32,9 @@ class WorldColliderShared(NodePath):
         if not world and hasattr(base, 'physicsWorld') and not self.IsAI:
             world = base.physicsWorld
         self.world = world
+        # If we have a manager, it steps us along with its other colliders
+        # instead of us running our own task.
+        self.manager = manager
         
         self.initialPos = Point3(0)
         self.lastPos = Point3(0)
@@ -73,13 +76,19 @@ class WorldColliderShared(NodePath):
         self.lastPos = self.initialPos
             
         self.world.attach(self.node())
-        self.task = taskMgr.add(self.tick, "WorldCollider.collisionTick" + str(id(self)))
+        if self.manager:
+            self.manager.addCollider(self)
+        else:
+            self.task = taskMgr.add(self.tick, "WorldCollider.collisionTick" + str(id(self)))
 
     def stop(self):
         if hasattr(self, 'task'):
             taskMgr.remove(self.task)
             del self.task
 
+        if getattr(self, 'manager', None):
+            self.manager.removeCollider(self)
+
         if hasattr(self, 'initialPos'):
             del self.initialPos
             del self.lastPos
@@ -97,12 +106,32 @@ class WorldColliderShared(NodePath):
             del self.event
         NodePath.removeNode(self)
 
+    def isExcluded(self, node):
+        if not self.__exclusions:
+            return False
+
+        nodeNp = NodePath(node)
+        for excl in self.__exclusions:
+            if excl.isAncestorOf(nodeNp) or excl == nodeNp:
+                return True
+        return False
+
     def bitsIntersecting(self, a, b):
         return not (a & b).isZero()
 
     def tick(self, task):
+        if self.step():
+            return task.cont
+        return task.done
+
+    def step(self):
+        """
+        Tests for a collision along the way we moved since the last step.
+        Returns False once we have collided with something (or have been removed).
+        """
+
         if self.isEmpty():
-            return task.done
+            return False
             
         currPos = self.getPos(render)
         
@@ -117,11 +146,9 @@ class WorldColliderShared(NodePath):
             if result.hasHit():
                 #print "has hit"
                 intoNode = result.getNode()
-                for excl in self.__exclusions:
-                    if excl.isAncestorOf(NodePath(intoNode)) or excl == NodePath(intoNode):
-                        #print "Collided with exclusion", excl
-                        intoNode = None
-                        break
+                if self.isExcluded(intoNode):
+                    #print "Collided with exclusion"
+                    intoNode = None
                 contact = result
             #else:
                 #print "no hit"
@@ -133,12 +160,7 @@ class WorldColliderShared(NodePath):
                     node = contact.getNode0()
                 if node.isOfType(BulletGhostNode.getClassType()):
                     continue
-                isExcluded = False
-                for excl in self.__exclusions:
-                    if excl.isAncestorOf(NodePath(node)) or excl == NodePath(node):
-                        isExcluded = True
-                        break
-                if isExcluded:
+                if self.isExcluded(node):
                     continue
                     
                 intoNode = node
@@ -149,7 +171,7 @@ class WorldColliderShared(NodePath):
         if intoNode is None:
             if currPos != self.lastPos:
                 self.lastPos = currPos
-            return task.cont
+            return True
         
         mask = intoNode.getIntoCollideMask()
         if self.bitsIntersecting(mask, self.mask):
@@ -163,9 +185,9 @@ class WorldColliderShared(NodePath):
                 self.onCollide(*args)
             for clbk in self.hitCallbacks:
                 clbk(*args)
-            return task.done
+            return False
             
         if currPos != self.lastPos:
             self.lastPos = currPos
             
-        return task.cont
+        return True
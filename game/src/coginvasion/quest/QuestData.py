@@ -19,13 +19,26 @@ Tracking Objective Index (-1 if n/a or value >= 0),
 Example: 0 <0,0,1,[30,50,0]>
 >
 
+Binary format (what we save and send now, the string format above is still read):
+
+MARKER (0xFF), VERSION (uint8)
+ACTIVE_QUEST_ID (int16)
+Number of quests (uint8), then for each quest:
+Quest ID (uint16), Current Objective Index (int8), Tracking Objective Index (int8),
+Number of accessible objectives (uint8), then the progress of each one (int16)
+
 """
 
+import struct
+
 BLOCK_OPENING_CHAR = '<'
 BLOCK_CLOSING_CHAR = '>'
 OBJECTIVE_BLOCK_OPENING_CHAR = '['
 OBJECTIVE_BLOCK_CLOSING_CHAR = ']'
 
+BINARY_MARKER = '\xff'
+BINARY_VERSION = 1
+
 def getDataBlock(stump):
     # Retrieves data enclosed in a < > block and returns it in a list as integers followed
     # by the index of the ending of the block.
@@ -41,34 +54,24 @@ def getDataBlock(stump):
     data.append(subStr[objBlockOpeningIndex+2:len(subStr)-1])
     return data, blockClosingIndex
 
+def isBinaryData(dataStr):
+    return dataStr[:1] == BINARY_MARKER
+
 def toDataStump(quests, trackingId = -1, currentObjectives = [], objectiveProgresses = []):
     # Generates a quest data stump for the quest data and returns it.
     # You can specify what the indexes of the current objectives with 'currentObjectives'; and
     # You can specify the progresses of each accessible objective in a list inside of 'objectiveProgresses'.
-    dataString = '%d ' % (trackingId)
+    quests = list(quests)
+    sections = [struct.pack('<cBhB', BINARY_MARKER, BINARY_VERSION, trackingId, len(quests))]
     
     for index, quest in enumerate(quests):
-        sectionString = '<%d,%d,%d,%s>'
-        objProgressStr = '['
-        
-        # This builds the string with the progress of each objective. Ex: [80,5,20]
+        # The progress of each objective. Ex: [80,5,20]
         if len(objectiveProgresses) == 0 or len(objectiveProgresses) > 0 and len(objectiveProgresses[index]) == 0:
             # Let's use the objective progress inside of the quest.
-            for i, objective in enumerate(quest.accessibleObjectives):
-                progress = objective.progress
-                
-                objProgressStr += str(progress)
-                if i < len(quest.accessibleObjectives) - 1:
-                    objProgressStr += ','
-
-            objProgressStr += ']'
+            objProgress = [objective.progress for objective in quest.accessibleObjectives]
         else:
             # Let's use the values given to us to use instead.
-            for i, progress in enumerate(objectiveProgresses[index]):
-                objProgressStr += str(progress)
-                if i < len(quest.accessibleObjectives) - 1:
-                    objProgressStr += ','
-            objProgressStr += ']'
+            objProgress = objectiveProgresses[index]
             
         # Current Objective Index to use
         curObjIndex = quest.currentObjectiveIndex
@@ -79,13 +82,32 @@ def toDataStump(quests, trackingId = -1, currentObjectives = [], objectiveProgre
         # This index is the position of the tracking objective relative to the accessible objectives collection.
         trackObjIndex = -1 if not quest.trackingObjective else quest.accessibleObjectives.index(quest.trackingObjective)
         
-        sectionString = sectionString % (quest.id,
-            curObjIndex, 
-            trackObjIndex,
-        objProgressStr)
-        
-        dataString += sectionString
-    return dataString, currentObjectives, objectiveProgresses
+        sections.append(struct.pack('<HbbB', quest.id, curObjIndex, trackObjIndex, len(objProgress)))
+        sections.append(struct.pack('<%dh' % len(objProgress), *objProgress))
+    return ''.join(sections), currentObjectives, objectiveProgresses
+
+def extractBinaryDataAsIntegerLists(dataStr, parseDataFunc = None):
+    # Same as extractDataAsIntegerLists(), for the binary format.
+    version = ord(dataStr[1])
+    if version != BINARY_VERSION:
+        raise ValueError("Unknown quest data version %d" % version)
+
+    questsData = []
+    activeQuestId, numQuests = struct.unpack_from('<hB', dataStr, 2)
+    offset = 5
+
+    for _ in xrange(numQuests):
+        questId, curObjIndex, trackObjIndex, numObjectives = struct.unpack_from('<HbbB', dataStr, offset)
+        offset += 5
+        objProgress = list(struct.unpack_from('<%dh' % numObjectives, dataStr, offset))
+        offset += numObjectives * 2
+
+        questData = [questId, curObjIndex, trackObjIndex, objProgress]
+        questsData.append(questData)
+
+        if not parseDataFunc is None:
+            parseDataFunc(questData)
+    return activeQuestId, questsData
 
 def extractDataAsIntegerLists(dataStr, parseDataFunc = None):
     # If passed the parse data function, it will call that on the integer list
@@ -93,6 +115,9 @@ def extractDataAsIntegerLists(dataStr, parseDataFunc = None):
     # Extracts data for quests from a string and returns the active quest id 
     # followed by a list of quest data with integers.
     # Objective progress is enclosed in an integer list within each quest's list.
+    if isBinaryData(dataStr):
+        return extractBinaryDataAsIntegerLists(dataStr, parseDataFunc)
+
     questsData = []
     activeQuestId = -1
     
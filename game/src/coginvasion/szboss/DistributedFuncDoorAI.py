@@ -75,6 +75,7 @@ class DistributedFuncDoorAI(DistributedEntityAI, FSM):
         
     def enterClosing(self):
         self.dispatchOutput("OnCloseStart")
+        self.__invalidatePaths()
         taskMgr.doMethodLater(self.moveDuration, self.__doorMoveDone, name = self.uniqueName('doorCloseTask'),
                               extraArgs = [DOORSTATE_CLOSED], appendTask = True)
     
@@ -83,6 +84,7 @@ class DistributedFuncDoorAI(DistributedEntityAI, FSM):
         
     def enterOpened(self):
         self.dispatchOutput("OnOpenFinish")
+        self.__invalidatePaths()
         if self.wait != -1:
             taskMgr.doMethodLater(self.wait, self.__doorMoveDone, name = self.uniqueName('doorOpenDone'),
                                   extraArgs = [DOORSTATE_CLOSING], appendTask = True)
@@ -90,6 +92,11 @@ class DistributedFuncDoorAI(DistributedEntityAI, FSM):
     def exitOpened(self):
         taskMgr.remove(self.uniqueName('doorOpenDone'))
         
+    def __invalidatePaths(self):
+        # Paths planned while we were open or closed may not be right anymore.
+        if hasattr(self.dispatch, 'invalidatePaths'):
+            self.dispatch.invalidatePaths()
+        
     def __doorMoveDone(self, nextState, task):
         self.b_setDoorState(nextState)
         return task.done
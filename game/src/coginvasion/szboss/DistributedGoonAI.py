@@ -18,23 +18,23 @@ import random
 
 class Task_GetRandomPath(BaseTaskAI):
     
-    def runTask(self):
+    def runTask(self, npc):
         attemps = 0
         
         path = []
-        pos = self.npc.getPos()
+        pos = npc.getPos()
         while len(path) < 2 and attemps < 10:
             # Pick a random point on a radius, walk to it, but make sure we can.
             radius = random.uniform(10, 30)
             dir = Vec3(random.uniform(-1, 1), random.uniform(-1, 1), 0)
             endPos = pos + (dir * radius)
-            path = self.npc.getBattleZone().planPath(pos, endPos)
+            path = npc.getBattleZone().planPath(pos, endPos)
             attemps += 1
             
         if len(path) < 2:
             return SCHED_FAILED
             
-        self.npc.getMotor().setWaypoints(path)
+        npc.getMotor().setWaypoints(path)
             
         return SCHED_COMPLETE
 
@@ -60,27 +60,32 @@ class DistributedGoonAI(DistributedEntityAI, DistributedAvatarAI, BaseNPCAI):
         self.activities = {ACT_WAKE_ANGRY   :   2.0,
                            ACT_DIE          :   -1,
                            ACT_GOON_SCAN    :   6.0}
-                           
-        self.schedules.update({
+        
+        self.brain = None
+        self.spawnflags = 0
+        
+        self.health = 25
+        self.maxHealth = 25
+        
+    @classmethod
+    def makeSchedules(cls):
+        schedules = BaseNPCAI.makeSchedules()
+        schedules.update({
             "SCAN_AREA" :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_GetRandomPath(self),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self),
-                    Task_SetActivity(self, ACT_GOON_SCAN),
-                    Task_AwaitActivity(self)
+                    Task_StopMoving(),
+                    Task_GetRandomPath(),
+                    Task_RunPath(),
+                    Task_AwaitMovement(),
+                    Task_SetActivity(ACT_GOON_SCAN),
+                    Task_AwaitActivity()
                 ],
                 interruptMask = COND_NEW_TARGET|COND_LIGHT_DAMAGE|COND_HEAVY_DAMAGE
             )
         
         })
         
-        self.brain = None
-        self.spawnflags = 0
-        
-        self.health = 25
-        self.maxHealth = 25
+        return schedules
         
     def takeDamage(self, dmgInfo):
         DistributedAvatarAI.takeDamage(self, dmgInfo)
@@ -14,11 +14,11 @@ from src.coginvasion.cog.ai.StatesAI import *
 
 class Task_FindBestHPBarrel(BaseTaskAI):
     
-    def runTask(self):
-        barrels = self.npc.dispatch.bspLoader.findAllEntities("item_laffbarrel")
+    def runTask(self, npc):
+        barrels = npc.dispatch.bspLoader.findAllEntities("item_laffbarrel")
         closestBarrel = None
         closest = 999999999
-        npcPos = self.npc.getPos()
+        npcPos = npc.getPos()
         for i in xrange(len(barrels)):
             barrel = barrels[i]
             len2 = (npcPos - barrel.getPos()).lengthSquared()
@@ -26,37 +26,31 @@ class Task_FindBestHPBarrel(BaseTaskAI):
                 closest = len2
                 closestBarrel = barrel
         if closestBarrel:
-            self.npc.hpBarrel = closestBarrel
+            npc.hpBarrel = closestBarrel
             return SCHED_COMPLETE
             
         return SCHED_FAILED
         
-class Task_GetPathToHPBarrel(BaseTaskAI):
+class Task_GetPathToHPBarrel(Task_GetPath):
     
-    def runTask(self):
-        if not self.npc.hpBarrel:
-            return SCHED_FAILED
-            
-        path = self.npc.getBattleZone().planPath(self.npc.getPos(), self.npc.hpBarrel.getPos())
-        if len(path) < 2:
-            return SCHED_FAILED
-
-        self.npc.getMotor().setWaypoints(path)
-        return SCHED_COMPLETE
+    def getGoal(self, npc):
+        if not npc.hpBarrel:
+            return None
+        return npc.hpBarrel.getPos()
         
 class Task_GrabHPBarrel(BaseTaskAI):
     
-    def runTask(self):
-        if not self.npc.hpBarrel:
+    def runTask(self, npc):
+        if not npc.hpBarrel:
             return SCHED_FAILED
             
-        self.npc.hpBarrel.requestGrab(self.npc.doId)
+        npc.hpBarrel.requestGrab(npc.doId)
         return SCHED_COMPLETE
         
 class Task_ClearHPBarrel(BaseTaskAI):
     
-    def runTask(self):
-        self.npc.hpBarrel = None
+    def runTask(self, npc):
+        npc.hpBarrel = None
         return SCHED_COMPLETE
 
 class DistributedSZBossToonAI(DistributedEntityAI, DistributedToonAI, BaseNPCAI):
@@ -74,40 +68,45 @@ class DistributedSZBossToonAI(DistributedEntityAI, DistributedToonAI, BaseNPCAI)
         self.died = False
         
         self.hpBarrel = None
-        
-        self.schedules.update({
+
+    @classmethod
+    def makeSchedules(cls):
+        schedules = BaseNPCAI.makeSchedules()
+        schedules.update({
         
             "GET_HP_FROM_BARREL"    :   Schedule(
                 [
-                    Task_StopMoving(self),
-                    Task_StopAttack(self),
-                    Task_RememberPosition(self), # remember where we were, we will return there after grabbing some HP
-                    Task_FindBestHPBarrel(self),
-                    Task_GetPathToHPBarrel(self),
-                    Task_Speak(self, 0.5, ["I need more Laff points.", "I'm grabbing a Laff barrel!",
-                                           "Hang on, I need this Laff barrel.", "I need Laff!"]),
-                    Task_RunPath(self),
-                    Task_AwaitMovement(self),
-                    Task_GrabHPBarrel(self),
-                    Task_ClearHPBarrel(self),
-                    Task_SetSchedule(self, "RETURN_TO_MEMORY_POSITION")
+                    Task_StopMoving(),
+                    Task_StopAttack(),
+                    Task_RememberPosition(), # remember where we were, we will return there after grabbing some HP
+                    Task_FindBestHPBarrel(),
+                    Task_GetPathToHPBarrel(),
+                    Task_Speak(0.5, ["I need more Laff points.", "I'm grabbing a Laff barrel!",
+                                     "Hang on, I need this Laff barrel.", "I need Laff!"]),
+                    Task_RunPath(),
+                    Task_AwaitMovement(),
+                    Task_GrabHPBarrel(),
+                    Task_ClearHPBarrel(),
+                    Task_SetSchedule("RETURN_TO_MEMORY_POSITION")
                 ],
                 interruptMask = COND_HEAVY_DAMAGE
             )
         
         })
+        
+        return schedules
 
     def setNPCState(self, state):
         if state != self.npcState:
             if state == STATE_COMBAT:
                 # Speak when entering combat state
-                task_oneOff(Task_Speak(self, 0.5, ["We've got trouble!",
-                                                   "Grab your pies!",
-                                                  "Who called these guys?",
-                                                  "Gear up!",
-                                                  "I'm SO scared!",
-                                                  "Bring it on!",
-                                                  "Special delivery!"]))
+                task_oneOff(Task_Speak(0.5, ["We've got trouble!",
+                                             "Grab your pies!",
+                                             "Who called these guys?",
+                                             "Gear up!",
+                                             "I'm SO scared!",
+                                             "Bring it on!",
+                                             "Special delivery!"]), self)
 
         BaseNPCAI.setNPCState(self, state)
 
@@ -126,10 +125,10 @@ class DistributedSZBossToonAI(DistributedEntityAI, DistributedToonAI, BaseNPCAI)
 
         if self.npcState == STATE_COMBAT:
             if self.hasConditions(COND_TARGET_DEAD):
-                task_oneOff(Task_Speak(self, 0.25, ["Got one!", "Take that!",
-                                                    "Piece of cake!",
-                                                    "That's going to leave a mark!",
-                                                    "Rock and roll!"]))
+                task_oneOff(Task_Speak(0.25, ["Got one!", "Take that!",
+                                              "Piece of cake!",
+                                              "That's going to leave a mark!",
+                                              "Rock and roll!"]), self)
         
         if ((self.target and self.getHealthPercentage() <= self.LOW_HP_PERCT) or
             (not self.target and self.hasConditions(COND_LIGHT_DAMAGE|COND_HEAVY_DAMAGE))):
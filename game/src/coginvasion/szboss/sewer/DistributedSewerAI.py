@@ -25,10 +25,9 @@ class DistributedSewerAI(DistributedBattleZoneAI):
         self.setAvatars([avId])
         self.suits = []
         
-    def generate(self):
-        DistributedBattleZoneAI.generate(self)
+    def linkServerEntities(self, bspLoader):
+        DistributedBattleZoneAI.linkServerEntities(self, bspLoader)
         
-        # Link up networked entities
         from src.coginvasion.szboss import (DistributedIndicatorLightAI,
                                             DistributedSZBossSuitAI, DistributedCutsceneAI, DistributedGoonAI,
                                             DistributedGeneratorAI,
@@ -36,15 +35,15 @@ class DistributedSewerAI(DistributedBattleZoneAI):
         from src.coginvasion.cogoffice.AIEntities import (SuitSpawn)
         from src.coginvasion.battle.DistributedHPBarrelAI import DistributedHPBarrelAI
         from src.coginvasion.battle.DistributedGagBarrelAI import DistributedGagBarrelAI
-        #self.bspLoader.linkServerEntityToClass("npc_goon",              DistributedGoonAI.DistributedGoonAI)
-        self.bspLoader.linkServerEntityToClass("npc_suit",              DistributedSZBossSuitAI.DistributedSZBossSuitAI)
-        self.bspLoader.linkServerEntityToClass("info_cutscene",         DistributedCutsceneAI.DistributedCutsceneAI)
-        self.bspLoader.linkServerEntityToClass("info_indicator_light",  DistributedIndicatorLightAI.DistributedIndicatorLightAI)
-        self.bspLoader.linkServerEntityToClass("func_generator",        DistributedGeneratorAI.DistributedGeneratorAI)
-        self.bspLoader.linkServerEntityToClass("npc_toon",              DistributedSZBossToonAI.DistributedSZBossToonAI)
-        self.bspLoader.linkServerEntityToClass("cogoffice_suitspawn",   SuitSpawn)
-        self.bspLoader.linkServerEntityToClass("item_gagbarrel",            DistributedGagBarrelAI)
-        self.bspLoader.linkServerEntityToClass("item_laffbarrel",           DistributedHPBarrelAI)
+        #bspLoader.linkServerEntityToClass("npc_goon",              DistributedGoonAI.DistributedGoonAI)
+        bspLoader.linkServerEntityToClass("npc_suit",              DistributedSZBossSuitAI.DistributedSZBossSuitAI)
+        bspLoader.linkServerEntityToClass("info_cutscene",         DistributedCutsceneAI.DistributedCutsceneAI)
+        bspLoader.linkServerEntityToClass("info_indicator_light",  DistributedIndicatorLightAI.DistributedIndicatorLightAI)
+        bspLoader.linkServerEntityToClass("func_generator",        DistributedGeneratorAI.DistributedGeneratorAI)
+        bspLoader.linkServerEntityToClass("npc_toon",              DistributedSZBossToonAI.DistributedSZBossToonAI)
+        bspLoader.linkServerEntityToClass("cogoffice_suitspawn",   SuitSpawn)
+        bspLoader.linkServerEntityToClass("item_gagbarrel",            DistributedGagBarrelAI)
+        bspLoader.linkServerEntityToClass("item_laffbarrel",           DistributedHPBarrelAI)
         
     def delete(self):
         self.avId = None
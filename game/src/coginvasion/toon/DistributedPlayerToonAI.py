@@ -22,6 +22,7 @@ from src.coginvasion.gags import GagGlobals
 from src.coginvasion.hood import ZoneUtil
 from src.coginvasion.distributed import AdminCommands
 from src.coginvasion.tutorial.DistributedTutorialAI import DistributedTutorialAI
+from WriteBehindFieldsAI import WriteBehindFields
 from DistributedPlayerToonShared import DistributedPlayerToonShared
 import ToonDNA
 import types
@@ -38,6 +39,9 @@ class DistributedPlayerToonAI(DistributedToonAI, DistributedPlayerToonShared):
         DistributedToonAI.__init__(self, air)
         DistributedPlayerToonShared.__init__(self)
         self.questManager = QuestManagerAI(self)
+        # Quests, backpack ammo and track experience change all the time in
+        # battle, don't save them on every change.
+        self.writeBehind = WriteBehindFields(self)
         self.money = 0
         self.portal = None
         self.book = None
@@ -308,7 +312,7 @@ class DistributedPlayerToonAI(DistributedToonAI, DistributedPlayerToonShared):
         self.questManager.makeQuestsFromData()
 
     def d_setQuests(self, dataStr):
-        self.sendUpdate('setQuests', [dataStr])
+        self.writeBehind.sendUpdate('setQuests', [dataStr])
 
     def b_setQuests(self, questData):
         self.d_setQuests(questData)
@@ -514,7 +518,7 @@ class DistributedPlayerToonAI(DistributedToonAI, DistributedPlayerToonShared):
         self.d_setBackpackAmmo(netString)
         
     def d_setBackpackAmmo(self, netString):
-        self.sendUpdate('setBackpackAmmo', [netString])
+        self.writeBehind.sendUpdate('setBackpackAmmo', [netString])
         
     def getBackpackAmmo(self):
         if self.backpack:
@@ -528,7 +532,7 @@ class DistributedPlayerToonAI(DistributedToonAI, DistributedPlayerToonShared):
         GagGlobals.processTrackData(self.trackExperience, self.backpack, isAI = True)
         
     def d_setTrackExperience(self, netString):
-        self.sendUpdate('setTrackExperience', [netString])
+        self.writeBehind.sendUpdate('setTrackExperience', [netString])
         
     def b_setTrackExperience(self, netString):
         self.setTrackExperience(netString)
@@ -557,6 +561,14 @@ class DistributedPlayerToonAI(DistributedToonAI, DistributedPlayerToonShared):
             return GAG_START_EVENT.format(self.doId)
         return None
 
+    def flushDBFields(self):
+        """Saves our held back quest, backpack and experience updates now."""
+        self.writeBehind.flush()
+
+    def handleLogicalZoneChange(self, newZoneId, oldZoneId):
+        self.flushDBFields()
+        DistributedToonAI.handleLogicalZoneChange(self, newZoneId, oldZoneId)
+
     def announceGenerate(self):
         DistributedToonAI.announceGenerate(self)
         if self.parentId != self.getDefaultShard():
@@ -568,6 +580,11 @@ class DistributedPlayerToonAI(DistributedToonAI, DistributedPlayerToonShared):
         except:
             self.DistributedPlayerToonAI_deleted = 1
             DistributedPlayerToonShared.delete(self)
+            # We're logging out or the AI is going down, the state server
+            # might not have us anymore.
+            self.writeBehind.flushToDatabase()
+            self.writeBehind.cleanup()
+            self.writeBehind = None
             self.questManager.cleanup()
             self.questManager = None
             self.money = None
@@ -591,6 +608,7 @@ class DistributedPlayerToonAI(DistributedToonAI, DistributedPlayerToonShared):
             self.lastHood = None
             self.defaultShard = None
             self.trackExperience = None
+            del self.writeBehind
             del self.questManager
             del self.money
             del self.portal
@@ -111,7 +111,7 @@ class DistributedToonAI(DistributedAvatarAI, ToonDNA.ToonDNA):
         self.setDNAStrand(strand)
         
     def d_setDNAStrand(self, strand):
-        self.sendUpdate('setDNAStrand', [strand])
+        self.sendUpdate('setDNAStrand', [ToonDNA.makeBinaryStrand(strand)])
 
     def setLookMode(self, mode):
         self.lookMode = mode
@@ -12,11 +12,44 @@ from panda3d.core import LVecBase4f
 
 from direct.directnotify.DirectNotifyGlobal import directNotify
 
+import struct
 import types
 from pprint import _id
 
 from src.coginvasion.npc.NPCGlobals import NPC_DNA
 
+# DNA strands are saved and sent as a marker, the version of the layout, and
+# a byte for each of the two digit parts of the "00/01/..." text strand.
+# Text strands are still understood, so toons that were saved with one load
+# just fine and are saved with a binary strand the next time their DNA changes.
+BinaryStrandMarker = '\xff'
+BinaryStrandVersion = 1
+NumStrandParts = 13
+
+def isBinaryStrand(dnaStrand):
+    return dnaStrand[:1] == BinaryStrandMarker
+
+def makeBinaryStrand(dnaStrand):
+    """Returns the binary form of a text DNA strand."""
+
+    if isBinaryStrand(dnaStrand):
+        return dnaStrand
+    parts = [int(part) for part in dnaStrand.split('/')]
+    if len(parts) != NumStrandParts:
+        raise ValueError("DNA strand %s has %d parts" % (dnaStrand, len(parts)))
+    return struct.pack('<cB%dB' % len(parts), BinaryStrandMarker, BinaryStrandVersion, *parts)
+
+def getStrandParts(dnaStrand):
+    """Returns the two digit parts of a text or binary DNA strand."""
+
+    if not isBinaryStrand(dnaStrand):
+        return dnaStrand.split('/')
+
+    version = ord(dnaStrand[1])
+    if version != BinaryStrandVersion:
+        raise ValueError("Unknown DNA strand version %d" % version)
+    return ['%02d' % part for part in struct.unpack_from('<%dB' % NumStrandParts, dnaStrand, 2)]
+
 # Beta outfit shirt: 137, shorts: 59
 
 class ToonDNA:
@@ -3715,8 +3748,12 @@ class ToonDNA:
         return self.gloveColor
 
     def setDNAStrand(self, dnaStrand):
+        dnaParts = getStrandParts(dnaStrand)
+        if isBinaryStrand(dnaStrand):
+            # We always keep the text strand.
+            dnaStrand = '/'.join(dnaParts)
         self.dnaStrand = dnaStrand
-        self.parseDNAStrand(dnaStrand)
+        self.parseDNAParts(dnaParts, dnaStrand)
 
     def getDNAStrand(self):
         return self.dnaStrand
@@ -3759,7 +3796,9 @@ class ToonDNA:
         self.setDNAStrand(strand)
 
     def parseDNAStrand(self, dnaStrand):
-        dnaParts = dnaStrand.split('/')
+        self.parseDNAParts(getStrandParts(dnaStrand), dnaStrand)
+
+    def parseDNAParts(self, dnaParts, dnaStrand):
         strandLength = len(dnaParts) * 2
         isString = type(dnaStrand) is types.StringType
         if (strandLength >= self.requiredStrandLength and isString):
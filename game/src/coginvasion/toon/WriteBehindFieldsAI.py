@@ -0,0 +1,104 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file WriteBehindFieldsAI.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+from collections import OrderedDict
+
+class WriteBehindFields:
+    """
+    Holds back updates to db fields of a distributed object that change often,
+    like quest progress and gag ammo, so the database isn't written on every
+    single change.
+
+    An update is sent to the object's owner right away, which doesn't go
+    through the state server or the database. Only the latest value of each
+    field is kept, and they are all sent out for real (broadcast and saved)
+    when we flush: ai-db-flush-interval seconds after the first held back
+    update, or sooner if the owner calls flush(), e.g. when the avatar
+    changes zones or a battle ends.
+
+    When the object is going away, flushToDatabase() writes whatever is left
+    straight to the database.
+    """
+
+    notify = directNotify.newCategory("WriteBehindFields")
+
+    def __init__(self, distObj, flushInterval = None):
+        if flushInterval is None:
+            flushInterval = config.GetFloat('ai-db-flush-interval', 30.0)
+
+        self.distObj = distObj
+        self.flushInterval = flushInterval
+
+        # fieldName -> args, in the order they were first changed
+        self.dirty = OrderedDict()
+
+        self.task = None
+
+    def __getTaskName(self):
+        return "writeBehindFlush-" + str(self.distObj.doId)
+
+    def isDirty(self):
+        return len(self.dirty) > 0
+
+    def sendUpdate(self, fieldName, args):
+        if self.flushInterval <= 0:
+            # Write-behind is turned off.
+            self.distObj.sendUpdate(fieldName, args)
+            return
+
+        self.dirty[fieldName] = args
+        self.distObj.sendUpdateToAvatarId(self.distObj.doId, fieldName, args)
+
+        if not self.task:
+            self.task = taskMgr.doMethodLater(self.flushInterval, self.__flushTask, self.__getTaskName())
+
+    def __flushTask(self, task):
+        self.task = None
+        self.flush()
+        return task.done
+
+    def __stopTask(self):
+        if self.task:
+            self.task.remove()
+            self.task = None
+
+    def flush(self):
+        """Broadcasts and saves every held back field."""
+
+        self.__stopTask()
+        if not self.isDirty():
+            return
+
+        dirty = self.dirty
+        self.dirty = OrderedDict()
+        for fieldName, args in dirty.iteritems():
+            self.distObj.sendUpdate(fieldName, args)
+
+    def flushToDatabase(self):
+        """
+        Writes every held back field straight to the database. Use this when
+        the object is being deleted, the state server may not have it anymore.
+        """
+
+        self.__stopTask()
+        if not self.isDirty():
+            return
+
+        distObj = self.distObj
+        fields = dict(self.dirty)
+        self.dirty = OrderedDict()
+
+        self.notify.debug("Saving %s for %d" % (fields.keys(), distObj.doId))
+        distObj.air.dbInterface.updateObject(distObj.air.dbId, distObj.doId, distObj.dclass, fields)
+
+    def cleanup(self):
+        self.__stopTask()
+        self.dirty = None
+        self.distObj = None
@@ -0,0 +1,167 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file AccountStore.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+import anydbm
+import whichdb
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+class AccountStore:
+    """
+    Maps the usernames that people log in with to their account object ids.
+
+    A new account is on disk by the time storeAccount() returns, so the
+    account object it points to can't be lost if we go down right after.
+    """
+
+    notify = directNotify.newCategory("AccountStore")
+
+    def getAccountId(self, username):
+        """Returns the account id of `username`, or 0 if they don't have an account."""
+        return 0
+
+    def getUsername(self, accountId):
+        """Returns the username of `accountId`, or None if we don't know it."""
+        return None
+
+    def hasAccount(self, username):
+        return self.getAccountId(username) != 0
+
+    def storeAccount(self, username, accountId):
+        pass
+
+    def getAllAccounts(self):
+        """Returns a list of (username, accountId)."""
+        return []
+
+    def close(self):
+        pass
+
+class DbmAccountStore(AccountStore):
+    """The old account bridge, an anydbm file that is synced on every new account."""
+
+    notify = directNotify.newCategory("DbmAccountStore")
+
+    def __init__(self, filename):
+        self.dbm = anydbm.open(filename, 'c')
+
+    def getAccountId(self, username):
+        return int(self.dbm.get(str(username), 0))
+
+    def getUsername(self, accountId):
+        accountId = str(accountId)
+        for username in self.dbm.keys():
+            if self.dbm[username] == accountId:
+                return username
+        return None
+
+    def storeAccount(self, username, accountId):
+        self.dbm[str(username)] = str(accountId)
+        if getattr(self.dbm, 'sync', None):
+            self.dbm.sync()
+
+    def getAllAccounts(self):
+        return [(username, int(self.dbm[username])) for username in self.dbm.keys()]
+
+    def close(self):
+        if self.dbm is not None:
+            self.dbm.close()
+            self.dbm = None
+
+class SQLiteAccountStore(AccountStore):
+    """
+    Keeps the accounts in an SQLite database in WAL mode, indexed by username
+    and by account id.
+
+    Each new account is committed on its own. Only the accounts moved over
+    from the old account bridge are committed together, in one transaction.
+    """
+
+    notify = directNotify.newCategory("SQLiteAccountStore")
+
+    def __init__(self, filename):
+        self.db = sqlite3.connect(filename)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL mode is still crash safe with NORMAL, it just doesn't fsync every commit.
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS accounts ("
+                        "username TEXT PRIMARY KEY, "
+                        "accountId INTEGER NOT NULL UNIQUE)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    def getAccountId(self, username):
+        row = self.db.execute("SELECT accountId FROM accounts WHERE username = ?", (str(username),)).fetchone()
+        if row:
+            return row[0]
+        return 0
+
+    def getUsername(self, accountId):
+        row = self.db.execute("SELECT username FROM accounts WHERE accountId = ?", (int(accountId),)).fetchone()
+        if row:
+            return str(row[0])
+        return None
+
+    def storeAccount(self, username, accountId):
+        self.db.execute("INSERT OR REPLACE INTO accounts (username, accountId) VALUES (?, ?)",
+                        (str(username), int(accountId)))
+        self.db.commit()
+
+    def getAllAccounts(self):
+        return [(str(username), accountId) for username, accountId in
+                self.db.execute("SELECT username, accountId FROM accounts")]
+
+    def migrateDbmAccounts(self, dbmFilename):
+        """Copies the accounts of the old anydbm account bridge in, once."""
+
+        if self.db.execute("SELECT value FROM meta WHERE key = 'dbmMigrated'").fetchone():
+            return
+
+        numAccounts = 0
+        if whichdb.whichdb(dbmFilename):
+            dbm = anydbm.open(dbmFilename, 'r')
+            accounts = [(str(username), int(dbm[username])) for username in dbm.keys()]
+            dbm.close()
+            self.db.executemany("INSERT OR REPLACE INTO accounts (username, accountId) VALUES (?, ?)", accounts)
+            numAccounts = len(accounts)
+
+        # This goes in the same commit as the accounts.
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dbmMigrated', '1')")
+        self.db.commit()
+
+        if numAccounts > 0:
+            self.notify.info("Moved %d accounts over from %s." % (numAccounts, dbmFilename))
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+def makeAccountStore():
+    """Makes the account store that the config asks for."""
+
+    backend = config.GetString('account-store-backend', 'sqlite')
+    dbmFilename = config.GetString('account-bridge-filename', 'astron/databases/account-bridge.db')
+
+    if backend == 'sqlite':
+        if sqlite3 is None:
+            AccountStore.notify.warning("sqlite3 isn't available, using the anydbm account bridge.")
+        else:
+            filename = config.GetString('account-store-filename', 'astron/databases/accounts.sqlite')
+            store = SQLiteAccountStore(filename)
+            store.migrateDbmAccounts(dbmFilename)
+            return store
+    elif backend != 'dbm':
+        AccountStore.notify.warning("Unknown account-store-backend %s, using the anydbm account bridge." % backend)
+
+    return DbmAccountStore(dbmFilename)
@@ -0,0 +1,131 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file AvatarSummaryCacheUD.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+from collections import OrderedDict
+
+class AvatarSummary:
+    """The fields of a toon that are shown on the pick-a-toon screen and in friends lists."""
+
+    def __init__(self, avId, fields):
+        self.avId = avId
+        self.accountId = fields.get('ACCOUNT', None)
+        self.name = fields['setName'][0]
+        self.dnaStrand = fields['setDNAStrand'][0]
+        self.lastHood = fields['setLastHood'][0]
+        self.accessLevel = fields['setAccessLevel'][0]
+
+class AvatarSummaryCache:
+    """
+    Keeps summaries of toons, so listing the toons on an account or a friends
+    list doesn't have to query the database for every toon every time.
+
+    A toon's summary can only change while it is being played, so we don't
+    cache toons that are online, and throw away a toon's summary when it
+    comes online. Toons that were asked for at the same time are queried
+    from the database once.
+    """
+
+    notify = directNotify.newCategory("AvatarSummaryCache")
+
+    def __init__(self, air, maxSize = None):
+        if maxSize is None:
+            maxSize = config.GetInt('avatar-summary-cache-size', 5000)
+
+        self.air = air
+        self.maxSize = maxSize
+
+        # avId -> AvatarSummary, least recently used first
+        self.summaries = OrderedDict()
+
+        # avId -> [callback], toons we are waiting on the database for
+        self.pending = {}
+
+        # Toons that changed while we were waiting on the database for them,
+        # what we get back might already be out of date.
+        self.stale = set()
+
+        # Toons that are being played.
+        self.online = set()
+
+        self.air.netMessenger.accept('avatarOnline', self, self.setAvatarOnline)
+        self.air.netMessenger.accept('avatarOffline', self, self.setAvatarOffline)
+
+    def setAvatarOnline(self, avId):
+        self.online.add(avId)
+        self.invalidate(avId)
+
+    def setAvatarOffline(self, avId):
+        self.online.discard(avId)
+        self.invalidate(avId)
+
+    def invalidate(self, avId):
+        """Throws away the summary of `avId`, call this when one of its summary fields changes."""
+
+        self.summaries.pop(avId, None)
+        if avId in self.pending:
+            self.stale.add(avId)
+
+    def getSummary(self, avId):
+        """Returns the summary of `avId` if we have it, without querying for it."""
+
+        summary = self.summaries.get(avId)
+        if summary is not None:
+            # Move it to the back, it was just used.
+            del self.summaries[avId]
+            self.summaries[avId] = summary
+        return summary
+
+    def querySummary(self, avId, callback):
+        """
+        Calls `callback` with the AvatarSummary of `avId`, or None if it isn't
+        a toon. It is called right away if we have the summary.
+        """
+
+        summary = self.getSummary(avId)
+        if summary is not None:
+            callback(summary)
+            return
+
+        callbacks = self.pending.get(avId)
+        if callbacks is not None:
+            # Someone already asked for this toon.
+            callbacks.append(callback)
+            return
+
+        self.pending[avId] = [callback]
+        self.air.dbInterface.queryObject(self.air.dbId, avId,
+                                         lambda dclass, fields: self.__handleQueryResp(avId, dclass, fields))
+
+    def __handleQueryResp(self, avId, dclass, fields):
+        callbacks = self.pending.pop(avId, [])
+        stale = avId in self.stale
+        self.stale.discard(avId)
+
+        summary = None
+        if dclass == self.air.dclassesByName['DistributedPlayerToonUD']:
+            summary = AvatarSummary(avId, fields)
+            if not stale and avId not in self.online:
+                self.summaries[avId] = summary
+                while len(self.summaries) > self.maxSize:
+                    self.summaries.popitem(last = False)
+        else:
+            self.notify.warning("Queried avatar %d and got back something that isn't a toon." % avId)
+
+        for callback in callbacks:
+            callback(summary)
+
+    def cleanup(self):
+        self.air.netMessenger.ignore('avatarOnline', self)
+        self.air.netMessenger.ignore('avatarOffline', self)
+        self.summaries = None
+        self.pending = None
+        self.stale = None
+        self.online = None
+        self.air = None
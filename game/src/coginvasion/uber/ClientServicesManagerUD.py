@@ -17,9 +17,11 @@ from direct.directnotify.DirectNotifyGlobal import directNotify
 from src.coginvasion.gags import GagGlobals
 from src.coginvasion.distributed import AdminCommands
 from src.coginvasion.hood import ZoneUtil
+from src.coginvasion.toon import ToonDNA
 from panda3d.core import NetDatagram
-import anydbm
+from AccountStore import makeAccountStore
 import os
+import struct
 
 class CreateToonProcess:
     notify = directNotify.newCategory("CreateToonProcess")
@@ -126,12 +128,14 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
 
     def __init__(self, air):
         DistributedObjectGlobalUD.__init__(self, air)
-        filename = base.config.GetString('account-bridge-filename',
-                    'astron/databases/account-bridge.db')
-        self.dbm = anydbm.open(filename, 'c')
+        self.accountStore = makeAccountStore()
         self.private__dg = PyDatagram()
         return
 
+    def delete(self):
+        self.accountStore.close()
+        DistributedObjectGlobalUD.delete(self)
+
     def giveClientOwnershipOfObject(self, context, accId, doId, dclassNum):
         print "CSM: giveClientOwnershipOfObject:", context, accId, doId
         sender = self.air.getMsgSender()
@@ -160,14 +164,9 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
         self.notify.info("Fields %s" % fields)
 
         def storeAccountID(accountId):
-            self.dbm[str(username)] = str(accountId)
             self.notify.info("storing id...")
-            if getattr(self.dbm, 'sync', None):
-                self.dbm.sync()
-                self.notify.info("synced db file.")
-            else:
-                self.notify.warning("failed to store an account id in the database.")
-                return
+            # The account is on disk before they're logged in to it.
+            self.accountStore.storeAccount(username, accountId)
             self.setAccount(sender, accountId)
 
         def handleCreate(accountId):
@@ -335,6 +334,9 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
         dg.addUint32(doId)
         self.air.send(dg)
 
+        # Its summary may have changed while it was being played.
+        self.air.avatarSummaryCache.setAvatarOffline(doId)
+
         # Tell the friends manager a toon has gone offline.
         #self.__handleToonOffline(doId)
 
@@ -372,9 +374,9 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
             self.air.eject(sender, EC_BAD_TOKEN, 'I have rejected your token.')
             return
 
-        accountId = int(self.dbm.get(str(username), 0))
+        accountId = self.accountStore.getAccountId(username)
 
-        if str(username) not in self.dbm:
+        if not accountId:
             self.createAccount(username, accountId, sender)
             self.notify.info("Creating a new account...")
         else:
@@ -413,18 +415,34 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
                     accountResp)
 
     def queryToons(self, accFields, accId):
+        sender = self.GetAccountConnectionChannel(accId)
+
+        # We already have the account, check if it's banned before going any further.
+        if accFields.get("BANNED") == 1:
+            self.air.eject(sender, 0, 'You are banned.')
+            return
+        elif accFields.get("BANNED", None) is None:
+            self.air.dbInterface.updateObject(
+                self.air.dbId,
+                accId,
+                self.air.dclassesByName['AccountUD'],
+                {"BANNED": 0})
+
         collectedAvatars = []
-        pendingAvatars = set()
-        avId = 0
+        pendingAvatars = set(avId for avId in accFields['AVATAR_IDS'] if avId != 0)
 
-        for avId in accFields['AVATAR_IDS']:
-            if avId != 0:
-                pendingAvatars.add(avId)
+        if not pendingAvatars:
+            self.sendToons(collectedAvatars, accId)
+            return
+
+        # The summaries of toons that were played recently are cached, the
+        # rest are all queried at once.
+        for avId in list(pendingAvatars):
 
-                def toonResponse(dclass, fields, avId=avId):
-                    if dclass != self.air.dclassesByName['DistributedPlayerToonUD']:
-                        return
-                    if fields.get('ACCOUNT', None) is None:
+            def toonResponse(summary, avId=avId):
+                pendingAvatars.discard(avId)
+                if summary is not None:
+                    if summary.accountId is None:
                         print "No field ACCOUNT in this toon, I'll add it for you."
                         self.air.dbInterface.updateObject(
                             self.air.dbId,
@@ -432,36 +450,15 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
                             self.air.dclassesByName['DistributedPlayerToonUD'],
                             {"ACCOUNT": accId}
                         )
-                    collectedAvatars.append([avId, fields['setDNAStrand'][0],
-                            fields['setName'][0],
+                        summary.accountId = accId
+                    collectedAvatars.append([avId, summary.dnaStrand,
+                            summary.name,
                             accFields['AVATAR_IDS'].index(avId),
-                            fields['setLastHood'][0]])
-                    pendingAvatars.remove(avId)
-                    if not pendingAvatars:
-                        self.sendToons(collectedAvatars, accId)
-
-                self.air.dbInterface.queryObject(
-                        self.air.dbId, avId,
-                        toonResponse)
+                            summary.lastHood])
+                if not pendingAvatars:
+                    self.sendToons(collectedAvatars, accId)
 
-        if not pendingAvatars:
-            self.sendToons(collectedAvatars, accId)
-
-        sender = self.GetAccountConnectionChannel(accId)
-
-        def checkAccountBanStatus(dclass, fields):
-            if dclass != self.air.dclassesByName['AccountUD']:
-                return
-            if fields.get("BANNED") == 1:
-                self.air.eject(sender, 0, 'You are banned.')
-            elif fields.get("BANNED", None) is None:
-                self.air.dbInterface.updateObject(
-                    self.air.dbId,
-                    accId,
-                    self.air.dclassesByName['AccountUD'],
-                    {"BANNED": 0})
-
-        self.queryAccount(accId, checkAccountBanStatus)
+            self.air.avatarSummaryCache.querySummary(avId, toonResponse)
 
     def sendToons(self, avs, accId):
         print avs
@@ -484,6 +481,7 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
                 self.notify.warning("Failed to delete toon on the account database!")
                 return
             self.notify.info("account fields update finished, deleting toon database file...")
+            self.air.avatarSummaryCache.invalidate(avId)
             # Finally, delete the toon database file.
             os.remove("astron/databases/astrondb/" + str(avId) + ".yaml")
             callback()
@@ -519,10 +517,18 @@ class ClientServicesManagerUD(DistributedObjectGlobalUD):
         self.queryAccount(accountId, accountResp)
 
     def requestNewAvatar(self, dna, slot, name, skipTutorial = 1):
-        choice = [dna, slot, name, skipTutorial]
         accountId = self.air.getAccountIdFromSender()
         sender = self.air.getMsgSender()
 
+        # New toons are saved with a binary DNA strand.
+        try:
+            dna = ToonDNA.makeBinaryStrand(dna)
+        except (ValueError, struct.error):
+            self.notify.warning("Account %d sent a bad DNA strand for their new toon." % accountId)
+            return
+
+        choice = [dna, slot, name, skipTutorial]
+
         CreateToonProcess(choice, accountId, sender, self)
 
     def requestSetAvatar(self, avId):
@@ -14,7 +14,9 @@ from src.coginvasion.distributed.DistributedRootAI import DistributedRootAI
 from src.coginvasion.distributed.CogInvasionDoGlobals import *
 from direct.distributed.ParentMgr import ParentMgr
 from LoginToken import LoginToken
+from LoginTokenStore import LoginTokenStore
 from LoginServerConnection import LoginServerConnection
+from AvatarSummaryCacheUD import AvatarSummaryCache
 
 STORE_LOGIN_TOKEN = 100
 DEFAULT_LOGIN_TOKEN_LIFE = 300
@@ -27,10 +29,11 @@ class CogInvasionUberRepository(CogInvasionInternalRepository):
         CogInvasionInternalRepository.__init__(self, baseChannel, serverId,
                     ['resources/phase_3/etc/direct.dc', 'resources/phase_3/etc/toon.dc'], dcSuffix='UD')
         self.notify.setInfo(True)
-        self.activeTokens = []
+        self.tokenStore = LoginTokenStore(self.getActiveTokenLength())
         self.parentMgr = ParentMgr()
         self.holiday = 0
         self.loginServerConn = None
+        self.avatarSummaryCache = None
 
     def getParentMgr(self, zone):
         return self.parentMgr
@@ -50,68 +53,29 @@ class CogInvasionUberRepository(CogInvasionInternalRepository):
 
     # Validate a login token.
     def isValidToken(self, token, ip):
-        # Begin the process of validating this token.
-        if token in self.activeTokens:
-            # Let's make sure this token is for this IP.
-            if token.getIP() == ip:
-                # We've got a match!
-                self.deleteToken(token)
-                return 1
+        if self.tokenStore.useToken(token, ip):
+            return 1
         elif ip == '0.0.0.0:0':
             return 1
         return 0
 
-
     def storeToken(self, tokenObj):
         """
         Store and activate a new login token.
         """
 
-        # Begin the process of storing this token.
-
-        for token in self.activeTokens:
-
-            # Is there already an active token object on this ip?
-            if token.getIP() == tokenObj.getIP():
-                # If so, deactivate the old token.
-                self.deleteToken(token)
-
-            # Token objects with matching tokens are okay, as long as the
-            # IP addresses do not match on both objects. Matching IPs
-            # would have already been detected from the code above.
-
-        # If we've made it this far, we can finally store the token.
-
-        # First, add the token to the activeTokens list.
-        self.activeTokens.append(tokenObj)
-        self.notify.debug('Activated token: %s, IP: %s' % (tokenObj.getToken(), tokenObj.getIP()))
-
-        # Then, start the deactivateToken task.
-        taskMgr.doMethodLater(self.getActiveTokenLength(), self.deleteTokenTask, 
-            tokenObj.getDeleteTask(), extraArgs = [tokenObj], appendTask = True)
+        # An IP can only have one active token, the store replaces the old one.
+        self.tokenStore.storeToken(tokenObj)
 
         # We're done! Tell the LauncherLoginManager.
         return 1
 
-    def deleteTokenTask(self, obj, task):
-        self.deleteToken(obj)
-        return task.done
-
     def deleteToken(self, token):
         """
-        Delete an active login token from the activeTokens list.
+        Delete an active login token.
         """
 
-        # First, stop the deactivate task.
-        taskMgr.remove(token.getDeleteTask())
-
-        self.notify.debug('Deactivated token: %s, IP: %s' % (token.getToken(), token.getIP()))
-
-        # Next, cleanup the object.
-        token.cleanup()
-
-        # Finally, remove the object from the activeTokens list.
-        self.activeTokens.remove(token)
+        self.tokenStore.deleteToken(token)
 
     def isBanned(self, ip):
         return False
@@ -128,12 +92,21 @@ class CogInvasionUberRepository(CogInvasionInternalRepository):
         # Let's start the login server connection server.
         self.loginServerConn = LoginServerConnection(self, 9001)
 
+        self.avatarSummaryCache = AvatarSummaryCache(self)
+
         self.createObjects()
         self.notify.info('Successfully started Cog Invasion Online Uber Repository!')
         
     def shutdown(self):
         CogInvasionInternalRepository.shutdown(self)
         self.loginServerConn.close()
+        self.tokenStore.cleanup()
+        if hasattr(self, 'csm'):
+            # Commit any new accounts.
+            self.csm.accountStore.close()
+        if self.avatarSummaryCache:
+            self.avatarSummaryCache.cleanup()
+            self.avatarSummaryCache = None
         
     def createObjects(self):
         self.csm = self.generateGlobalObject(DO_ID_CLIENT_SERVICES_MANAGER,
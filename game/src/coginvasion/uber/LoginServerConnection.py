@@ -11,79 +11,133 @@ Copyright (c) CIO Team. All rights reserved.
 from direct.directnotify.DirectNotifyGlobal import directNotify
 from LoginToken import LoginToken
 import socket
-import thread
-import threading
-
-uberRepo = None
+import select
+import errno
 
 SRV_CREATE_TOKEN = 0
 SRV_NTWK_MESSAGE = 1
 
+# recv() errors that just mean there's nothing to read yet.
+WOULD_BLOCK_ERRORS = (errno.EAGAIN, errno.EWOULDBLOCK)
+
 class LoginServerConnection:
+    """
+    Listens for the login server, which tells us about new login tokens and
+    network messages.
+
+    Everything is done from a task on the main loop: the listening socket
+    and the login server connections are non-blocking, and each frame we
+    select() the ones that have something for us.
+    """
+
     notify = directNotify.newCategory('LoginServerConnection')
     
     def __init__(self, repository, port):
-        self.server = None
+        self.repository = repository
         
         self.socket = socket.socket()
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.socket.bind(('localhost', port))
-        self.socket.listen(5)
-        self.closeRequested = False
+        self.socket.listen(config.GetInt('login-server-backlog', 32))
+        self.socket.setblocking(0)
+
+        # The login server connections that are open.
+        self.clients = []
         
-        thread.start_new_thread(self.handleConnection, ())
+        self.task = taskMgr.add(self.__pollTask, 'loginServerConnection-poll')
         self.notify.info('Successfully started LoginServerConnection Server!')
-        
-        global uberRepo
-        uberRepo = repository
-        
-    def handleConnection(self):
-        while not self.closeRequested:
-            socket, ipAddress = self.socket.accept()
-            threading.Thread(target = self.handleClient, args = (socket, ipAddress)).start()
-        self.socket.close()
-        
-    def handleClient(self, socket, ipAddress):
-        self.notify.info('Opened a connection!')
-        while not self.closeRequested:
-            data = []
-            for s in socket.recv(2048).splitlines():
-                s = s.strip()
+
+    def __pollTask(self, task):
+        try:
+            readable, _, _ = select.select([self.socket] + self.clients, [], [], 0)
+        except (select.error, socket.error):
+            self.notify.warning('select() failed on the login server connections.')
+            return task.cont
+
+        for sock in readable:
+            if sock is self.socket:
+                self.__acceptClients()
+            else:
+                self.__readClient(sock)
+
+        return task.cont
+
+    def __acceptClients(self):
+        while True:
+            try:
+                client, ipAddress = self.socket.accept()
+            except socket.error as e:
+                if e.args[0] not in WOULD_BLOCK_ERRORS:
+                    self.notify.warning('Failed to accept a connection: %s' % str(e))
+                return
+            client.setblocking(0)
+            self.clients.append(client)
+            self.notify.info('Opened a connection!')
+
+    def __readClient(self, client):
+        try:
+            data = client.recv(2048)
+        except socket.error as e:
+            if e.args[0] in WOULD_BLOCK_ERRORS:
+                return
+            data = ''
+
+        if not data:
+            # They closed the connection.
+            self.__closeClient(client)
+            return
+
+        self.handleData(data)
+
+    def __closeClient(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+        client.close()
+            
+    def handleData(self, received):
+        data = []
+        for s in received.splitlines():
+            s = s.strip()
+            
+            if len(data) == 0:
+                # The very first line is going to be the id of the datagram.
+                # Some weird ASCII characters begin the lines, so let's just use the
+                # last character of the first line because our ids range from [0-9].
+                s = s[-1:]
                 
-                if len(data) == 0:
-                    # The very first line is going to be the id of the datagram.
-                    # Some weird ASCII characters begin the lines, so let's just use the
-                    # last character of the first line because our ids range from [0-9].
-                    s = s[-1]
-                    
-                    try:
-                        int(s)
-                        data.append(s)
-                    except ValueError:
-                        # This means that what we got wasn't an int
-                        pass
-                else:
+                try:
+                    int(s)
                     data.append(s)
+                except ValueError:
+                    # This means that what we got wasn't an int
+                    pass
+            else:
+                data.append(s)
+        
+        if len(data) > 0:
+            datagramId = int(data[0])
             
-            if len(data) > 0:
-                datagramId = int(data[0])
-                
-                if datagramId == SRV_CREATE_TOKEN:
-                    ipAddress = data[1]
-                    token = data[2]
-                    self.generateToken(ipAddress, token)
-                elif datagramId == SRV_NTWK_MESSAGE:
-                    message = data[1]
-                    self.sendNetworkMessage(message)
+            if datagramId == SRV_CREATE_TOKEN and len(data) >= 3:
+                ipAddress = data[1]
+                token = data[2]
+                self.generateToken(ipAddress, token)
+            elif datagramId == SRV_NTWK_MESSAGE and len(data) >= 2:
+                message = data[1]
+                self.sendNetworkMessage(message)
             
     def generateToken(self, ipAddress, token):
-        global uberRepo
-        uberRepo.storeToken(LoginToken(token, ipAddress))
+        self.repository.storeToken(LoginToken(token, ipAddress))
         self.notify.info('Stored token %s for IP: %s' % (token, ipAddress))
     
     def sendNetworkMessage(self, message):
-        global uberRepo
-        uberRepo.csm.d_networkMessage(message)
+        self.repository.csm.d_networkMessage(message)
         self.notify.info('Login Server published this network message: {0}.'.format(message))
         
     def close(self):
-        self.closeRequested = True
+        if self.task:
+            self.task.remove()
+            self.task = None
+        for client in self.clients:
+            client.close()
+        self.clients = []
+        self.socket.close()
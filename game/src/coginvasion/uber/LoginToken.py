@@ -13,10 +13,8 @@ class LoginToken:
 	def __init__(self, token, ip):
 		self.setToken(token)
 		self.setIP(ip)
-		self.deleteTask = "disactivateToken-" + str(id)
-		
-	def getDeleteTask(self):
-		return self.deleteTask
+		# Where the token is on the LoginTokenStore's expiry wheel.
+		self.expirySlot = None
 		
 	def setToken(self, token):
 		self.token = token
@@ -33,4 +31,4 @@ class LoginToken:
 	def cleanup(self):
 		del self.token
 		del self.ip
-		del self.deleteTask
+		del self.expirySlot
@@ -0,0 +1,124 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file LoginTokenStore.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+import math
+
+class LoginTokenStore:
+    """
+    Keeps the login tokens handed out by the login server until they are
+    used or expire.
+
+    Tokens are looked up by their token string, and by the IP they were
+    made for, since an IP can only have one token at a time. They expire
+    on a timer wheel: one slot for each `resolution` seconds of a token's
+    life, and a single task that empties the oldest slot every `resolution`
+    seconds, no matter how many tokens there are.
+    """
+
+    notify = directNotify.newCategory("LoginTokenStore")
+
+    def __init__(self, tokenLife, resolution = 1.0):
+        self.tokenLife = tokenLife
+        self.resolution = float(resolution)
+
+        # token string -> LoginToken
+        self.tokens = {}
+        # ip -> LoginToken
+        self.ip2token = {}
+
+        # Each slot is a set of the tokens that expire when we get to it.
+        # A token goes in the slot just before the current one, so it
+        # expires once we have gone all the way around.
+        numSlots = max(1, int(math.ceil(tokenLife / self.resolution)))
+        self.wheel = [set() for _ in xrange(numSlots + 1)]
+        self.currentSlot = 0
+
+        self.task = taskMgr.doMethodLater(self.resolution, self.__expireTask, "loginTokenStore-expire")
+
+    @staticmethod
+    def getHost(ip):
+        """Returns the host of an "ip:port" address, ports aren't compared."""
+        return ip.rsplit(':', 1)[0]
+
+    def getNumTokens(self):
+        return len(self.tokens)
+
+    def hasToken(self, token):
+        return token in self.tokens
+
+    def storeToken(self, tokenObj):
+        """Stores and activates a new login token, replacing the token of the same IP."""
+
+        host = self.getHost(tokenObj.getIP())
+        oldToken = self.ip2token.get(host)
+        if oldToken:
+            self.deleteToken(oldToken)
+
+        oldToken = self.tokens.get(tokenObj.getToken())
+        if oldToken:
+            self.deleteToken(oldToken)
+
+        self.tokens[tokenObj.getToken()] = tokenObj
+        self.ip2token[host] = tokenObj
+
+        tokenObj.expirySlot = (self.currentSlot - 1) % len(self.wheel)
+        self.wheel[tokenObj.expirySlot].add(tokenObj)
+
+        self.notify.debug('Activated token: %s, IP: %s' % (tokenObj.getToken(), tokenObj.getIP()))
+
+    def deleteToken(self, tokenObj):
+        """Deactivates a login token."""
+
+        if self.tokens.get(tokenObj.getToken()) is not tokenObj:
+            return
+
+        self.notify.debug('Deactivated token: %s, IP: %s' % (tokenObj.getToken(), tokenObj.getIP()))
+
+        del self.tokens[tokenObj.getToken()]
+        host = self.getHost(tokenObj.getIP())
+        if self.ip2token.get(host) is tokenObj:
+            del self.ip2token[host]
+        self.wheel[tokenObj.expirySlot].discard(tokenObj)
+
+        tokenObj.cleanup()
+
+    def useToken(self, token, ip):
+        """
+        Returns True and deactivates `token` if it is an active token for
+        the host of `ip`.
+        """
+
+        tokenObj = self.tokens.get(token)
+        if not tokenObj or self.getHost(tokenObj.getIP()) != self.getHost(ip):
+            return False
+
+        self.deleteToken(tokenObj)
+        return True
+
+    def __expireTask(self, task):
+        expired = self.wheel[self.currentSlot]
+        self.wheel[self.currentSlot] = set()
+        self.currentSlot = (self.currentSlot + 1) % len(self.wheel)
+
+        for tokenObj in expired:
+            self.deleteToken(tokenObj)
+
+        task.delayTime = self.resolution
+        return task.again
+
+    def cleanup(self):
+        if self.task:
+            self.task.remove()
+            self.task = None
+        for tokenObj in self.tokens.values():
+            tokenObj.cleanup()
+        self.tokens = None
+        self.ip2token = None
+        self.wheel = None
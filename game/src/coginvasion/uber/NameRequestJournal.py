@@ -0,0 +1,138 @@
+"""
+COG INVASION ONLINE
+Copyright (c) CIO Team. All rights reserved.
+
+@file NameRequestJournal.py
+
+"""
+
+from direct.directnotify.DirectNotifyGlobal import directNotify
+
+from collections import OrderedDict
+
+import json
+import os
+
+NAME_PENDING = 0
+NAME_ACCEPTED = 1
+NAME_DECLINED = 2
+
+class NameRequestJournal:
+    """
+    Keeps the name requests on disk as a journal: one JSON request per
+    line. A new request is written by appending a single line, no matter
+    how many requests there are, and a crash can only lose the line being
+    written. If the journal was left with a broken last line, it is
+    rewritten without it when it's loaded, so the next request doesn't end
+    up on the same line.
+
+    The requests are also kept in memory, in the order they were made.
+    """
+
+    notify = directNotify.newCategory("NameRequestJournal")
+
+    def __init__(self, journalPath, legacyPath = None):
+        self.journalPath = journalPath
+        self.legacyPath = legacyPath
+
+        # requestId -> request
+        self.requests = OrderedDict()
+
+        self.nextRequestId = 0
+
+        self.journal = None
+
+        self.load()
+
+    def getRequests(self):
+        return self.requests.values()
+
+    def addRequest(self, name, avId, accId, date, status = NAME_PENDING):
+        """Records a new name request and returns it."""
+
+        request = {'id': self.nextRequestId, 'name': name, 'avId': avId, 'accId': accId,
+                   'date': date, 'status': status}
+        self.__add(request)
+        self.__write(request)
+        return request
+
+    def __add(self, request):
+        requestId = request['id']
+        self.requests[requestId] = request
+        self.nextRequestId = max(self.nextRequestId, requestId + 1)
+
+    def __write(self, request):
+        self.journal.write(json.dumps(request) + '\n')
+        self.journal.flush()
+
+    def load(self):
+        tmpPath = self.journalPath + '.tmp'
+        if not os.path.exists(self.journalPath) and os.path.exists(tmpPath):
+            # We went down in the middle of compacting, after the new journal was written.
+            os.rename(tmpPath, self.journalPath)
+
+        if os.path.exists(self.journalPath):
+            # Whether the journal has to be rewritten before we can append to it.
+            broken = False
+            with open(self.journalPath, 'r') as journal:
+                for line in journal:
+                    if not line.endswith('\n'):
+                        # The last line can be cut off if we went down while writing it.
+                        broken = True
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        self.notify.warning("Skipping a broken line in the name journal.")
+                        broken = True
+                        continue
+                    # Journals written before statuses were dropped tag every line.
+                    request.pop('op', None)
+                    self.__add(request)
+
+            if broken:
+                self.compact()
+            else:
+                self.journal = open(self.journalPath, 'a')
+
+        elif self.legacyPath and os.path.exists(self.legacyPath):
+            # Move the requests over from the old file that was rewritten on every change.
+            with open(self.legacyPath, 'r') as dataFile:
+                for request in json.load(dataFile):
+                    self.__add({'id': self.nextRequestId, 'name': request['name'], 'avId': int(request['avId']),
+                                'accId': int(request.get('accId', 0)), 'date': request['date'],
+                                'status': int(request['status'])})
+            self.notify.info("Moved %d name requests over from %s." % (len(self.requests), self.legacyPath))
+            self.compact()
+
+        else:
+            self.journal = open(self.journalPath, 'a')
+
+    def compact(self):
+        """Rewrites the journal with one line for each request."""
+
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+        tmpPath = self.journalPath + '.tmp'
+        with open(tmpPath, 'w') as journal:
+            for request in self.requests.itervalues():
+                journal.write(json.dumps(request) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+        # Windows can't rename over an existing file.
+        if os.path.exists(self.journalPath):
+            os.remove(self.journalPath)
+        os.rename(tmpPath, self.journalPath)
+
+        self.journal = open(self.journalPath, 'a')
+
+    def cleanup(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        self.requests = None
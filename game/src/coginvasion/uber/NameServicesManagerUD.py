@@ -11,20 +11,18 @@ Copyright (c) CIO Team. All rights reserved.
 from direct.distributed.DistributedObjectGlobalUD import DistributedObjectGlobalUD
 
 from src.coginvasion.distributed.CogInvasionErrorCodes import EC_NON_EXISTENT_AV
+from src.coginvasion.uber.NameRequestJournal import NameRequestJournal, NAME_PENDING
 
 import datetime
-import json
-
-NAME_PENDING = 0
-NAME_ACCEPTED = 1
-NAME_DECLINED = 2
 
 class NameServicesManagerUD(DistributedObjectGlobalUD):
 
     def __init__(self, air):
         DistributedObjectGlobalUD.__init__(self, air)
-        self.requestedNames = []
-        self.dataPath = 'astron/nameRequests.json'
+        self.journal = None
+        self.journalPath = 'astron/nameRequests.journal'
+        # Where the name requests were kept before we had the journal.
+        self.legacyDataPath = 'astron/nameRequests.json'
 
     def requestName(self, name, avId):
         accId = self.air.getAccountIdFromSender()
@@ -41,8 +39,7 @@ class NameServicesManagerUD(DistributedObjectGlobalUD):
 
             now = datetime.datetime.now()
             date = "%s %s %s" % (now.month, now.day, now.year)
-            self.requestedNames.append({'name' : name, 'avId' : avId, 'accId': accId, 'date' : date, 'status' : NAME_PENDING})
-            self.saveData()
+            self.journal.addRequest(name, avId, accId, date, NAME_PENDING)
 
         self.air.csm.queryAccount(accId, callback = gotAccount)
 
@@ -51,8 +48,7 @@ class NameServicesManagerUD(DistributedObjectGlobalUD):
         avatar = self.air.doId2do.get(avId)
         if True:
             names, avatarIds, accIds, dates, statuses = [], [], [], [], []
-            for i in xrange((len(self.requestedNames))):
-                nameRequest = self.requestedNames[i]
+            for nameRequest in self.journal.getRequests():
                 names.append(nameRequest['name'])
                 avatarIds.append(int(nameRequest['avId']))
                 accIds.append(int(nameRequest['accId']))
@@ -62,14 +58,12 @@ class NameServicesManagerUD(DistributedObjectGlobalUD):
         else:
             avatar.ejectSelf('Attempted to access administrator only system.')
 
-    def saveData(self):
-        with open(self.dataPath, 'w') as dataFile:
-            json.dump(self.requestedNames, dataFile, indent = 1)
-
-    def loadData(self):
-        with open(self.dataPath, 'r') as dataFile:
-            self.requestedNames = list(json.load(dataFile))
-
     def announceGenerate(self):
         DistributedObjectGlobalUD.announceGenerate(self)
-        self.loadData()
+        self.journal = NameRequestJournal(self.journalPath, self.legacyDataPath)
+
+    def delete(self):
+        if self.journal:
+            self.journal.cleanup()
+            self.journal = None
+        DistributedObjectGlobalUD.delete(self)
@@ -0,0 +1,8 @@
+@echo off
+
+title CIO AI Benchmark
+
+echo Starting Cog Invasion AI Benchmark...
+
+%CIOENGINE%\python\ppython.exe -m src.coginvasion.ai.AIBenchmark %*
+pause